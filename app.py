@@ -93,6 +93,7 @@ def combine_input_data():
     summaries_df = db.load_summaries()
     topics_df = db.load_topics()
     citations_df = db.load_citations()
+    momentum_df = db.load_citation_momentum()
     recursive_summaries_df = db.load_recursive_summaries()
     bullet_list_df = db.load_bullet_list_summaries()
     markdown_summaries = db.load_summary_markdown()
@@ -103,6 +104,7 @@ def combine_input_data():
     papers_df = summaries_df.join(arxiv_df, how="left")
     papers_df = papers_df.join(topics_df, how="left")
     papers_df = papers_df.join(citations_df, how="left")
+    papers_df = papers_df.join(momentum_df, how="left")
     papers_df = papers_df.join(recursive_summaries_df, how="left")
     papers_df = papers_df.join(bullet_list_df, how="left")
     papers_df = papers_df.join(markdown_summaries, how="left")
@@ -139,8 +141,9 @@ def load_data():
     result_df["category"] = result_df["category"].apply(
         lambda x: classification_map.get(x, "🤷 OTHER")
     )
-    result_df[["citation_count", "influential_citation_count"]] = result_df[
-        ["citation_count", "influential_citation_count"]
+    momentum_cols = db.CITATION_MOMENTUM_COLUMNS
+    result_df[["citation_count", "influential_citation_count"] + momentum_cols] = result_df[
+        ["citation_count", "influential_citation_count"] + momentum_cols
     ].fillna(0)
 
     return result_df
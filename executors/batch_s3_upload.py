@@ -1,17 +1,19 @@
 import os
 import sys
 from dotenv import load_dotenv
-from tqdm import tqdm
 
 load_dotenv()
 PROJECT_PATH = os.environ.get("PROJECT_PATH")
 sys.path.append(PROJECT_PATH)
 
 import utils.paper_utils as pu
+from utils.logging_utils import setup_logger
 
-def upload_files_to_s3(local_dir, bucket_name, file_extension, override=False):
+logger = setup_logger(__name__, "batch_s3_upload.log")
+
+def upload_files_to_s3(local_dir, bucket_name, file_extension, override=False, max_workers=pu.S3_MAX_CONCURRENCY):
     # Get existing files
-    all_s3_files = pu.list_s3_files(bucket_name, strip_extension=False)
+    all_s3_files = pu.get_s3_manifest(bucket_name, max_age=0)
 
     # Get local files
     local_files = os.listdir(local_dir)
@@ -22,10 +24,11 @@ def upload_files_to_s3(local_dir, bucket_name, file_extension, override=False):
     else:
         pending_files = [f for f in local_files if f not in all_s3_files]
 
-    for filename in tqdm(pending_files):
-        arxiv_code = os.path.splitext(filename)[0]
-        format = file_extension[1:]  # Remove the dot
-        pu.upload_s3_file(arxiv_code, bucket_name, prefix="data", format=format)
+    files = [(os.path.join(local_dir, f), bucket_name, f) for f in pending_files]
+    failed = pu.upload_many(files, max_workers=max_workers, logger=logger)
+    print(f"Uploaded {len(files) - len(failed)}/{len(files)} files to {bucket_name}.")
+    for local_path, _, _ in failed:
+        print(f"  Failed: {local_path}")
 
 def upload_arxiv_images():
     print("Uploading arxiv images...")
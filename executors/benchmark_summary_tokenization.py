@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+PROJECT_PATH = os.environ.get("PROJECT_PATH")
+sys.path.append(PROJECT_PATH)
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+import utils.paper_utils as pu
+import utils.app_utils as au
+import utils.vector_store as vs
+
+
+def fake_summarize_doc_chunk(paper_title: str, document: str, model="local"):
+    """Stand-in for the LLM call: keep roughly the first quarter of each chunk."""
+    lines = [l for l in document.split("\n") if l.strip()]
+    return "\n".join(lines[: max(1, len(lines) // 4)])
+
+
+def legacy_recursive_summarize(document: str, max_tokens: int = 500):
+    """Previous implementation: character splitter + two encodes per level."""
+    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=vs.CHUNK_SIZE, chunk_overlap=vs.CHUNK_OVERLAP
+    )
+    token_count = len(vs.token_encoder.encode(document))
+    retry_once = True
+    while token_count > max_tokens:
+        doc_chunks = text_splitter.create_documents([document])
+        document = "".join(
+            au.numbered_to_bullet_list(
+                fake_summarize_doc_chunk("", chunk.page_content)
+            )
+            + "\n"
+            for chunk in doc_chunks
+        )
+        token_diff = token_count - len(vs.token_encoder.encode(document))
+        token_count = len(vs.token_encoder.encode(document))
+        if token_diff < 50:
+            if retry_once:
+                retry_once = False
+                continue
+            break
+    return token_count
+
+
+def main():
+    """Compare tokenization overhead of old and new recursive summarization."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark tokenization cost of recursive summarization"
+    )
+    parser.add_argument("--n-papers", type=int, default=20)
+    parser.add_argument("--max-tokens", type=int, default=500)
+    args = parser.parse_args()
+
+    ## LLM calls are replaced so only splitting/tokenization is measured.
+    vs.summarize_doc_chunk = fake_summarize_doc_chunk
+
+    arxiv_codes = sorted(pu.get_local_arxiv_codes("arxiv_text"))[::-1][: args.n_papers]
+    documents = [
+        pu.preprocess_arxiv_doc(pu.load_local(code, "arxiv_text", format="txt"))
+        for code in arxiv_codes
+    ]
+    if len(documents) == 0:
+        print("No local papers found under data/arxiv_text.")
+        return
+    print(f"Benchmarking on {len(documents)} papers...")
+
+    st = time.perf_counter()
+    for document in documents:
+        legacy_recursive_summarize(document, max_tokens=args.max_tokens)
+    legacy_time = time.perf_counter() - st
+
+    st = time.perf_counter()
+    for document in documents:
+        vs.recursive_summarize_by_parts(
+            "", document, max_tokens=args.max_tokens, model="local"
+        )
+    new_time = time.perf_counter() - st
+
+    print(f"Legacy splitter: {legacy_time:.2f}s ({legacy_time / len(documents):.3f}s/paper)")
+    print(f"Token splitter:  {new_time:.2f}s ({new_time / len(documents):.3f}s/paper)")
+    print(f"Speedup: {legacy_time / new_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
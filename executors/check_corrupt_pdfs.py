@@ -63,6 +63,7 @@ def check_corrupt_pdfs(
                             s3.delete_object(
                                 Bucket="arxiv-pdfs", Key=f"{arxiv_code}.pdf"
                             )
+                            pu.invalidate_s3_manifest("arxiv-pdfs")
                             print(f"  Deleted from S3: {arxiv_code}.pdf")
                         except Exception as s3_err:
                             print(f"  Failed to delete from S3: {str(s3_err)}")
@@ -11,6 +11,7 @@ sys.path.append(PROJECT_PATH)
 os.chdir(PROJECT_PATH)
 
 import utils.db as db
+import utils.paper_utils as pu
 
 table_names = [
     "arxiv_chunks",
@@ -73,6 +74,7 @@ def delete_from_s3(arxiv_code: str):
                     print(f"Deleted {key} from {bucket} bucket.")
             except Exception as e:
                 print(f"Error deleting {arxiv_code}.{ext} from {bucket}: {e}")
+        pu.invalidate_s3_manifest(bucket)
 
 
 def delete_from_vector_store(arxiv_code: str):
@@ -0,0 +1,113 @@
+import json
+import time
+import zlib
+import base64
+import random
+import signal
+import struct
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_png(width: int, height: int) -> bytes:
+    """Build a solid-color RGB PNG with the standard library only."""
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + tag
+            + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+        )
+
+    color = bytes(random.randint(0, 255) for _ in range(3))
+    raw = b"".join(b"\x00" + color * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+class FakeRDHandler(BaseHTTPRequestHandler):
+    """Mimics POST /v1/inferences of the RetroDiffusion API."""
+
+    latency = 1.0
+    error_rate = 0.0
+    rate_limit_rate = 0.0
+    stats = {"requests": 0, "ok": 0, "429": 0, "500": 0, "max_inflight": 0}
+    inflight = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        if self.path != "/v1/inferences":
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with self.lock:
+            self.stats["requests"] += 1
+            FakeRDHandler.inflight += 1
+            self.stats["max_inflight"] = max(self.stats["max_inflight"], FakeRDHandler.inflight)
+        try:
+            roll = random.random()
+            if roll < self.rate_limit_rate:
+                self._respond(429, {"detail": "Too many requests"}, {"Retry-After": "1"})
+                return
+            if roll < self.rate_limit_rate + self.error_rate:
+                self._respond(500, {"detail": "Internal error"})
+                return
+            time.sleep(self.latency)
+            images = [
+                base64.b64encode(make_png(body.get("width", 128), body.get("height", 128))).decode()
+                for _ in range(body.get("num_images", 1))
+            ]
+            self._respond(200, {"base64_images": images, "remaining_credits": 999})
+        finally:
+            with self.lock:
+                FakeRDHandler.inflight -= 1
+
+    def _respond(self, status: int, payload: dict, headers: dict = None):
+        with self.lock:
+            key = "ok" if status == 200 else str(status)
+            self.stats[key] = self.stats.get(key, 0) + 1
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    """Run a local stand-in for the RetroDiffusion API (use with RD_API_URL)."""
+    parser = argparse.ArgumentParser(description="Fake RetroDiffusion image API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds per image")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 500s")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of 429s")
+    args = parser.parse_args()
+
+    FakeRDHandler.latency = args.latency
+    FakeRDHandler.error_rate = args.error_rate
+    FakeRDHandler.rate_limit_rate = args.rate_limit_rate
+
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), FakeRDHandler)
+    print(f"Fake RD API on http://127.0.0.1:{args.port} (RD_API_URL=http://127.0.0.1:{args.port})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Stats: {FakeRDHandler.stats}")
+
+
+if __name__ == "__main__":
+    main()
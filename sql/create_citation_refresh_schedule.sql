@@ -0,0 +1,10 @@
+-- Per-paper citation refresh schedule used by h0_citations.
+CREATE TABLE IF NOT EXISTS citation_refresh_schedule (
+    arxiv_code VARCHAR(20) PRIMARY KEY,
+    last_refreshed TIMESTAMP NOT NULL,
+    next_refresh TIMESTAMP NOT NULL,
+    citation_velocity DOUBLE PRECISION NOT NULL DEFAULT 0  -- citations/day (EMA)
+);
+
+CREATE INDEX IF NOT EXISTS idx_citation_refresh_next
+    ON citation_refresh_schedule (next_refresh);
@@ -0,0 +1,59 @@
+-- Append-only citation history written by h0_citations. A row is only added
+-- when a paper's counts change, so the count on any date is the latest
+-- snapshot at or before it.
+CREATE TABLE IF NOT EXISTS citation_snapshots (
+    arxiv_code VARCHAR(20) NOT NULL,
+    snapshot_date DATE NOT NULL,
+    citation_count INTEGER NOT NULL,
+    influential_citation_count INTEGER,
+    CONSTRAINT citation_snapshots_pkey PRIMARY KEY (arxiv_code, snapshot_date)
+);
+
+-- Seed history with the current counts.
+INSERT INTO citation_snapshots (arxiv_code, snapshot_date, citation_count, influential_citation_count)
+SELECT arxiv_code, CURRENT_DATE, citation_count, influential_citation_count
+FROM semantic_details
+WHERE citation_count IS NOT NULL
+ON CONFLICT (arxiv_code, snapshot_date) DO NOTHING;
+
+-- Citation momentum per paper (refreshed by h0_citations after each run).
+-- Window velocities use the count at the window start, or the first snapshot
+-- if the paper has less history than the window.
+CREATE MATERIALIZED VIEW IF NOT EXISTS citation_momentum AS
+WITH latest AS (
+    SELECT DISTINCT ON (arxiv_code) arxiv_code, citation_count
+    FROM citation_snapshots
+    ORDER BY arxiv_code, snapshot_date DESC
+),
+first_seen AS (
+    SELECT DISTINCT ON (arxiv_code) arxiv_code, snapshot_date, citation_count
+    FROM citation_snapshots
+    ORDER BY arxiv_code, snapshot_date ASC
+),
+base_7d AS (
+    SELECT DISTINCT ON (arxiv_code) arxiv_code, citation_count
+    FROM citation_snapshots
+    WHERE snapshot_date <= CURRENT_DATE - 7
+    ORDER BY arxiv_code, snapshot_date DESC
+),
+base_30d AS (
+    SELECT DISTINCT ON (arxiv_code) arxiv_code, citation_count
+    FROM citation_snapshots
+    WHERE snapshot_date <= CURRENT_DATE - 30
+    ORDER BY arxiv_code, snapshot_date DESC
+)
+SELECT
+    l.arxiv_code,
+    l.citation_count - COALESCE(b7.citation_count, f.citation_count) AS citations_7d,
+    l.citation_count - COALESCE(b30.citation_count, f.citation_count) AS citations_30d,
+    (l.citation_count - COALESCE(b7.citation_count, f.citation_count))::DOUBLE PRECISION
+        / LEAST(7, GREATEST(CURRENT_DATE - f.snapshot_date, 1)) AS velocity_7d,
+    (l.citation_count - COALESCE(b30.citation_count, f.citation_count))::DOUBLE PRECISION
+        / LEAST(30, GREATEST(CURRENT_DATE - f.snapshot_date, 1)) AS velocity_30d
+FROM latest l
+JOIN first_seen f ON l.arxiv_code = f.arxiv_code
+LEFT JOIN base_7d b7 ON l.arxiv_code = b7.arxiv_code
+LEFT JOIN base_30d b30 ON l.arxiv_code = b30.arxiv_code;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_citation_momentum_code
+    ON citation_momentum (arxiv_code);
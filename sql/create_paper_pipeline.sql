@@ -0,0 +1,14 @@
+-- Persistent per-paper work queue for the event-driven pipeline (workflow/pipeline_worker.py).
+CREATE TABLE IF NOT EXISTS paper_pipeline (
+    arxiv_code VARCHAR(20) NOT NULL,
+    stage VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending | running | done | failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until TIMESTAMP,
+    last_error TEXT,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT paper_pipeline_pkey PRIMARY KEY (arxiv_code, stage)
+);
+
+CREATE INDEX IF NOT EXISTS idx_paper_pipeline_stage_status
+    ON paper_pipeline (stage, status);
@@ -0,0 +1,10 @@
+-- Memoized chunk summaries for recursive summarization (d0_summarize).
+CREATE TABLE IF NOT EXISTS summary_chunk_notes (
+    arxiv_code VARCHAR(20) NOT NULL,
+    level INTEGER NOT NULL,
+    chunk_hash CHAR(64) NOT NULL,  -- sha256 of the chunk text
+    model VARCHAR(100) NOT NULL,
+    summary TEXT NOT NULL,
+    tstp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT summary_chunk_notes_pkey PRIMARY KEY (arxiv_code, level, chunk_hash, model)
+);
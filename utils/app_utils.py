@@ -5,7 +5,9 @@ import numpy as np
 import datetime
 import json
 import os, re
-import boto3
+from datetime import timedelta
+from functools import lru_cache
+import streamlit as st
 
 from langchain.retrievers import ContextualCompressionRetriever
 from langchain.retrievers.document_compressors import CohereRerank
@@ -21,6 +23,8 @@ from utils.instruct import run_instructor_query
 import utils.pydantic_objects as po
 import utils.prompts as ps
 import utils.db as db
+import utils.artifact_cache as artifact_cache
+from utils.markdown_links import REWRITTEN_MARKDOWN_FILE, rewrite_markdown_image_links
 
 CONNECTION_STRING = (
     f"postgresql+psycopg2://{db.db_params['user']}:{db.db_params['password']}"
@@ -295,9 +299,26 @@ query_config_json = """
 query_config = json.loads(query_config_json)
 
 
+@lru_cache(maxsize=512)
+def _load_extended_notes(arxiv_code: str, level=None, expected_tokens=None) -> str:
+    """Load paper notes; raises if missing so misses aren't memoized."""
+    notes = db.get_extended_notes(arxiv_code, level=level, expected_tokens=expected_tokens)
+    if notes is None:
+        raise LookupError(arxiv_code)
+    return notes
+
+
+def get_extended_notes(arxiv_code: str, level=None, expected_tokens=None) -> Optional[str]:
+    """Fetch paper notes through an in-process cache (None if unavailable)."""
+    try:
+        return _load_extended_notes(arxiv_code, level=level, expected_tokens=expected_tokens)
+    except LookupError:
+        return None
+
+
 def interrogate_paper(question: str, arxiv_code: str, model="gpt-4o") -> str:
     """Ask a question about a paper."""
-    context = db.get_extended_notes(arxiv_code, expected_tokens=2000)
+    context = get_extended_notes(arxiv_code, expected_tokens=2000)
     user_message = ps.create_interrogate_user_prompt(
         context=context, user_question=question
     )
@@ -447,46 +468,29 @@ def get_similar_docs(
         return [], [], []
 
 
+@st.cache_data(ttl=timedelta(hours=1), max_entries=256, show_spinner=False)
+def _load_paper_markdown(arxiv_code: str) -> Optional[str]:
+    """Load rendered paper markdown (None if missing; misses are cached too)."""
+    markdown_content = artifact_cache.read_text('arxiv-md', f'{arxiv_code}/{REWRITTEN_MARKDOWN_FILE}')
+    if markdown_content is not None:
+        return markdown_content
+
+    # Papers converted before links were rewritten at conversion time
+    markdown_content = artifact_cache.read_text('arxiv-md', f'{arxiv_code}/paper.md')
+    if markdown_content is None:
+        return None
+    return rewrite_markdown_image_links(markdown_content, arxiv_code)
+
+
 def get_paper_markdown(arxiv_code: str) -> Tuple[str, bool]:
-    """Fetch and process paper markdown from S3."""
-    s3 = boto3.client('s3')
-    
+    """Fetch paper markdown with S3 image links (memory TTL cache -> disk cache -> S3)."""
     try:
-        # First check if the paper directory exists in S3
-        response = s3.list_objects_v2(
-            Bucket='arxiv-md',
-            Prefix=f'{arxiv_code}/'
-        )
-        
-        if 'Contents' not in response:
-            return "Paper content not available yet. Check back soon!", False
-            
-        # Get the paper.md content
-        response = s3.get_object(
-            Bucket='arxiv-md',
-            Key=f'{arxiv_code}/paper.md'
-        )
-        markdown_content = response.get('Body').read().decode('utf-8')
-        
-        # Process image references to point to S3
-        # First, handle relative paths
-        markdown_content = re.sub(
-            r'!\[(.*?)\]\((?!http)(.*?)\)',
-            lambda m: f'![{m.group(1)}](https://arxiv-md.s3.amazonaws.com/{arxiv_code}/{m.group(2)})',
-            markdown_content
-        )
-        
-        # Then, handle paths that might start with the arxiv code
-        markdown_content = re.sub(
-            f'!\[(.*?)\]\({arxiv_code}/(.*?)\)',
-            lambda m: f'![{m.group(1)}](https://arxiv-md.s3.amazonaws.com/{arxiv_code}/{m.group(2)})',
-            markdown_content
-        )
-        
-        return markdown_content, True
-        
+        markdown_content = _load_paper_markdown(arxiv_code)
     except Exception as e:
         return f"Error loading paper content: {str(e)}", False
+    if markdown_content is None:
+        return "Paper content not available yet. Check back soon!", False
+    return markdown_content, True
 
 
 def query_llmpedia_new(
@@ -0,0 +1,269 @@
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from functools import lru_cache
+from typing import Optional
+
+import boto3
+import botocore
+
+## Local, content-addressed cache for S3 artifacts (paper text, markdown, PDFs,
+## images). Blobs live under blobs/<sha256[:2]>/<sha256> and are immutable once
+## written (atomic rename), so concurrent readers never see partial files. A small
+## sqlite index maps (bucket, key) to blobs, tracks ETags for revalidation and
+## last access for LRU eviction by total bytes.
+PROJECT_PATH = os.environ.get("PROJECT_PATH", "/app")
+## Falls back to the system temp dir when this isn't writable (e.g. the app
+## running without PROJECT_PATH set).
+CACHE_DIR = os.environ.get(
+    "ARTIFACT_CACHE_DIR", os.path.join(PROJECT_PATH, "data", "artifact_cache")
+)
+FALLBACK_CACHE_DIR = os.path.join(tempfile.gettempdir(), "artifact_cache")
+MAX_BYTES = int(os.environ.get("ARTIFACT_CACHE_MAX_BYTES", 5 * 1024**3))
+REVALIDATE_SECONDS = 24 * 60 * 60
+CHUNK_BYTES = 1024 * 1024
+
+_local = threading.local()
+
+
+@lru_cache(maxsize=None)
+def _get_s3_client():
+    return boto3.client("s3")
+
+
+@lru_cache(maxsize=None)
+def _get_cache_dir() -> str:
+    """First writable cache directory (configured, then temp dir)."""
+    for cache_dir in (CACHE_DIR, FALLBACK_CACHE_DIR):
+        try:
+            os.makedirs(os.path.join(cache_dir, "blobs"), exist_ok=True)
+        except OSError:
+            continue
+        if os.access(cache_dir, os.W_OK):
+            return cache_dir
+    raise OSError(f"No writable artifact cache directory ({CACHE_DIR}, {FALLBACK_CACHE_DIR}).")
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Per-thread connection to the cache index."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(
+            os.path.join(_get_cache_dir(), "index.db"), timeout=30, isolation_level=None
+        )
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                bucket TEXT NOT NULL,
+                key TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                etag TEXT,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                validated_at REAL NOT NULL,
+                PRIMARY KEY (bucket, key)
+            );
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_sha ON entries (sha256);")
+        _local.conn = conn
+    return conn
+
+
+def _blob_path(sha256: str) -> str:
+    return os.path.join(_get_cache_dir(), "blobs", sha256[:2], sha256)
+
+
+def _lookup(bucket: str, key: str) -> Optional[tuple]:
+    row = (
+        _get_conn()
+        .execute(
+            "SELECT sha256, etag, validated_at FROM entries WHERE bucket = ? AND key = ?;",
+            (bucket, key),
+        )
+        .fetchone()
+    )
+    return row
+
+
+def _download(bucket: str, key: str) -> tuple[str, str, int]:
+    """Stream an object into the blob store. Returns (sha256, etag, size)."""
+    response = _get_s3_client().get_object(Bucket=bucket, Key=key)
+    etag = response["ETag"].strip('"')
+    sha = hashlib.sha256()
+    md5 = hashlib.md5()
+    tmp_path = os.path.join(
+        _get_cache_dir(), "blobs", f".tmp-{os.getpid()}-{threading.get_ident()}"
+    )
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in response["Body"].iter_chunks(CHUNK_BYTES):
+                sha.update(chunk)
+                md5.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        ## Single-part ETags are the MD5 of the content; multipart ones aren't.
+        if "-" not in etag and md5.hexdigest() != etag:
+            raise IOError(f"Checksum mismatch for s3://{bucket}/{key}.")
+        sha256 = sha.hexdigest()
+        blob_path = _blob_path(sha256)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(tmp_path, blob_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return sha256, etag, size
+
+
+def _store(bucket: str, key: str, sha256: str, etag: str, size: int):
+    now = time.time()
+    _get_conn().execute(
+        """
+        INSERT INTO entries (bucket, key, sha256, etag, size, last_access, validated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (bucket, key) DO UPDATE SET
+            sha256 = excluded.sha256, etag = excluded.etag, size = excluded.size,
+            last_access = excluded.last_access, validated_at = excluded.validated_at;
+        """,
+        (bucket, key, sha256, etag, size, now, now),
+    )
+
+
+def _is_stale(bucket: str, key: str, etag: str) -> bool:
+    """Check the cached ETag against S3. Deleted objects are evicted."""
+    try:
+        head = _get_s3_client().head_object(Bucket=bucket, Key=key)
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            invalidate(bucket, key)
+            return True
+        return False
+    return head["ETag"].strip('"') != etag
+
+
+def _drop_entries(where: str, params: tuple):
+    """Delete index entries and remove blobs no longer referenced by any entry."""
+    conn = _get_conn()
+    shas = {
+        row[0]
+        for row in conn.execute(f"SELECT sha256 FROM entries WHERE {where};", params)
+    }
+    conn.execute(f"DELETE FROM entries WHERE {where};", params)
+    _remove_unreferenced(shas)
+
+
+def _remove_unreferenced(shas: set[str]):
+    """Remove blobs that no index entry points to anymore."""
+    conn = _get_conn()
+    for sha256 in shas:
+        refs = conn.execute(
+            "SELECT COUNT(*) FROM entries WHERE sha256 = ?;", (sha256,)
+        ).fetchone()[0]
+        if refs == 0:
+            ## Readers holding the file open keep reading; new readers re-fetch.
+            try:
+                os.remove(_blob_path(sha256))
+            except FileNotFoundError:
+                pass
+
+
+def evict(max_bytes: int = MAX_BYTES):
+    """Drop least recently used entries until the cache fits in max_bytes."""
+    conn = _get_conn()
+    total = conn.execute(
+        "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT sha256, size FROM entries);"
+    ).fetchone()[0]
+    if total <= max_bytes:
+        return
+    target = int(max_bytes * 0.9)
+    rows = conn.execute(
+        "SELECT bucket, key, sha256, size FROM entries ORDER BY last_access ASC;"
+    ).fetchall()
+    seen = set()
+    for bucket, key, sha256, size in rows:
+        if total <= target:
+            break
+        _drop_entries("bucket = ? AND key = ?", (bucket, key))
+        if not os.path.exists(_blob_path(sha256)) and sha256 not in seen:
+            seen.add(sha256)
+            total -= size
+
+
+def fetch(bucket: str, key: str, revalidate: bool = True) -> Optional[str]:
+    """Get the local path of an S3 object, downloading it if needed. None if missing."""
+    row = _lookup(bucket, key)
+    if row is not None:
+        sha256, etag, validated_at = row
+        blob_path = _blob_path(sha256)
+        fresh = not revalidate or time.time() - validated_at < REVALIDATE_SECONDS
+        if os.path.exists(blob_path) and (fresh or not _is_stale(bucket, key, etag)):
+            _get_conn().execute(
+                "UPDATE entries SET last_access = ?, validated_at = ? WHERE bucket = ? AND key = ?;",
+                (time.time(), validated_at if fresh else time.time(), bucket, key),
+            )
+            return blob_path
+
+    try:
+        sha256, etag, size = _download(bucket, key)
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            if row is not None:
+                invalidate(bucket, key)
+            return None
+        raise
+    _store(bucket, key, sha256, etag, size)
+    if row is not None and row[0] != sha256:
+        _remove_unreferenced({row[0]})
+    evict()
+    return _blob_path(sha256)
+
+
+def _read_direct(bucket: str, key: str) -> Optional[bytes]:
+    """Read an S3 object without the cache. None if it doesn't exist."""
+    try:
+        response = _get_s3_client().get_object(Bucket=bucket, Key=key)
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return None
+        raise
+    return response["Body"].read()
+
+
+def read_bytes(bucket: str, key: str, revalidate: bool = True) -> Optional[bytes]:
+    """Read an S3 object through the cache. None if it doesn't exist.
+
+    Falls back to reading straight from S3 if the cache itself fails
+    (unwritable disk, locked or corrupt index)."""
+    try:
+        for _ in range(2):
+            path = fetch(bucket, key, revalidate=revalidate)
+            if path is None:
+                return None
+            try:
+                with open(path, "rb") as f:
+                    return f.read()
+            except FileNotFoundError:
+                ## Evicted between lookup and open; fetch again.
+                invalidate(bucket, key)
+    except (OSError, sqlite3.Error):
+        pass
+    return _read_direct(bucket, key)
+
+
+def read_text(bucket: str, key: str, revalidate: bool = True) -> Optional[str]:
+    """Read a text S3 object through the cache."""
+    data = read_bytes(bucket, key, revalidate=revalidate)
+    return None if data is None else data.decode("utf-8")
+
+
+def invalidate(bucket: str, key: Optional[str] = None):
+    """Forget cached entries for a key (or a whole bucket)."""
+    if key is None:
+        _drop_entries("bucket = ?", (bucket,))
+    else:
+        _drop_entries("bucket = ? AND key = ?", (bucket, key))
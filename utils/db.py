@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine, text, Engine
+from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 from typing import Optional, Union
 import streamlit as st
@@ -23,6 +24,17 @@ except:
 
 database_url = f"postgresql+psycopg2://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['dbname']}"
 
+_engine = None
+
+
+def get_engine() -> Engine:
+    """Get the process-wide SQLAlchemy engine (connection pool), creating it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(database_url, pool_pre_ping=True)
+    return _engine
+
+
 EMBEDDING_DIMENSIONS = {
     "gte": 1024,
     "nv": 4096,
@@ -56,7 +68,7 @@ def log_instructor_query(
 ):
     """Log token usage in DB."""
     try:
-        engine = create_engine(database_url)
+        engine = get_engine()
         with engine.begin() as conn:
             id = str(uuid.uuid4())
             tstp = pd.to_datetime("now").strftime("%Y-%m-%d %H:%M:%S")
@@ -86,7 +98,7 @@ def log_instructor_query(
 
 def log_error_db(error):
     """Log error in DB along with streamlit app state."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     with engine.begin() as conn:
         error_id = str(uuid.uuid4())
         tstp = pd.to_datetime("now").strftime("%Y-%m-%d %H:%M:%S")
@@ -110,7 +122,7 @@ def log_error_db(error):
 def log_qna_db(user_question, response):
     """Log Q&A in DB along with streamlit app state."""
     try:
-        engine = create_engine(database_url)
+        engine = get_engine()
         with engine.begin() as conn:
             qna_id = str(uuid.uuid4())
             tstp = pd.to_datetime("now").strftime("%Y-%m-%d %H:%M:%S")
@@ -137,7 +149,7 @@ def log_qna_db(user_question, response):
 def log_visit(entrypoint: str):
     """Log user visit in DB."""
     try:
-        engine = create_engine(database_url)
+        engine = get_engine()
         with engine.begin() as conn:
             visit_id = str(uuid.uuid4())
             tstp = pd.to_datetime("now").strftime("%Y-%m-%d %H:%M:%S")
@@ -162,7 +174,7 @@ def log_visit(entrypoint: str):
 
 def report_issue(arxiv_code, issue_type):
     """Report an issue in DB."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     with engine.begin() as conn:
         issue_id = str(uuid.uuid4())
         tstp = pd.to_datetime("now").strftime("%Y-%m-%d %H:%M:%S")
@@ -187,7 +199,7 @@ def report_issue(arxiv_code, issue_type):
 
 def get_reported_non_llm_papers():
     """Get a list of non-LLM papers reported by users."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     with engine.begin() as conn:
         query = text(
             """
@@ -205,7 +217,7 @@ def get_reported_non_llm_papers():
 
 def update_reported_status(arxiv_code, issue_type, resolved=True):
     """Update user-reported issue status in DB (resolved or not)."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     with engine.begin() as conn:
         query = text(
             """
@@ -224,7 +236,7 @@ def update_reported_status(arxiv_code, issue_type, resolved=True):
 
 def insert_recursive_summary(arxiv_code, summary):
     """Insert data into recursive_summary table in DB."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     with engine.begin() as conn:
         query = text(
             """
@@ -241,7 +253,7 @@ def insert_recursive_summary(arxiv_code, summary):
 
 def insert_bullet_list_summary(arxiv_code, summary):
     """Insert data into bullet_list_summaries table in DB."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     with engine.begin() as conn:
         query = text(
             """
@@ -256,19 +268,48 @@ def insert_bullet_list_summary(arxiv_code, summary):
     return True
 
 
+def insert_summary_rows(table_name: str, rows: list[dict]) -> int:
+    """Insert many summary rows (same columns) into a table in one transaction."""
+    if len(rows) == 0:
+        return 0
+    columns = list(rows[0].keys())
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                f"""
+                INSERT INTO {table_name} ({", ".join(columns)})
+                VALUES ({", ".join(f":{c}" for c in columns)});
+                """
+            ),
+            rows,
+        )
+    return len(rows)
+
+
 def load_arxiv(arxiv_code: str = None):
     query = "SELECT * FROM arxiv_details"
     if arxiv_code:
         query += f" WHERE arxiv_code = '{arxiv_code}'"
-    conn = create_engine(database_url)
+    conn = get_engine()
     arxiv_df = pd.read_sql(query, conn)
     arxiv_df.set_index("arxiv_code", inplace=True)
     return arxiv_df
 
 
+def load_arxiv_batch(arxiv_codes: list[str]) -> pd.DataFrame:
+    """Load arxiv_details rows for a list of arxiv codes."""
+    query = text("SELECT * FROM arxiv_details WHERE arxiv_code = ANY(:arxiv_codes);")
+    arxiv_df = pd.read_sql(
+        query, get_engine(), params={"arxiv_codes": list(arxiv_codes)}
+    )
+    arxiv_df.set_index("arxiv_code", inplace=True)
+    return arxiv_df
+
+
 def load_summaries():
     query = "SELECT * FROM summaries;"
-    conn = create_engine(database_url)
+    conn = get_engine()
     summaries_df = pd.read_sql(query, conn)
     summaries_df.set_index("arxiv_code", inplace=True)
     summaries_df.drop(columns=["tstp"], inplace=True)
@@ -278,7 +319,7 @@ def load_summaries():
 def load_recursive_summaries():
     """ Load narrated summaries from DB."""
     query = "SELECT * FROM recursive_summaries;"
-    conn = create_engine(database_url)
+    conn = get_engine()
     recursive_summaries_df = pd.read_sql(query, conn)
     recursive_summaries_df.set_index("arxiv_code", inplace=True)
     recursive_summaries_df.rename(
@@ -290,7 +331,7 @@ def load_recursive_summaries():
 
 def load_bullet_list_summaries():
     query = "SELECT * FROM bullet_list_summaries;"
-    conn = create_engine(database_url)
+    conn = get_engine()
     bullet_list_summaries_df = pd.read_sql(query, conn)
     bullet_list_summaries_df.set_index("arxiv_code", inplace=True)
     bullet_list_summaries_df.rename(
@@ -302,7 +343,7 @@ def load_bullet_list_summaries():
 
 def load_summary_notes():
     query = "SELECT * FROM summary_notes;"
-    conn = create_engine(database_url)
+    conn = get_engine()
     extended_summaries_df = pd.read_sql(query, conn)
     extended_summaries_df.set_index("arxiv_code", inplace=True)
     return extended_summaries_df
@@ -310,7 +351,7 @@ def load_summary_notes():
 
 def load_summary_markdown():
     query = "SELECT * FROM summary_markdown;"
-    conn = create_engine(database_url)
+    conn = get_engine()
     markdown_summaries_df = pd.read_sql(query, conn)
     markdown_summaries_df.set_index("arxiv_code", inplace=True)
     markdown_summaries_df.rename(columns={"summary": "markdown_notes"}, inplace=True)
@@ -320,7 +361,7 @@ def load_summary_markdown():
 
 def load_topics():
     query = "SELECT * FROM topics;"
-    conn = create_engine(database_url)
+    conn = get_engine()
     topics_df = pd.read_sql(query, conn)
     topics_df.set_index("arxiv_code", inplace=True)
     return topics_df
@@ -328,7 +369,7 @@ def load_topics():
 
 def load_similar_documents():
     query = "SELECT * FROM similar_documents;"
-    conn = create_engine(database_url)
+    conn = get_engine()
     similar_docs_df = pd.read_sql(query, conn)
     similar_docs_df.set_index("arxiv_code", inplace=True)
     similar_docs_df["similar_docs"] = similar_docs_df["similar_docs"].apply(
@@ -341,18 +382,156 @@ def load_citations(arxiv_code: str = None):
     query = "SELECT * FROM semantic_details"
     if arxiv_code:
         query += f" WHERE arxiv_code = '{arxiv_code}';"
-    conn = create_engine(database_url)
+    conn = get_engine()
     citations_df = pd.read_sql(query, conn)
     citations_df.set_index("arxiv_code", inplace=True)
     citations_df.drop(columns=["paper_id"], inplace=True)
     return citations_df
 
 
+def upsert_semantic_details(rows: list[dict]) -> int:
+    """Replace Semantic Scholar details for many papers in one transaction."""
+    if len(rows) == 0:
+        return 0
+    columns = [
+        "arxiv_code",
+        "paper_id",
+        "venue",
+        "tldr",
+        "citation_count",
+        "influential_citation_count",
+    ]
+    params = [{c: row.get(c) for c in columns} for row in rows]
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(
+            text("DELETE FROM semantic_details WHERE arxiv_code = ANY(:arxiv_codes);"),
+            {"arxiv_codes": [row["arxiv_code"] for row in params]},
+        )
+        conn.execute(
+            text(
+                f"""
+                INSERT INTO semantic_details ({", ".join(columns)})
+                VALUES ({", ".join(f":{c}" for c in columns)});
+                """
+            ),
+            params,
+        )
+    return len(params)
+
+
+def insert_citation_snapshots(rows: list[dict]) -> bool:
+    """Append today's citation counts, skipping papers whose counts are unchanged."""
+    rows = [row for row in rows if row.get("citation_count") is not None]
+    if len(rows) == 0:
+        return True
+    params = [
+        {
+            "arxiv_code": row["arxiv_code"],
+            "citation_count": row["citation_count"],
+            "influential_citation_count": row.get("influential_citation_count"),
+        }
+        for row in rows
+    ]
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO citation_snapshots
+                (arxiv_code, snapshot_date, citation_count, influential_citation_count)
+                SELECT :arxiv_code, CURRENT_DATE, :citation_count, :influential_citation_count
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM (
+                        SELECT citation_count, influential_citation_count
+                        FROM citation_snapshots
+                        WHERE arxiv_code = :arxiv_code
+                        ORDER BY snapshot_date DESC
+                        LIMIT 1
+                    ) last
+                    WHERE last.citation_count = :citation_count
+                    AND last.influential_citation_count IS NOT DISTINCT FROM :influential_citation_count
+                )
+                ON CONFLICT (arxiv_code, snapshot_date) DO UPDATE SET
+                    citation_count = EXCLUDED.citation_count,
+                    influential_citation_count = EXCLUDED.influential_citation_count;
+                """
+            ),
+            params,
+        )
+        conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY citation_momentum;"))
+    return True
+
+
+CITATION_MOMENTUM_COLUMNS = ["citations_7d", "citations_30d", "velocity_7d", "velocity_30d"]
+
+
+def load_citation_momentum() -> pd.DataFrame:
+    """Load recent citation gains and velocities (citations/day) per paper.
+
+    Returns an empty frame if the citation_momentum view doesn't exist or
+    hasn't been populated yet (fresh DB, h0 not run)."""
+    query = "SELECT * FROM citation_momentum"
+    conn = get_engine()
+    try:
+        momentum_df = pd.read_sql(query, conn)
+    except SQLAlchemyError as e:
+        print(f"Citation momentum not available: {e}")
+        momentum_df = pd.DataFrame(
+            columns=["arxiv_code"] + CITATION_MOMENTUM_COLUMNS
+        ).astype({c: float for c in CITATION_MOMENTUM_COLUMNS})
+    momentum_df.set_index("arxiv_code", inplace=True)
+    return momentum_df
+
+
+def get_citation_refresh_candidates(limit: int) -> pd.DataFrame:
+    """Get papers due for a citation refresh: never refreshed first, then most overdue."""
+    query = text(
+        """
+        SELECT s.arxiv_code, d.published, c.last_refreshed, c.citation_velocity,
+               sd.citation_count
+        FROM (SELECT DISTINCT arxiv_code FROM summaries) s
+        LEFT JOIN arxiv_details d ON s.arxiv_code = d.arxiv_code
+        LEFT JOIN citation_refresh_schedule c ON s.arxiv_code = c.arxiv_code
+        LEFT JOIN semantic_details sd ON s.arxiv_code = sd.arxiv_code
+        WHERE c.next_refresh IS NULL OR c.next_refresh <= NOW()
+        ORDER BY c.next_refresh ASC NULLS FIRST, d.published DESC NULLS LAST
+        LIMIT :limit;
+        """
+    )
+    with get_engine().connect() as conn:
+        candidates_df = pd.read_sql(query, conn, params={"limit": limit})
+    return candidates_df
+
+
+def upsert_citation_schedule(rows: list[dict]) -> int:
+    """Store last/next refresh times and citation velocity for many papers."""
+    if len(rows) == 0:
+        return 0
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO citation_refresh_schedule
+                (arxiv_code, last_refreshed, next_refresh, citation_velocity)
+                VALUES (:arxiv_code, :last_refreshed, :next_refresh, :citation_velocity)
+                ON CONFLICT (arxiv_code) DO UPDATE SET
+                    last_refreshed = EXCLUDED.last_refreshed,
+                    next_refresh = EXCLUDED.next_refresh,
+                    citation_velocity = EXCLUDED.citation_velocity;
+                """
+            ),
+            rows,
+        )
+    return len(rows)
+
+
 def load_repositories(arxiv_code: str = None):
     query = "SELECT * FROM arxiv_repos"
     if arxiv_code:
         query += f" WHERE arxiv_code = '{arxiv_code}';"
-    conn = create_engine(database_url)
+    conn = get_engine()
     repos_df = pd.read_sql(query, conn)
     repos_df.set_index("arxiv_code", inplace=True)
     repos_df.rename(
@@ -373,7 +552,7 @@ def load_tweet_insights(arxiv_code: str = None, drop_rejected: bool = False):
     if arxiv_code:
         query += f" AND arxiv_code = '{arxiv_code}';"
     query += " ORDER BY tstp DESC;"
-    conn = create_engine(database_url)
+    conn = get_engine()
     tweet_reviews_df = pd.read_sql(query, conn)
     tweet_reviews_df.set_index("arxiv_code", inplace=True)
     if drop_rejected:
@@ -387,7 +566,7 @@ def load_tweet_insights(arxiv_code: str = None, drop_rejected: bool = False):
 def load_punchlines():
     """Load paper punchlines from the database."""
     query = "SELECT * FROM summary_punchlines;"
-    conn = create_engine(database_url)
+    conn = get_engine()
     punchlines_df = pd.read_sql(query, conn)
     punchlines_df.set_index("arxiv_code", inplace=True)
     punchlines_df.drop(columns=["tstp"], inplace=True)
@@ -397,7 +576,7 @@ def load_punchlines():
 def get_arxiv_parent_chunk_ids(chunk_ids: list):
     """Get (arxiv_code, parent_id) for a list of (arxiv_code, child_id) tuples."""
     ## ToDo: Improve version param.
-    engine = create_engine(database_url)
+    engine = get_engine()
     with engine.begin() as conn:
         # Prepare a list of conditions for matching pairs of arxiv_code and child_id
         conditions = " OR ".join(
@@ -422,7 +601,7 @@ def get_arxiv_parent_chunk_ids(chunk_ids: list):
 
 def get_arxiv_chunks(chunk_ids: list, source="child"):
     """Get chunks with metadata for a list of (arxiv_code, chunk_id) tuples."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     source_table = "arxiv_chunks" if source == "child" else "arxiv_parent_chunks"
     with engine.begin() as conn:
         # Prepare a list of conditions for matching pairs of arxiv_code and chunk_id
@@ -485,14 +664,19 @@ def remove_from_db(arxiv_code, db_params, table_name):
 
 
 def upload_df_to_db(
-    df: pd.DataFrame, table_name: str, params: dict, if_exists: str = "append"
+    df: pd.DataFrame,
+    table_name: str,
+    params: dict,
+    if_exists: str = "append",
+    chunksize: int = 10,
 ):
     """Upload a dataframe to a database."""
     db_url = (
         f"postgresql+psycopg2://{params['user']}:{params['password']}"
         f"@{params['host']}:{params['port']}/{params['dbname']}"
     )
-    engine = create_engine(db_url)
+    shared_engine = params == db_params
+    engine = get_engine() if shared_engine else create_engine(db_url)
     df = df.replace("\x00", "", regex=True)
     df.to_sql(
         table_name,
@@ -500,7 +684,7 @@ def upload_df_to_db(
         if_exists=if_exists,
         index=False,
         method="multi",
-        chunksize=10,
+        chunksize=chunksize,
     )
 
     ## Commit.
@@ -509,7 +693,8 @@ def upload_df_to_db(
             cur.execute("COMMIT")
 
     ## Close.
-    engine.dispose()
+    if not shared_engine:
+        engine.dispose()
 
     return True
 
@@ -589,7 +774,7 @@ def get_topic_embedding_dist(db_params=db_params):
 
 def get_extended_content(arxiv_code: str):
     """Get extended content for a given arxiv code."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     with engine.begin() as conn:
         query = text(
             """
@@ -613,7 +798,7 @@ def get_extended_content(arxiv_code: str):
 
 def get_weekly_summary_inputs(date: str):
     """Get weekly summaries for a given date (from last monday to next sunday)."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     ## Find last monday if not monday.
     date_st = pd.to_datetime(date).date() - pd.Timedelta(
         days=pd.to_datetime(date).weekday()
@@ -646,7 +831,7 @@ def get_weekly_summary_inputs(date: str):
 
 def check_weekly_summary_exists(date_str: str):
     """Check if weekly summary exists for a given date."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     with engine.begin() as conn:
         query = text(
             f"""
@@ -658,13 +843,12 @@ def check_weekly_summary_exists(date_str: str):
         result = conn.execute(query)
         count = result.fetchone()[0]
 
-    engine.dispose()
     return count > 0
 
 
 def get_weekly_content(date_str: str, content_type: str = "content"):
     """Get weekly content for a given date."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     with engine.begin() as conn:
         query = text(
             f"""
@@ -676,7 +860,6 @@ def get_weekly_content(date_str: str, content_type: str = "content"):
         result = conn.execute(query)
         content = result.fetchone()[0]
 
-    engine.dispose()
     return content
 
 
@@ -686,7 +869,7 @@ from sqlalchemy import create_engine, text
 
 def get_weekly_repos(date_str):
     """Get weekly repos for a given date."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     start_date = (
         pd.to_datetime(date_str).date()
         - pd.Timedelta(days=pd.to_datetime(date_str).weekday())
@@ -718,7 +901,7 @@ def get_weekly_repos(date_str):
 
 def get_weekly_summary_old(date_str: str):
     """Get weekly summary for a given date (old approach)."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     date_str = (
         pd.to_datetime(date_str).date()
         - pd.Timedelta(days=pd.to_datetime(date_str).weekday())
@@ -735,45 +918,308 @@ def get_weekly_summary_old(date_str: str):
         review = result.fetchone()
         review = review[0] if review else None
 
-    engine.dispose()
     return review
 
 
 def get_extended_notes(arxiv_code: str, level=None, expected_tokens=None):
     """Get extended summary for a given arxiv code."""
-    engine = create_engine(database_url)
+    notes = get_extended_notes_batch(
+        [arxiv_code], level=level, expected_tokens=expected_tokens
+    )
+    return notes.get(arxiv_code)
+
+
+def get_extended_notes_batch(
+    arxiv_codes: list[str], level=None, expected_tokens=None
+) -> dict[str, str]:
+    """Get extended summaries for many arxiv codes in one query.
+
+    Picks the given level, else the notes closest to expected_tokens, else
+    the most concise level. Papers without matching notes are left out.
+    """
+    if len(arxiv_codes) == 0:
+        return {}
+    params = {"arxiv_codes": list(arxiv_codes)}
+    if level:
+        query = text(
+            """
+            SELECT arxiv_code, summary
+            FROM summary_notes
+            WHERE arxiv_code = ANY(:arxiv_codes)
+            AND level = :level;
+            """
+        )
+        params["level"] = level
+    elif expected_tokens:
+        query = text(
+            """
+            SELECT DISTINCT ON (arxiv_code) arxiv_code, summary
+            FROM summary_notes
+            WHERE arxiv_code = ANY(:arxiv_codes)
+            ORDER BY arxiv_code, ABS(tokens - :expected_tokens) ASC;
+            """
+        )
+        params["expected_tokens"] = expected_tokens
+    else:
+        query = text(
+            """
+            SELECT DISTINCT ON (arxiv_code) arxiv_code, summary
+            FROM summary_notes
+            WHERE arxiv_code = ANY(:arxiv_codes)
+            ORDER BY arxiv_code, level DESC;
+            """
+        )
+    engine = get_engine()
     with engine.begin() as conn:
-        if level:
-            query = text(
-                f"""
-                SELECT arxiv_code, level, summary
-                FROM summary_notes
-                WHERE arxiv_code = '{arxiv_code}'
-                AND level = '{level}';
-                """
-            )
-        elif expected_tokens:
-            query = text(
-                f"""
-                SELECT DISTINCT ON (arxiv_code) arxiv_code, level, summary, tokens
-                FROM summary_notes
-                WHERE arxiv_code = '{arxiv_code}'
-                ORDER BY arxiv_code, ABS(tokens - {expected_tokens}) ASC;
-                """
+        result = conn.execute(query, params)
+        return {row[0]: row[1] for row in result}
+
+
+def get_chunk_summaries(arxiv_code: str, model: str) -> dict[tuple[int, str], str]:
+    """Get memoized chunk summaries for a paper, keyed by (level, chunk_hash)."""
+    engine = get_engine()
+    with engine.begin() as conn:
+        query = text(
+            """
+            SELECT level, chunk_hash, summary
+            FROM summary_chunk_notes
+            WHERE arxiv_code = :arxiv_code
+            AND model = :model;
+            """
+        )
+        result = conn.execute(query, {"arxiv_code": arxiv_code, "model": model})
+        chunk_summaries = {(row[0], row[1]): row[2] for row in result.fetchall()}
+    return chunk_summaries
+
+
+def insert_chunk_summary(
+    arxiv_code: str, level: int, chunk_hash: str, model: str, summary: str
+) -> bool:
+    """Persist a single chunk summary so interrupted runs can resume."""
+    engine = get_engine()
+    with engine.begin() as conn:
+        query = text(
+            """
+            INSERT INTO summary_chunk_notes (arxiv_code, level, chunk_hash, model, summary, tstp)
+            VALUES (:arxiv_code, :level, :chunk_hash, :model, :summary, :tstp)
+            ON CONFLICT (arxiv_code, level, chunk_hash, model) DO NOTHING;
+            """
+        )
+        conn.execute(
+            query,
+            {
+                "arxiv_code": arxiv_code,
+                "level": level,
+                "chunk_hash": chunk_hash,
+                "model": model,
+                "summary": summary.replace("\x00", ""),
+                "tstp": datetime.now(),
+            },
+        )
+    return True
+
+
+## Paper pipeline queue.
+
+
+def enqueue_pipeline_rows(rows: list[tuple[str, str]], status: str = "pending") -> int:
+    """Add (arxiv_code, stage) rows in one statement; existing rows are left untouched."""
+    if len(rows) == 0:
+        return 0
+    engine = get_engine()
+    with engine.begin() as conn:
+        query = text(
+            """
+            INSERT INTO paper_pipeline (arxiv_code, stage, status, attempts, updated_at)
+            SELECT arxiv_code, stage, :status, 0, :tstp
+            FROM unnest(CAST(:arxiv_codes AS VARCHAR[]), CAST(:stages AS VARCHAR[]))
+                AS t (arxiv_code, stage)
+            ON CONFLICT (arxiv_code, stage) DO NOTHING;
+            """
+        )
+        result = conn.execute(
+            query,
+            {
+                "arxiv_codes": [arxiv_code for arxiv_code, _ in rows],
+                "stages": [stage for _, stage in rows],
+                "status": status,
+                "tstp": datetime.now(),
+            },
+        )
+    return result.rowcount
+
+
+def enqueue_pipeline_stages(
+    arxiv_code: str, stages: list[str], status: str = "pending"
+) -> bool:
+    """Add pipeline stages for a paper; existing stages are left untouched."""
+    enqueue_pipeline_rows([(arxiv_code, stage) for stage in stages], status=status)
+    return True
+
+
+def claim_pipeline_stage(
+    stage: str, n: int = 1, lease_minutes: int = 30, max_attempts: int = 3
+) -> list[str]:
+    """Lease up to n pending (or lease-expired) papers for a stage."""
+    engine = get_engine()
+    with engine.begin() as conn:
+        query = text(
+            """
+            UPDATE paper_pipeline
+            SET status = 'running',
+                attempts = attempts + 1,
+                lease_until = NOW() + make_interval(mins => :lease_minutes),
+                updated_at = NOW()
+            WHERE (arxiv_code, stage) IN (
+                SELECT arxiv_code, stage
+                FROM paper_pipeline
+                WHERE stage = :stage
+                AND attempts < :max_attempts
+                AND (
+                    status = 'pending'
+                    OR (status = 'running' AND lease_until < NOW())
+                )
+                ORDER BY arxiv_code DESC
+                LIMIT :n
+                FOR UPDATE SKIP LOCKED
             )
-        else:
-            query = text(
-                f"""
-                SELECT DISTINCT ON (arxiv_code) arxiv_code, level, summary
-                FROM summary_notes
-                WHERE arxiv_code = '{arxiv_code}'
-                ORDER BY arxiv_code, level DESC;
-                """
+            RETURNING arxiv_code;
+            """
+        )
+        result = conn.execute(
+            query,
+            {
+                "stage": stage,
+                "n": n,
+                "lease_minutes": lease_minutes,
+                "max_attempts": max_attempts,
+            },
+        )
+        arxiv_codes = [row[0] for row in result.fetchall()]
+    return arxiv_codes
+
+
+def claim_pipeline_codes(
+    stage: str, arxiv_codes: list[str], lease_minutes: int = 180
+) -> list[str]:
+    """Lease specific papers for a stage (used by the batch steps).
+
+    Papers not in the queue are added as running. Papers currently leased by
+    someone else are left out of the result. Attempts are not counted, so
+    the worker still retries papers the batch run fails on."""
+    if len(arxiv_codes) == 0:
+        return []
+    engine = get_engine()
+    with engine.begin() as conn:
+        query = text(
+            """
+            INSERT INTO paper_pipeline (arxiv_code, stage, status, attempts, lease_until, updated_at)
+            SELECT arxiv_code, :stage, 'running', 0,
+                   NOW() + make_interval(mins => :lease_minutes), NOW()
+            FROM unnest(CAST(:arxiv_codes AS VARCHAR[])) AS t (arxiv_code)
+            ON CONFLICT (arxiv_code, stage) DO UPDATE
+            SET status = 'running',
+                lease_until = EXCLUDED.lease_until,
+                updated_at = NOW()
+            WHERE NOT (
+                paper_pipeline.status = 'running' AND paper_pipeline.lease_until >= NOW()
             )
-        result = conn.execute(query)
-        summary = result.fetchone()
-    engine.dispose()
-    return None if summary is None else summary[2]
+            RETURNING arxiv_code;
+            """
+        )
+        result = conn.execute(
+            query,
+            {
+                "stage": stage,
+                "arxiv_codes": list(dict.fromkeys(arxiv_codes)),
+                "lease_minutes": lease_minutes,
+            },
+        )
+        claimed = {row[0] for row in result.fetchall()}
+    return [arxiv_code for arxiv_code in arxiv_codes if arxiv_code in claimed]
+
+
+def complete_pipeline_codes(
+    stage: str, arxiv_codes: list[str], next_stages: list[str] = None
+) -> bool:
+    """Mark a stage as done for many papers and enqueue the stages that depend on it."""
+    if len(arxiv_codes) == 0:
+        return True
+    engine = get_engine()
+    with engine.begin() as conn:
+        query = text(
+            """
+            UPDATE paper_pipeline
+            SET status = 'done', lease_until = NULL, last_error = NULL, updated_at = :tstp
+            WHERE stage = :stage AND arxiv_code = ANY(:arxiv_codes);
+            """
+        )
+        conn.execute(
+            query,
+            {"stage": stage, "arxiv_codes": list(arxiv_codes), "tstp": datetime.now()},
+        )
+    if next_stages:
+        enqueue_pipeline_rows(
+            [(arxiv_code, s) for arxiv_code in arxiv_codes for s in next_stages]
+        )
+    return True
+
+
+def complete_pipeline_stage(
+    arxiv_code: str, stage: str, next_stages: list[str] = None
+) -> bool:
+    """Mark a stage as done and enqueue the stages that depend on it."""
+    return complete_pipeline_codes(stage, [arxiv_code], next_stages)
+
+
+def fail_pipeline_codes(
+    stage: str, arxiv_codes: list[str], error_message: str, max_attempts: int = 3
+) -> bool:
+    """Release stages for retry, or mark them failed once attempts run out."""
+    if len(arxiv_codes) == 0:
+        return True
+    engine = get_engine()
+    with engine.begin() as conn:
+        query = text(
+            """
+            UPDATE paper_pipeline
+            SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+                lease_until = NULL,
+                last_error = :error_message,
+                updated_at = :tstp
+            WHERE stage = :stage AND arxiv_code = ANY(:arxiv_codes);
+            """
+        )
+        conn.execute(
+            query,
+            {
+                "stage": stage,
+                "arxiv_codes": list(arxiv_codes),
+                "error_message": error_message,
+                "max_attempts": max_attempts,
+                "tstp": datetime.now(),
+            },
+        )
+    return True
+
+
+def fail_pipeline_stage(
+    arxiv_code: str, stage: str, error_message: str, max_attempts: int = 3
+) -> bool:
+    """Release a stage for retry, or mark it failed once attempts run out."""
+    return fail_pipeline_codes(stage, [arxiv_code], error_message, max_attempts)
+
+
+def get_pipeline_codes(stage: str, status: str = None) -> set[str]:
+    """Get arxiv codes queued for a stage, optionally filtered by status."""
+    engine = get_engine()
+    with engine.begin() as conn:
+        query = "SELECT arxiv_code FROM paper_pipeline WHERE stage = :stage"
+        if status is not None:
+            query += " AND status = :status"
+        result = conn.execute(text(query), {"stage": stage, "status": status})
+        arxiv_codes = {row[0] for row in result.fetchall()}
+    return arxiv_codes
 
 
 def get_recursive_summary(
@@ -788,7 +1234,7 @@ def get_recursive_summary(
         query += f" WHERE arxiv_code IN ('{codes_str}')"
 
     ## Execute query and get results.
-    conn = create_engine(database_url)
+    conn = get_engine()
     results = pd.read_sql(query, conn).set_index("arxiv_code")["summary"].to_dict()
 
     ## Get additional batches if needed.
@@ -812,7 +1258,7 @@ def get_recursive_summary(
 
 def insert_tweet_review(arxiv_code, review, tstp, tweet_type, rejected=False):
     """Insert tweet review into the database."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     with engine.begin() as conn:
         query = text(
             """
@@ -843,7 +1289,7 @@ def save_arxiv_dashboard_script(
     arxiv_code: str, summary: str, scratchpad: str, script: str
 ) -> bool:
     """Insert a new arxiv dashboard script into the DB."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     tstp = pd.to_datetime("now").strftime("%Y-%m-%d %H:%M:%S")
     with engine.begin() as conn:
         query = text(
@@ -867,7 +1313,7 @@ def save_arxiv_dashboard_script(
 
 def get_arxiv_dashboard_script(arxiv_code: str, sel_col: str = "script_content") -> str:
     """Query DB to get script for the arxiv dashboard."""
-    engine = create_engine(database_url)
+    engine = get_engine()
     with engine.begin() as conn:
         query = text(
             f"""
@@ -879,7 +1325,6 @@ def get_arxiv_dashboard_script(arxiv_code: str, sel_col: str = "script_content")
         result = conn.execute(query)
         row = result.fetchone()
         script = row[0] if row else None
-    engine.dispose()
     return script
 
 
@@ -938,7 +1383,7 @@ def store_tweets(tweets: list[dict], logger: logging.Logger, engine: Engine) ->
 def log_workflow_error(step_name: str, script_path: str, error_message: str) -> bool:
     """Log workflow execution errors to the database."""
     try:
-        engine = create_engine(database_url)
+        engine = get_engine()
         with engine.begin() as conn:
             query = text(
                 """
@@ -969,7 +1414,7 @@ def log_workflow_run(
 ) -> bool:
     """Log workflow execution status to the database."""
     try:
-        engine = create_engine(database_url)
+        engine = get_engine()
         with engine.begin() as conn:
             query = text(
                 """
@@ -1039,38 +1484,76 @@ def load_embeddings(
 ) -> tuple[list[str], list[list[float]]]:
     """Load embeddings for specified documents from the database."""
     dimension = EMBEDDING_DIMENSIONS[embedding_type]
-    engine = create_engine(database_url)
-    try:
-        with engine.begin() as conn:
-            query = text(
-                f"""
-                SELECT arxiv_code, embedding
-                FROM arxiv_embeddings_{dimension}
-                WHERE arxiv_code = ANY(:arxiv_codes)
-                AND doc_type = :doc_type
-                AND embedding_type = :embedding_type
-                ORDER BY arxiv_code
-                """
-            )
-            
-            result = conn.execute(
-                query,
-                {
-                    "arxiv_codes": arxiv_codes,
-                    "doc_type": doc_type,
-                    "embedding_type": embedding_type,
-                },
-            ).fetchall()
-            
-            codes = [r[0] for r in result]
-            embeddings = [
-                [float(x) for x in emb.strip('[]').split(',')]
-                for emb in [r[1] for r in result]
-            ]
-                    
-        return dict(zip(codes, embeddings))
-    finally:
-        engine.dispose()
+    engine = get_engine()
+    with engine.begin() as conn:
+        query = text(
+            f"""
+            SELECT arxiv_code, embedding
+            FROM arxiv_embeddings_{dimension}
+            WHERE arxiv_code = ANY(:arxiv_codes)
+            AND doc_type = :doc_type
+            AND embedding_type = :embedding_type
+            ORDER BY arxiv_code
+            """
+        )
+        
+        result = conn.execute(
+            query,
+            {
+                "arxiv_codes": arxiv_codes,
+                "doc_type": doc_type,
+                "embedding_type": embedding_type,
+            },
+        ).fetchall()
+        
+        codes = [r[0] for r in result]
+        embeddings = [
+            [float(x) for x in emb.strip('[]').split(',')]
+            for emb in [r[1] for r in result]
+        ]
+                
+    return dict(zip(codes, embeddings))
+
+
+def table_exists(table_name: str) -> bool:
+    """Check whether a table exists."""
+    engine = get_engine()
+    with engine.begin() as conn:
+        result = conn.execute(text("SELECT to_regclass(:name) IS NOT NULL;"), {"name": table_name})
+        return bool(result.scalar())
+
+
+def swap_topics_table(shadow_table: str = "topics_shadow"):
+    """Replace the topics table with a fully written shadow table in one transaction."""
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS topics_old;"))
+        conn.execute(text("ALTER TABLE IF EXISTS topics RENAME TO topics_old;"))
+        conn.execute(text(f"ALTER TABLE {shadow_table} RENAME TO topics;"))
+        conn.execute(text("DROP TABLE IF EXISTS topics_old;"))
+    return True
+
+
+def get_pending_topic_codes(doc_type: str, embedding_type: str) -> list[str]:
+    """Get arxiv codes that have embeddings but no topic assigned yet."""
+    dimension = EMBEDDING_DIMENSIONS[embedding_type]
+    engine = get_engine()
+    with engine.begin() as conn:
+        query = text(
+            f"""
+            SELECT e.arxiv_code
+            FROM arxiv_embeddings_{dimension} e
+            LEFT JOIN topics t ON e.arxiv_code = t.arxiv_code
+            WHERE e.doc_type = :doc_type
+            AND e.embedding_type = :embedding_type
+            AND t.arxiv_code IS NULL
+            ORDER BY e.arxiv_code;
+            """
+        )
+        result = conn.execute(
+            query, {"doc_type": doc_type, "embedding_type": embedding_type}
+        )
+        return [row[0] for row in result]
 
 
 def convert_query_to_vector(query: str, model_name: str) -> list[float]:
@@ -6,10 +6,23 @@ from openai import OpenAI
 from groq import Groq
 import instructor
 import os
+from functools import lru_cache
 
 import utils.db as db
 
 
+@lru_cache(maxsize=None)
+def get_llm_client(model_type: str):
+    """Get a shared API client per provider, reusing its HTTP connection pool."""
+    if model_type == "Anthropic":
+        return Anthropic()
+    elif model_type == "OpenAI":
+        return OpenAI()
+    elif model_type == "Groq":
+        return Groq(api_key=os.getenv("GROQ_API_KEY"))
+    raise ValueError(f"Unsupported model type: {model_type}")
+
+
 def run_instructor_query(
     system_message: str,
     user_message: str,
@@ -25,12 +38,12 @@ def run_instructor_query(
                   else "Anthropic")
     
     if model_type == "Anthropic":
-        client = Anthropic()
+        client = get_llm_client("Anthropic")
         response, usage = create_anthropic_message(
             client, system_message, user_message, model, llm_model, temperature, messages
         )
     elif model_type == "OpenAI":
-        client = OpenAI()
+        client = get_llm_client("OpenAI")
         if "o1" in llm_model:
             user_message = system_message + "\n\n" + user_message
             system_message = None
@@ -40,7 +53,7 @@ def run_instructor_query(
             client, system_message, user_message, model, llm_model, temperature
         )
     elif model_type == "Groq":
-        client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        client = get_llm_client("Groq")
         model = None
         response, usage = create_groq_message(
             client, system_message, user_message, model, llm_model, temperature
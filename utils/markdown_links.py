@@ -0,0 +1,23 @@
+import re
+
+## Shared by the marker workflow (writes the rewritten copy) and the app (reads
+## it); kept free of third-party imports so the app doesn't pull in workflow deps.
+REWRITTEN_MARKDOWN_FILE = "paper_s3.md"
+
+
+def rewrite_markdown_image_links(markdown_content: str, arxiv_code: str) -> str:
+    """Point image references in marker markdown to the paper's S3 directory."""
+    # First, handle relative paths
+    markdown_content = re.sub(
+        r"!\[(.*?)\]\((?!http)(.*?)\)",
+        lambda m: f"![{m.group(1)}](https://arxiv-md.s3.amazonaws.com/{arxiv_code}/{m.group(2)})",
+        markdown_content,
+    )
+
+    # Then, handle paths that might start with the arxiv code
+    markdown_content = re.sub(
+        f"!\\[(.*?)\\]\\({arxiv_code}/(.*?)\\)",
+        lambda m: f"![{m.group(1)}](https://arxiv-md.s3.amazonaws.com/{arxiv_code}/{m.group(2)})",
+        markdown_content,
+    )
+    return markdown_content
@@ -0,0 +1,76 @@
+import time
+import threading
+from typing import Optional
+
+import utils.db as db
+
+## Process-wide lookup of paper titles and arxiv_details rows. Titles are
+## loaded once with a single scan of arxiv_details and refreshed on demand
+## (explicitly, or lazily when a code is missing) so long-lived processes
+## (in-process runner, app server) also see papers added after the first load.
+## Full metadata rows are fetched per batch of codes and memoized.
+MISS_REFRESH_SECONDS = 60
+
+_lock = threading.Lock()
+_titles: Optional[dict] = None
+_titles_loaded_at = 0.0
+_details: dict[str, dict] = {}
+
+
+def refresh():
+    """Reload the title map and drop memoized metadata rows."""
+    global _titles, _titles_loaded_at
+    titles = db.get_arxiv_title_dict()
+    with _lock:
+        _titles = titles
+        _titles_loaded_at = time.time()
+        _details.clear()
+
+
+def _ensure_titles(missing: bool = False):
+    """Load titles on first use; reload on a miss if the map isn't fresh."""
+    with _lock:
+        loaded, age = _titles is not None, time.time() - _titles_loaded_at
+    if not loaded or (missing and age > MISS_REFRESH_SECONDS):
+        refresh()
+
+
+def get_title_map() -> dict[str, str]:
+    """Get a copy of the full arxiv_code -> title map."""
+    _ensure_titles()
+    with _lock:
+        return dict(_titles)
+
+
+def get_titles(arxiv_codes: list[str]) -> dict[str, str]:
+    """Look up titles for many papers. Unknown codes are left out."""
+    _ensure_titles()
+    with _lock:
+        missing = any(c not in _titles for c in arxiv_codes)
+    if missing:
+        _ensure_titles(missing=True)
+    with _lock:
+        return {c: _titles[c] for c in arxiv_codes if c in _titles}
+
+
+def get_title(arxiv_code: str, default: Optional[str] = None) -> Optional[str]:
+    """Look up the title of a single paper."""
+    return get_titles([arxiv_code]).get(arxiv_code, default)
+
+
+def get_metadata_batch(arxiv_codes: list[str]) -> dict[str, dict]:
+    """Look up arxiv_details rows (as dicts) for many papers."""
+    with _lock:
+        missing = [c for c in dict.fromkeys(arxiv_codes) if c not in _details]
+    if missing:
+        details_df = db.load_arxiv_batch(missing)
+        rows = details_df.to_dict(orient="index")
+        with _lock:
+            _details.update(rows)
+    with _lock:
+        return {c: _details[c] for c in arxiv_codes if c in _details}
+
+
+def get_metadata(arxiv_code: str) -> Optional[dict]:
+    """Look up the arxiv_details row of a single paper."""
+    return get_metadata_batch([arxiv_code]).get(arxiv_code)
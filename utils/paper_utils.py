@@ -1,24 +1,34 @@
+import io
 import os
 import re, json
 import time
+import fcntl
+import threading
+from contextlib import contextmanager
 import boto3
 import botocore
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 import arxiv
 import requests
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.metrics.pairwise import cosine_similarity, euclidean_distances
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from typing import Optional, Tuple
 import dotenv
 import ast
 
 from langchain_community.document_loaders import ArxivLoader
 
+import utils.artifact_cache as artifact_cache
+
 dotenv.load_dotenv()
 
-PROJECT_PATH = os.environ.get("PROJECT_PATH")
+PROJECT_PATH = os.environ.get("PROJECT_PATH", "/app")
 DATA_PATH = os.path.join(PROJECT_PATH, "data")
 
 db_params = {
@@ -29,7 +39,7 @@ db_params = {
     "port": os.environ["DB_PORT"],
 }
 
-ss_api_key = os.environ["SEMANTIC_SCHOLAR_API_KEY"]
+ss_api_key = os.environ.get("SEMANTIC_SCHOLAR_API_KEY")
 
 summary_col_mapping = {
     "arxiv_code": "arxiv_code",
@@ -66,6 +76,40 @@ def tfidf_similarity(title1, title2, fitted=False):
     return cosine_similarity(vectors[0:1], vectors[1:2])[0][0]
 
 
+TITLE_MATCH_THRESHOLD = 0.9
+
+
+class TitleIndex:
+    """Char n-gram index over known titles for batched near-duplicate lookups.
+    Scores match tfidf_similarity: hashed (not fitted) features keep each
+    query's full n-gram profile, so cosines equal the pairwise computation."""
+
+    def __init__(self, titles: list[str], batch_size: int = 256):
+        self.titles = list(titles)
+        self.batch_size = batch_size
+        self.vectorizer = HashingVectorizer(
+            analyzer="char", ngram_range=(2, 3), n_features=2**20,
+            alternate_sign=False, norm="l2",
+        )
+        self.matrix = self.vectorizer.transform([preprocess(t) for t in self.titles])
+
+    def query(self, queries: list[str]) -> list[Tuple[Optional[str], float]]:
+        """Return the best matching known title and its cosine score for each query."""
+        results = []
+        if len(self.titles) == 0:
+            return [(None, 0.0) for _ in queries]
+        for i in range(0, len(queries), self.batch_size):
+            batch = [preprocess(q) for q in queries[i : i + self.batch_size]]
+            scores = (self.vectorizer.transform(batch) @ self.matrix.T).tocsr()
+            best_idx = np.asarray(scores.argmax(axis=1)).ravel()
+            best_scores = scores.max(axis=1).toarray().ravel()
+            results.extend(
+                (self.titles[idx], float(score)) if score > 0 else (None, 0.0)
+                for idx, score in zip(best_idx, best_scores)
+            )
+        return results
+
+
 def compute_optimized_similarity(data_title, titles):
     """Multithreading TF-IDF similarity computation."""
     with ThreadPoolExecutor() as executor:
@@ -183,19 +227,25 @@ def store_local(data, arxiv_code, data_path, relative=True, format="json"):
 
 
 def load_local(arxiv_code, data_path, relative=True, format="json", s3_bucket=None):
-    """Load data locally, downloading from S3 if not found."""
+    """Load data locally, reading from S3 (via the artifact cache) if not found."""
     if relative:
         data_path = os.path.join(PROJECT_PATH, "data", data_path)
     file_path = os.path.join(data_path, f"{arxiv_code}.{format}")
 
     if not os.path.exists(file_path) and s3_bucket:
-        download_s3_file(arxiv_code, s3_bucket, prefix="data", format=format)
+        ## Parse straight from the cached blob; no second copy under data_path.
+        data = artifact_cache.read_bytes(s3_bucket, f"{arxiv_code}.{format}")
+        if data is None:
+            raise FileNotFoundError(f"{arxiv_code}.{format} not found locally or in {s3_bucket}.")
+        file_path = io.BytesIO(data)
+        if format in ("json", "txt"):
+            file_path = io.TextIOWrapper(file_path, encoding="utf-8")
 
     if format == "json":
-        with open(file_path, "r") as f:
+        with _open_local(file_path, "r") as f:
             return json.load(f)
     elif format == "txt":
-        with open(file_path, "r") as f:
+        with _open_local(file_path, "r") as f:
             return f.read()
     elif format == "csv":
         return pd.read_csv(file_path)
@@ -203,6 +253,13 @@ def load_local(arxiv_code, data_path, relative=True, format="json", s3_bucket=No
         raise ValueError("Format not supported.")
 
 
+def _open_local(file_path, mode):
+    """Open a path, or pass an already open file object through."""
+    if isinstance(file_path, str):
+        return open(file_path, mode)
+    return file_path
+
+
 def delete_local(arxiv_code, data_path, relative=True, format="json"):
     """Delete data locally."""
     if relative:
@@ -218,20 +275,300 @@ def delete_local(arxiv_code, data_path, relative=True, format="json"):
 ##################
 ## S3 DATA MGMT ##
 ##################
-def list_s3_files(bucket_name: str, strip_extension: bool = True) -> list[str]:
-    """List all files in an S3 bucket."""
-    s3 = boto3.client("s3")
+## Transfer settings: the pool must be at least as large as the number of
+## concurrent transfers, and multipart kicks in for large PDFs / images.
+S3_MAX_CONCURRENCY = 16
+S3_TRANSFER_RETRIES = 3
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=16 * 1024 * 1024,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=4,
+)
+
+
+@lru_cache(maxsize=None)
+def get_s3_client():
+    """Shared S3 client (boto3 clients are thread-safe and pool connections)."""
+    return boto3.client(
+        "s3",
+        config=Config(
+            max_pool_connections=S3_MAX_CONCURRENCY * S3_TRANSFER_CONFIG.max_concurrency,
+            retries={"max_attempts": 5, "mode": "adaptive"},
+        ),
+    )
+
+
+def _s3_transfer(fn, *args, retries: int = S3_TRANSFER_RETRIES, **kwargs):
+    """Run a single transfer, retrying transient failures with backoff."""
+    for attempt in range(retries):
+        try:
+            return fn(*args, Config=S3_TRANSFER_CONFIG, **kwargs)
+        except botocore.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "403"):
+                raise
+            if attempt == retries - 1:
+                raise
+        except (botocore.exceptions.BotoCoreError, ConnectionError):
+            if attempt == retries - 1:
+                raise
+        time.sleep(2**attempt)
+
+
+def _run_transfers(
+    tasks: list[tuple], transfer_fn, max_workers: int, desc: str, logger=None
+) -> list[tuple]:
+    """Run (args, extra_kwargs, size_fn) transfers concurrently. Returns failed tasks."""
+    failed = []
+    if len(tasks) == 0:
+        return failed
+    st = time.time()
+    n_bytes = 0
+    report_every = max(1, len(tasks) // 10)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+        futures = {
+            executor.submit(_s3_transfer, transfer_fn, *args, **kwargs): (args, size_fn)
+            for args, kwargs, size_fn in tasks
+        }
+        for idx, future in enumerate(as_completed(futures), start=1):
+            args, size_fn = futures[future]
+            try:
+                future.result()
+                n_bytes += size_fn()
+            except Exception as e:
+                failed.append(args)
+                if logger:
+                    logger.error(f"{desc} failed for {args}: {str(e)}")
+            if logger and (idx % report_every == 0 or idx == len(tasks)):
+                elapsed = max(time.time() - st, 1e-6)
+                logger.info(
+                    f"{desc}: {idx}/{len(tasks)} files, "
+                    f"{n_bytes / 1e6 / elapsed:.1f} MB/s, {idx / elapsed:.1f} files/s"
+                )
+    return failed
+
+
+def upload_many(
+    files: list[tuple[str, str, str]],
+    content_type: Optional[str] = None,
+    max_workers: int = S3_MAX_CONCURRENCY,
+    logger=None,
+) -> list[tuple[str, str, str]]:
+    """Upload (local_path, bucket_name, key) files concurrently. Returns failed uploads."""
+    s3 = get_s3_client()
+    tasks = []
+    for local_path, bucket_name, key in files:
+        file_content_type = content_type
+        if not file_content_type:
+            if local_path.endswith(".png"):
+                file_content_type = "image/png"
+            elif local_path.endswith(".md"):
+                file_content_type = "text/markdown"
+        extra_args = {"ContentType": file_content_type} if file_content_type else {}
+        tasks.append(
+            (
+                (local_path, bucket_name, key),
+                {"ExtraArgs": extra_args},
+                lambda p=local_path: os.path.getsize(p),
+            )
+        )
+    failed = _run_transfers(tasks, s3.upload_file, max_workers, "S3 upload", logger)
+
+    ## Record successful uploads in the bucket manifests.
+    failed_set = set(failed)
+    uploaded = {}
+    for local_path, bucket_name, key in files:
+        if (local_path, bucket_name, key) not in failed_set:
+            uploaded.setdefault(bucket_name, []).append(key)
+    for bucket_name, keys in uploaded.items():
+        add_to_s3_manifest(bucket_name, keys)
+    return failed
+
+
+def download_many(
+    files: list[tuple[str, str, str]],
+    max_workers: int = S3_MAX_CONCURRENCY,
+    logger=None,
+) -> list[tuple[str, str, str]]:
+    """Download (bucket_name, key, local_path) files concurrently. Returns failed downloads."""
+    s3 = get_s3_client()
+    for _, _, local_path in files:
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    tasks = [
+        ((bucket_name, key, local_path), {}, lambda p=local_path: os.path.getsize(p))
+        for bucket_name, key, local_path in files
+    ]
+    return _run_transfers(tasks, s3.download_file, max_workers, "S3 download", logger)
+
+
+## S3 key manifests: a local copy of each bucket's key set, so pending-work
+## discovery doesn't page through the whole bucket on every call. Every refresh
+## is a full listing (keys aren't added in sorted order: backfills, other hosts),
+## our own uploads are recorded directly, and list_s3_files(refresh=True) lists
+## each bucket at most once per workflow run (S3_MANIFEST_RUN_ENV, set by the
+## runner at the start of each cycle; process start when run standalone).
+S3_MANIFEST_PATH = os.path.join(DATA_PATH, "s3_manifest")
+S3_MANIFEST_TTL = 300
+S3_MANIFEST_RUN_ENV = "S3_MANIFEST_RUN_STARTED"
+
+_s3_manifests = {}
+_s3_manifest_lock = threading.Lock()
+_process_started = time.time()
+
+
+def _list_s3_keys(bucket_name: str) -> list[str]:
+    """Page through all keys of a bucket."""
+    s3 = get_s3_client()
     paginator = s3.get_paginator("list_objects_v2")
-    files = []
+    keys = []
     for page in paginator.paginate(Bucket=bucket_name):
         if "Contents" in page:
-            if strip_extension:
-                files.extend(
-                    [os.path.splitext(obj["Key"])[0] for obj in page["Contents"]]
-                )
-            else:
-                files.extend([obj["Key"] for obj in page["Contents"]])
-    return files
+            keys.extend([obj["Key"] for obj in page["Contents"]])
+    return keys
+
+
+def _manifest_file(bucket_name: str) -> str:
+    return os.path.join(S3_MANIFEST_PATH, f"{bucket_name}.json")
+
+
+def _read_s3_manifest(bucket_name: str) -> dict:
+    """Read a bucket manifest from disk (empty if missing/corrupt)."""
+    manifest = {"keys": set(), "stems": set(), "refresh": 0.0}
+    try:
+        with open(_manifest_file(bucket_name), "r") as f:
+            data = json.load(f)
+        manifest["keys"] = set(data["keys"])
+        manifest["stems"] = {os.path.splitext(k)[0] for k in manifest["keys"]}
+        manifest["refresh"] = data.get("refresh", 0.0)
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+    return manifest
+
+
+def _load_s3_manifest(bucket_name: str) -> dict:
+    """Load a bucket manifest from memory or disk."""
+    if bucket_name not in _s3_manifests:
+        _s3_manifests[bucket_name] = _read_s3_manifest(bucket_name)
+    return _s3_manifests[bucket_name]
+
+
+@contextmanager
+def _s3_manifest_file_lock(bucket_name: str):
+    """Exclusive lock on a bucket manifest file, across processes."""
+    os.makedirs(S3_MANIFEST_PATH, exist_ok=True)
+    with open(f"{_manifest_file(bucket_name)}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _save_s3_manifest(bucket_name: str, manifest: dict):
+    """Atomically write a bucket manifest to disk."""
+    os.makedirs(S3_MANIFEST_PATH, exist_ok=True)
+    file_path = _manifest_file(bucket_name)
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"keys": sorted(manifest["keys"]), "refresh": manifest["refresh"]}, f)
+    os.replace(tmp_path, file_path)
+
+
+def get_run_started() -> float:
+    """Start time of the current workflow run."""
+    return float(os.environ.get(S3_MANIFEST_RUN_ENV, _process_started))
+
+
+def _refresh_s3_manifest(
+    bucket_name: str, max_age: float, since: Optional[float] = None
+) -> dict:
+    """Refresh a bucket manifest if older than max_age (or than `since`).
+    Caller must hold the manifest lock."""
+    def is_stale(m: dict) -> bool:
+        if since is not None:
+            return m["refresh"] < since
+        return time.time() - m["refresh"] > max_age
+
+    manifest = _load_s3_manifest(bucket_name)
+    if not is_stale(manifest):
+        return manifest
+    ## Another process (e.g. an earlier step of this run) may have refreshed it.
+    manifest = _read_s3_manifest(bucket_name)
+    if is_stale(manifest):
+        now = time.time()
+        manifest["keys"] = set(_list_s3_keys(bucket_name))
+        manifest["stems"] = {os.path.splitext(k)[0] for k in manifest["keys"]}
+        manifest["refresh"] = now
+        with _s3_manifest_file_lock(bucket_name):
+            _save_s3_manifest(bucket_name, manifest)
+    _s3_manifests[bucket_name] = manifest
+    return manifest
+
+
+def get_s3_manifest(bucket_name: str, max_age: float = S3_MANIFEST_TTL) -> set[str]:
+    """Get the set of keys in a bucket, refreshing the local manifest if stale."""
+    with _s3_manifest_lock:
+        return set(_refresh_s3_manifest(bucket_name, max_age)["keys"])
+
+
+def s3_file_exists(
+    bucket_name: str, arxiv_code: str, format: Optional[str] = None
+) -> bool:
+    """Check if a file is in a bucket using the local manifest (O(1)).
+
+    Like list_s3_files, the bucket is listed at most once per workflow run;
+    uploads after that are picked up through add_to_s3_manifest."""
+    with _s3_manifest_lock:
+        manifest = _refresh_s3_manifest(bucket_name, S3_MANIFEST_TTL, since=get_run_started())
+        if format is not None:
+            return f"{arxiv_code}.{format}" in manifest["keys"]
+        return arxiv_code in manifest["stems"]
+
+
+def add_to_s3_manifest(bucket_name: str, keys: list[str]):
+    """Record keys we uploaded ourselves, so they are visible without a listing.
+
+    The file is re-read under a lock before writing, so keys other processes
+    recorded (or a newer listing) since we loaded it aren't overwritten."""
+    with _s3_manifest_lock, _s3_manifest_file_lock(bucket_name):
+        manifest = _read_s3_manifest(bucket_name)
+        if manifest["refresh"] == 0:
+            ## No manifest yet; the first listing will include these keys.
+            return
+        manifest["keys"].update(keys)
+        manifest["stems"].update(os.path.splitext(k)[0] for k in keys)
+        _save_s3_manifest(bucket_name, manifest)
+        _s3_manifests[bucket_name] = manifest
+
+
+def invalidate_s3_manifest(bucket_name: Optional[str] = None):
+    """Drop cached manifests (one bucket or all), forcing a full listing on next use."""
+    with _s3_manifest_lock:
+        bucket_names = [bucket_name] if bucket_name else list(_s3_manifests.keys())
+        if bucket_name is None and os.path.isdir(S3_MANIFEST_PATH):
+            bucket_names += [
+                f[: -len(".json")]
+                for f in os.listdir(S3_MANIFEST_PATH)
+                if f.endswith(".json")
+            ]
+        for name in set(bucket_names):
+            _s3_manifests.pop(name, None)
+            if os.path.exists(_manifest_file(name)):
+                os.remove(_manifest_file(name))
+
+
+def list_s3_files(
+    bucket_name: str, strip_extension: bool = True, refresh: bool = True
+) -> list[str]:
+    """List all files in an S3 bucket (served from the local manifest).
+
+    With refresh=True the bucket is listed once per workflow run, and later
+    calls in the same run reuse that listing."""
+    with _s3_manifest_lock:
+        since = get_run_started() if refresh else None
+        keys = set(_refresh_s3_manifest(bucket_name, S3_MANIFEST_TTL, since=since)["keys"])
+    if strip_extension:
+        return [os.path.splitext(k)[0] for k in keys]
+    return list(keys)
 
 
 def download_s3_file(
@@ -241,7 +578,7 @@ def download_s3_file(
     format: str = "json",
 ) -> bool:
     """Load data from S3."""
-    s3 = boto3.client("s3")
+    s3 = get_s3_client()
     local_path = os.path.join(
         PROJECT_PATH,
         *([prefix] if prefix else []),
@@ -249,7 +586,7 @@ def download_s3_file(
         f"{arxiv_code}.{format}",
     )
     try:
-        s3.download_file(bucket_name, f"{arxiv_code}.{format}", local_path)
+        _s3_transfer(s3.download_file, bucket_name, f"{arxiv_code}.{format}", local_path)
         return True
     except botocore.exceptions.ClientError as e:
         if e.response["Error"]["Code"] == "404":
@@ -271,7 +608,7 @@ def upload_s3_file(
     content_type: Optional[str] = None
 ) -> bool:
     """Upload data to S3. For single files, format is required. For recursive directory uploads, format is ignored."""
-    s3 = boto3.client("s3")
+    s3 = get_s3_client()
     
     # Convert bucket name to local directory name
     local_dir = bucket_name.replace("-", "_")
@@ -285,24 +622,17 @@ def upload_s3_file(
     full_path = os.path.join(PROJECT_PATH, *([prefix] if prefix else []), local_dir, local_path_with_ext)
     
     if recursive and os.path.isdir(full_path):
-        # Upload entire directory
-        for root, _, files in os.walk(full_path):
-            for file in files:
+        # Upload entire directory concurrently
+        files = []
+        for root, _, dir_files in os.walk(full_path):
+            for file in dir_files:
                 file_path = os.path.join(root, file)
                 # Get relative path from the directory being uploaded
                 rel_path = os.path.relpath(file_path, full_path)
                 s3_key = f"{key}/{rel_path}" if key else rel_path
-                
-                # Guess content type if not provided
-                file_content_type = content_type
-                if not file_content_type:
-                    if file.endswith('.png'):
-                        file_content_type = 'image/png'
-                    elif file.endswith('.md'):
-                        file_content_type = 'text/markdown'
-                
-                extra_args = {'ContentType': file_content_type} if file_content_type else {}
-                s3.upload_file(file_path, bucket_name, s3_key, ExtraArgs=extra_args)
+                files.append((file_path, bucket_name, s3_key))
+        failed = upload_many(files, content_type=content_type)
+        return len(failed) == 0
     else:
         # Upload single file
         if not key:
@@ -311,15 +641,16 @@ def upload_s3_file(
             s3_key = key
             
         extra_args = {'ContentType': content_type} if content_type else {}
-        s3.upload_file(full_path, bucket_name, s3_key, ExtraArgs=extra_args)
-    
+        _s3_transfer(s3.upload_file, full_path, bucket_name, s3_key, ExtraArgs=extra_args)
+
+    add_to_s3_manifest(bucket_name, [s3_key])
     return True
 
 
 def list_s3_directories(bucket_name):
     """List all directories (prefixes) in an S3 bucket.
     Returns a list of directory names without trailing slashes."""
-    s3 = boto3.client('s3')
+    s3 = get_s3_client()
     paginator = s3.get_paginator('list_objects_v2')
     
     directories = set()
@@ -495,13 +826,90 @@ def preprocess_arxiv_doc(
     return doc_content
 
 
+class RateLimiter:
+    """Thread-safe minimum interval between calls to an external API."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.last_call = 0.0
+
+    def wait(self):
+        with self.lock:
+            delay = self.last_call + self.min_interval - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            self.last_call = time.time()
+
+
+## arXiv API guidance: no more than one request every 3 seconds.
+arxiv_rate_limiter = RateLimiter(3.0)
+ARXIV_BATCH_SIZE = 100
+
+
+ARXIV_MAX_RETRIES = 3
+
+
+@lru_cache(maxsize=None)
+def get_arxiv_client():
+    """Shared arXiv client; pacing and retries go through arxiv_rate_limiter."""
+    return arxiv.Client(page_size=ARXIV_BATCH_SIZE, delay_seconds=0, num_retries=0)
+
+
+def _is_transient_arxiv_error(e: Exception) -> bool:
+    """Errors worth retrying as-is (rate limits, server hiccups, dropped connections)."""
+    if isinstance(e, arxiv.HTTPError):
+        return e.status == 429 or e.status >= 500
+    return isinstance(e, (arxiv.UnexpectedEmptyPageError, requests.RequestException))
+
+
+def _fetch_arxiv_batch(arxiv_codes: list[str], logger=None) -> dict:
+    """Fetch one id_list request; on API errors split the batch to isolate bad ids."""
+    search = arxiv.Search(id_list=arxiv_codes, max_results=len(arxiv_codes))
+    for attempt in range(ARXIV_MAX_RETRIES + 1):
+        ## Every attempt, retries included, waits on the shared 3s limiter.
+        arxiv_rate_limiter.wait()
+        try:
+            results = list(get_arxiv_client().results(search))
+            break
+        except Exception as e:
+            if _is_transient_arxiv_error(e) and attempt < ARXIV_MAX_RETRIES:
+                continue
+            if len(arxiv_codes) == 1:
+                if logger:
+                    logger.warning(f"arXiv lookup failed for {arxiv_codes[0]}: {str(e)}")
+                return {}
+            mid = len(arxiv_codes) // 2
+            return {
+                **_fetch_arxiv_batch(arxiv_codes[:mid], logger),
+                **_fetch_arxiv_batch(arxiv_codes[mid:], logger),
+            }
+    return {r.entry_id.split("/")[-1].split("v")[0]: r for r in results}
+
+
+def get_arxiv_info_batch(
+    arxiv_codes: list[str], batch_size: int = ARXIV_BATCH_SIZE, logger=None
+) -> dict:
+    """Fetch arXiv meta-data for many papers, batch_size ids per API request."""
+    arxiv_meta = {}
+    for i in range(0, len(arxiv_codes), batch_size):
+        batch = arxiv_codes[i : i + batch_size]
+        batch_meta = _fetch_arxiv_batch(batch, logger)
+        arxiv_meta.update({k: v for k, v in batch_meta.items() if k in batch})
+        if logger:
+            logger.info(
+                f"Fetched arXiv meta-data for {min(i + batch_size, len(arxiv_codes))}/{len(arxiv_codes)} papers."
+            )
+    return arxiv_meta
+
+
 def get_arxiv_info(arxiv_code: str, title: Optional[str] = None):
     """Search article in Arxiv by name and retrieve meta-data."""
     search = arxiv.Search(
         id_list=[arxiv_code], max_results=40, sort_by=arxiv.SortCriterion.Relevance
     )
-    client = arxiv.Client()
-    res = list(client.results(search))
+    arxiv_rate_limiter.wait()
+    res = list(get_arxiv_client().results(search))
     arxiv_meta = None
     if len(res) > 0:
         arxiv_meta = [
@@ -571,21 +979,86 @@ def get_semantic_scholar_info(
     return None
 
 
-def check_if_exists(paper_name, existing_paper_names, existing_paper_ids):
-    """Check if arxiv ID has exact match in existing papers or a very similar title."""
-    if is_arxiv_code(paper_name):
-        if paper_name in existing_paper_ids:
-            return True
+## Semantic Scholar: the batch endpoint takes up to 500 ids per POST.
+ss_rate_limiter = RateLimiter(1.0)
+SS_BATCH_SIZE = 500
+SS_FIELDS = "title,citationCount,influentialCitationCount,tldr,venue"
+
+
+def get_semantic_scholar_info_batch(
+    arxiv_codes: list[str],
+    batch_size: int = SS_BATCH_SIZE,
+    max_retries: int = 5,
+    logger=None,
+) -> dict:
+    """Retrieve Semantic Scholar meta-data for many Arxiv codes via /paper/batch."""
+    url = f"https://api.semanticscholar.org/graph/v1/paper/batch?fields={SS_FIELDS}"
+    headers = {"x-api-key": ss_api_key}
+    ss_info = {}
+    for i in range(0, len(arxiv_codes), batch_size):
+        batch = arxiv_codes[i : i + batch_size]
+        payload = {"ids": [f"ARXIV:{code}" for code in batch]}
+        for attempt in range(max_retries):
+            ss_rate_limiter.wait()
+            try:
+                response = requests.post(url, headers=headers, json=payload, timeout=60)
+            except requests.RequestException as e:
+                ## Timeouts and dropped connections back off like a 429/5xx.
+                if logger:
+                    logger.warning(f"Semantic Scholar batch request failed: {e}")
+                time.sleep(2 ** (attempt + 1))
+                continue
+            if response.status_code == 200:
+                ## Results are aligned with the ids; unknown papers come back as null.
+                for code, paper in zip(batch, response.json()):
+                    if paper is not None:
+                        ss_info[code] = paper
+                break
+            elif response.status_code == 429 or response.status_code >= 500:
+                time.sleep(2 ** (attempt + 1))
+            else:
+                if logger:
+                    logger.error(
+                        f"Semantic Scholar batch failed ({response.status_code}): {response.text[:200]}"
+                    )
+                break
         else:
-            return False
-    else:
-        pre_similarity = max(
-            [tfidf_similarity(paper_name, t) for t in existing_paper_names]
+            if logger:
+                logger.error(f"Semantic Scholar batch failed after {max_retries} retries.")
+        if logger:
+            logger.info(
+                f"Fetched Semantic Scholar data for {min(i + batch_size, len(arxiv_codes))}/{len(arxiv_codes)} papers."
+            )
+    return ss_info
+
+
+def check_if_exists_batch(
+    paper_names: list[str],
+    existing_paper_ids: set[str],
+    title_index: TitleIndex,
+) -> dict[str, bool]:
+    """Check many queue entries at once: exact arxiv ID match or very similar title."""
+    titles = [p for p in paper_names if not is_arxiv_code(p)]
+    title_matches = dict(zip(titles, title_index.query(titles)))
+    return {
+        p: (
+            p in existing_paper_ids
+            if is_arxiv_code(p)
+            else title_matches[p][1] > TITLE_MATCH_THRESHOLD
         )
-        if pre_similarity > 0.9:
-            return True
-        else:
-            return False
+        for p in paper_names
+    }
+
+
+def check_if_exists(paper_name, existing_paper_names, existing_paper_ids, title_index=None):
+    """Check if arxiv ID has exact match in existing papers or a very similar title."""
+    if is_arxiv_code(paper_name):
+        return paper_name in existing_paper_ids
+    if title_index is None:
+        title_index = TitleIndex(existing_paper_names)
+    return check_if_exists_batch(
+        [paper_name], set(existing_paper_ids), title_index
+    )[paper_name]
 
 
 ##################
@@ -643,15 +1116,22 @@ def update_gist(
 #######################
 ## MARKER PDF TOOLS ##
 #######################
-def convert_pdf_to_markdown(pdf_path):
-    """Convert PDF to markdown using marker library."""
+MARKER_WORKERS = int(os.environ.get("MARKER_WORKERS", 2))
+## Copy of paper.md with image links pointing to S3, served as-is by the app.
+@lru_cache(maxsize=1)
+def get_marker_converter():
+    """Load marker layout/OCR models once per process and build the converter."""
     from marker.converters.pdf import PdfConverter
     from marker.models import create_model_dict
+
+    return PdfConverter(artifact_dict=create_model_dict())
+
+
+def convert_pdf_to_markdown(pdf_path):
+    """Convert PDF to markdown using marker library."""
     from marker.output import text_from_rendered
 
-    converter = PdfConverter(
-        artifact_dict=create_model_dict(),
-    )
+    converter = get_marker_converter()
     try:
         rendered = converter(pdf_path)
         text, _, images = text_from_rendered(rendered)
@@ -659,15 +1139,128 @@ def convert_pdf_to_markdown(pdf_path):
     except ValueError as e:
         print(f"Error converting PDF to markdown: {e}")
         return None, None
-    
+
+
+def _init_marker_worker(n_threads: int):
+    """Pool initializer: split CPU threads across workers and load models up front."""
+    import torch
+
+    torch.set_num_threads(n_threads)
+    get_marker_converter()
+
+
+def _convert_pdf_job(pdf_path: str):
+    """Pool job: convert one PDF, returning (text, images, n_pages, seconds)."""
+    import pypdfium2
+
+    st = time.time()
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    n_pages = len(pdf)
+    pdf.close()
+    text, images = convert_pdf_to_markdown(pdf_path)
+    return text, images, n_pages, time.time() - st
+
+
+@lru_cache(maxsize=None)
+def get_marker_pool(workers: int = MARKER_WORKERS):
+    """Long-lived pool of marker worker processes, each holding its own models."""
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    n_threads = max(1, (os.cpu_count() or 1) // workers)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_marker_worker,
+        initargs=(n_threads,),
+    )
+
+
+def convert_pdfs_to_markdown(
+    pdf_paths, workers: int = MARKER_WORKERS, logger=None, total: Optional[int] = None
+):
+    """Convert a queue of (key, pdf_path) items across the marker pool.
+    Yields (key, text, images) as conversions finish and logs page throughput.
+
+    Items are pulled lazily with at most 2 * workers conversions in flight, so
+    a generator that downloads each PDF acts as a bounded prefetch queue."""
+    pool = get_marker_pool(workers)
+    items = iter(pdf_paths)
+    futures = {}
+    retried = set()
+
+    def restart_pool():
+        ## A worker died (e.g. OOM) and took the pool down with it.
+        nonlocal pool
+        if logger:
+            logger.warning("Marker worker pool broke; restarting it.")
+        get_marker_pool.cache_clear()
+        pool.shutdown(wait=False, cancel_futures=True)
+        pool = get_marker_pool(workers)
+
+    def submit(key, pdf_path):
+        try:
+            future = pool.submit(_convert_pdf_job, pdf_path)
+        except BrokenProcessPool:
+            restart_pool()
+            future = pool.submit(_convert_pdf_job, pdf_path)
+        futures[future] = (key, pdf_path, pool)
+
+    def submit_next() -> bool:
+        item = next(items, None)
+        if item is None:
+            return False
+        submit(*item)
+        return True
+
+    for _ in range(2 * workers):
+        if not submit_next():
+            break
+
+    st = time.time()
+    total_pages = 0
+    idx = 0
+    while futures:
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            key, pdf_path, future_pool = futures.pop(future)
+            try:
+                text, images, n_pages, seconds = future.result()
+            except BrokenProcessPool as e:
+                ## Replace the broken pool (once) and retry each affected PDF once.
+                if future_pool is pool:
+                    restart_pool()
+                if key not in retried:
+                    retried.add(key)
+                    submit(key, pdf_path)
+                    continue
+                if logger:
+                    logger.error(f"Failed to convert {key} to markdown: {str(e)}")
+                text, images, n_pages, seconds = None, None, 0, 0.0
+            except Exception as e:
+                if logger:
+                    logger.error(f"Failed to convert {key} to markdown: {str(e)}")
+                text, images, n_pages, seconds = None, None, 0, 0.0
+            else:
+                total_pages += n_pages
+                if logger:
+                    elapsed = max(time.time() - st, 1e-6)
+                    logger.info(
+                        f"[{idx + 1}/{total or '?'}] Converted {key}: {n_pages} pages in {seconds:.1f}s "
+                        f"({n_pages / max(seconds, 1e-6):.2f} pages/s; overall {total_pages / elapsed:.2f} pages/s)"
+                    )
+            idx += 1
+            ## Queue the next PDF before handing this result back.
+            submit_next()
+            yield key, text, images
+
 
 def ensure_pdf_exists(arxiv_code, pdf_path, logger=None):
     """Ensure PDF exists locally and in S3, downloading from arXiv if necessary."""
     if os.path.exists(pdf_path):
         return True
         
-    s3_pdfs = list_s3_files("arxiv-pdfs", strip_extension=True)
-    if arxiv_code in s3_pdfs:
+    if s3_file_exists("arxiv-pdfs", arxiv_code, format="pdf"):
         try:
             success = download_s3_file(arxiv_code, "arxiv-pdfs", format="pdf")
             if success:
@@ -683,8 +1276,9 @@ def ensure_pdf_exists(arxiv_code, pdf_path, logger=None):
                 logger.error(f"Failed to download PDF from S3 for {arxiv_code}: {str(e)}")
             # Fall through to arXiv download if S3 fails
 
-    # Download from arXiv
+    # Download from arXiv (paced, as callers may fetch from several threads)
     try:
+        arxiv_rate_limiter.wait()
         download_pdf(arxiv_code, pdf_path, logger)
         if logger:
             logger.info(f"Downloaded PDF from arXiv for {arxiv_code}")
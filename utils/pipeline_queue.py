@@ -0,0 +1,65 @@
+import utils.db as db
+
+## Per-paper pipeline queue (paper_pipeline table) shared by the pipeline worker
+## and the batch steps. Batch steps lease the papers they are about to process,
+## so the worker and a batch run never work on the same (paper, stage). Papers
+## leased by the worker are left out of the batch run. Without a queue table
+## (worker never set up) the batch steps process everything as before.
+
+MAX_ATTEMPTS = 3
+## Lease taken by a batch step on the papers it processes (covers a full run).
+BATCH_LEASE_MINUTES = 3 * 60
+
+## Stages created by b0 when a new paper is stored.
+ENTRY_STAGES = ["meta", "first_page"]
+
+## stage -> (module, function, next stages, done source).
+## Done sources are used to seed the queue from existing tables / buckets.
+PIPELINE_STAGES = {
+    "meta": ("c0_fetch_meta", "fetch_meta", ["notes"], ("table", "arxiv_details")),
+    "first_page": ("m0_page_extractor", "process_arxiv_code", [], ("s3", "arxiv-first-page")),
+    "notes": (
+        "d0_summarize",
+        "summarize_paper",
+        ["review", "narrative", "bullets", "punchline"],
+        ("table", "summary_notes"),
+    ),
+    "review": ("f0_review", "review_paper", ["thumbnail"], ("table", "summaries")),
+    "narrative": ("e0_narrate", "narrate_paper", [], ("table", "recursive_summaries")),
+    "bullets": ("e1_narrate_bullet", "bullet_paper", [], ("table", "bullet_list_summaries")),
+    "punchline": ("e2_narrate_punchline", "punchline_paper", [], ("table", "summary_punchlines")),
+    "thumbnail": ("g0_create_thumbnail", "create_thumbnail", [], ("s3", "arxiv-art")),
+}
+
+
+def claim_batch(stage: str, arxiv_codes: list[str], logger=None) -> list[str]:
+    """Lease papers for a batch step; returns the ones not taken by the worker."""
+    try:
+        claimed = db.claim_pipeline_codes(stage, arxiv_codes, lease_minutes=BATCH_LEASE_MINUTES)
+    except Exception as e:
+        if logger:
+            logger.warning(f"[{stage}] Could not lease papers from the pipeline queue: {str(e)}")
+        return list(arxiv_codes)
+    if len(claimed) < len(arxiv_codes) and logger:
+        logger.info(
+            f"[{stage}] Skipping {len(arxiv_codes) - len(claimed)} papers leased by the pipeline worker."
+        )
+    return claimed
+
+
+def complete_batch(stage: str, arxiv_codes: list[str], logger=None):
+    """Mark papers processed by a batch step as done and enqueue their next stages."""
+    try:
+        db.complete_pipeline_codes(stage, arxiv_codes, PIPELINE_STAGES[stage][2])
+    except Exception as e:
+        if logger:
+            logger.warning(f"[{stage}] Could not update the pipeline queue: {str(e)}")
+
+
+def release_batch(stage: str, arxiv_codes: list[str], error_message: str, logger=None):
+    """Hand papers a batch step failed on (or skipped) back to the queue."""
+    try:
+        db.fail_pipeline_codes(stage, arxiv_codes, error_message, MAX_ATTEMPTS)
+    except Exception as e:
+        if logger:
+            logger.warning(f"[{stage}] Could not update the pipeline queue: {str(e)}")
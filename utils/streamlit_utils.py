@@ -54,7 +54,7 @@ def create_sidebar(full_papers_df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
     ## Sort by.
     sort_by = st.sidebar.selectbox(
         "Sort By",
-        ["Published Date", "Last Updated", "Citations", "Random"],
+        ["Published Date", "Last Updated", "Citations", "Trending", "Random"],
     )
 
     ## Year filter.
@@ -104,6 +104,10 @@ def create_sidebar(full_papers_df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
         papers_df = papers_df.sort_values("published", ascending=False)
     elif sort_by == "Citations":
         papers_df = papers_df.sort_values("citation_count", ascending=False)
+    elif sort_by == "Trending":
+        papers_df = papers_df.sort_values(
+            ["velocity_7d", "citations_30d", "citation_count"], ascending=False
+        )
     elif sort_by == "Random":
         papers_df = papers_df.sample(frac=1)
 
@@ -351,7 +355,7 @@ def create_paper_card(paper: Dict, mode="closed", name=""):
             # Get notes based on selected level
             try:
                 selected_level = level_map[level_select]
-                detailed_notes = db.get_extended_notes(paper["arxiv_code"], level=selected_level)
+                detailed_notes = au.get_extended_notes(paper["arxiv_code"], level=selected_level)
                 
                 if detailed_notes is None:
                     # If we're trying to get more detailed notes (lower level numbers)
@@ -0,0 +1,154 @@
+import os
+import copy
+import threading
+from typing import Optional
+
+import joblib
+import numpy as np
+
+## Lightweight topic assignment for new papers. Only the pieces BERTopic's
+## transform actually uses are kept: the UMAP reducer (stripped of its training
+## graph / kNN arrays), the HDBSCAN clusterer's prediction data (for
+## approximate_predict), the topic id mapping and the cleaned topic labels,
+## plus the 2D UMAP used for the topic map. The bundle is rebuilt from the
+## full pickles whenever those are newer, so it stays in sync after a refit.
+PROJECT_PATH = os.environ.get("PROJECT_PATH", "/app")
+TOPIC_MODEL_PATH = os.path.join(PROJECT_PATH, "data", "bertopic", "topic_model.pkl")
+REDUCED_MODEL_PATH = os.path.join(PROJECT_PATH, "data", "reduced_model.pkl")
+ASSIGNER_PATH = os.path.join(PROJECT_PATH, "data", "bertopic", "topic_assigner.joblib")
+OUTLIER_LABEL = "Miscellaneous"
+
+## Fitted attributes that UMAP.transform / hdbscan.approximate_predict never read.
+UMAP_TRAINING_ATTRS = [
+    "graph_",
+    "graph_dists_",
+    "_knn_indices",
+    "_knn_dists",
+    "_sigmas",
+    "_rhos",
+]
+HDBSCAN_TRAINING_ATTRS = [
+    "_raw_data",
+    "_single_linkage_tree",
+    "_min_spanning_tree",
+    "_outlier_scores",
+    "_relative_validity",
+    "probabilities_",
+]
+
+_lock = threading.Lock()
+_cached = {"mtime": None, "assigner": None}
+
+
+def clean_topic_label(name: str) -> str:
+    """Turn a BERTopic topic name ('3_kw_kw_label') into its display label."""
+    return name.split("_")[-1].replace('"', "").strip()
+
+
+def _strip(model, attrs: list[str]):
+    """Shallow copy of a fitted model without its training-only attributes."""
+    model = copy.copy(model)
+    for attr in attrs:
+        if hasattr(model, attr):
+            setattr(model, attr, None)
+    return model
+
+
+def build_assigner(topic_model, reduced_model) -> dict:
+    """Extract the transform-time components of a fitted BERTopic + 2D UMAP."""
+    umap_model = _strip(topic_model.umap_model, UMAP_TRAINING_ATTRS)
+    ## Re-transforming the training set would return graph_, which is dropped.
+    umap_model._input_hash = None
+    reduced = _strip(reduced_model, UMAP_TRAINING_ATTRS)
+    reduced._input_hash = None
+
+    topic_info = topic_model.get_topic_info().set_index("Topic")
+    if "CustomName" in topic_info:
+        ## Labels set explicitly with set_topic_labels (refit job).
+        topic_labels = {int(t): n for t, n in topic_info["CustomName"].items()}
+    else:
+        topic_labels = {int(t): clean_topic_label(n) for t, n in topic_info["Name"].items()}
+    topic_labels[-1] = OUTLIER_LABEL
+    mappings = topic_model.topic_mapper_.get_mappings(original_topics=True)
+
+    return {
+        "umap_model": umap_model,
+        "hdbscan_model": _strip(topic_model.hdbscan_model, HDBSCAN_TRAINING_ATTRS),
+        "topic_mappings": {int(k): int(v) for k, v in mappings.items()},
+        "topic_labels": topic_labels,
+        "reduced_model": reduced,
+    }
+
+
+def save_assigner(assigner: dict, path: str = ASSIGNER_PATH):
+    """Write the bundle atomically (write + rename)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    joblib.dump(assigner, tmp_path, compress=3)
+    os.replace(tmp_path, path)
+
+
+def _sources_exist() -> bool:
+    return os.path.exists(TOPIC_MODEL_PATH) and os.path.exists(REDUCED_MODEL_PATH)
+
+
+def _source_mtime() -> float:
+    return max(os.path.getmtime(TOPIC_MODEL_PATH), os.path.getmtime(REDUCED_MODEL_PATH))
+
+
+def rebuild_assigner() -> dict:
+    """Build the bundle from the full BERTopic / UMAP pickles and save it."""
+    import pandas as pd
+    from bertopic import BERTopic
+
+    if not _sources_exist():
+        raise FileNotFoundError(
+            "Missing topic model files; fit the topic model before assigning topics."
+        )
+    topic_model = BERTopic.load(path=TOPIC_MODEL_PATH)
+    if not topic_model.get_topic(0):
+        raise ValueError("Loaded topic model has no topics; refit the topic model.")
+    assigner = build_assigner(topic_model, pd.read_pickle(REDUCED_MODEL_PATH))
+    save_assigner(assigner)
+    return assigner
+
+
+def load_assigner() -> dict:
+    """Get the assigner, memoized per process and rebuilt when the models change."""
+    with _lock:
+        ## Without the source pickles, an existing bundle is used as-is.
+        stale = not os.path.exists(ASSIGNER_PATH) or (
+            _sources_exist() and os.path.getmtime(ASSIGNER_PATH) < _source_mtime()
+        )
+        if stale:
+            _cached["assigner"] = rebuild_assigner()
+            _cached["mtime"] = os.path.getmtime(ASSIGNER_PATH)
+        elif _cached["mtime"] != os.path.getmtime(ASSIGNER_PATH):
+            try:
+                _cached["assigner"] = joblib.load(ASSIGNER_PATH)
+            except Exception:
+                ## Unreadable bundle (e.g. library upgrade); rebuild from the pickles.
+                _cached["assigner"] = rebuild_assigner()
+            _cached["mtime"] = os.path.getmtime(ASSIGNER_PATH)
+        return _cached["assigner"]
+
+
+def assign_topics(
+    embeddings: np.ndarray, assigner: Optional[dict] = None
+) -> tuple[list[int], list[str], np.ndarray]:
+    """Assign topics to documents from their embeddings.
+
+    Returns (topic ids, topic labels, 2D map coordinates), mirroring
+    BERTopic.transform followed by the reduced UMAP transform.
+    """
+    import hdbscan
+
+    assigner = assigner or load_assigner()
+    embeddings = np.asarray(embeddings)
+    umap_embeddings = assigner["umap_model"].transform(embeddings)
+    predictions, _ = hdbscan.approximate_predict(assigner["hdbscan_model"], umap_embeddings)
+    mappings = assigner["topic_mappings"]
+    topics = [mappings.get(int(p), -1) for p in predictions]
+    labels = [assigner["topic_labels"].get(t, OUTLIER_LABEL) for t in topics]
+    reduced_embeddings = assigner["reduced_model"].transform(embeddings)
+    return topics, labels, reduced_embeddings
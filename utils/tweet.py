@@ -15,6 +15,7 @@ import logging
 from urllib.parse import quote
 import utils.vector_store as vs
 import utils.db as db
+import utils.paper_meta as pm
 
 load_dotenv()
 
@@ -575,9 +576,12 @@ def find_paper_author_tweet(arxiv_code: str, logger) -> dict:
     logger.info(f"Searching for author tweet for {arxiv_code}")
     try:
         # Get paper details
-        paper_details = db.load_arxiv(arxiv_code)
-        paper_title = paper_details["title"].iloc[0]
-        paper_authors = paper_details["authors"].iloc[0].split(", ")
+        paper_details = pm.get_metadata(arxiv_code)
+        if paper_details is None:
+            logger.error(f"Could not find '{arxiv_code}' in the meta-database")
+            return None
+        paper_title = paper_details["title"]
+        paper_authors = paper_details["authors"].split(", ")
         
         # Initialize browser
         browser = setup_browser(logger)
@@ -1,6 +1,8 @@
 import pandas as pd
 import os
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from langchain_cohere import CohereEmbeddings
 from langchain_community.embeddings.huggingface import HuggingFaceEmbeddings
 import tiktoken
@@ -29,6 +31,16 @@ def validate_openai_env():
     assert api_base != false_base, "API base is not set to local."
 
 
+@lru_cache(maxsize=None)
+def load_sentence_transformer(model_name: str) -> SentenceTransformer:
+    """Load a SentenceTransformer once per process."""
+    model = SentenceTransformer(model_name, trust_remote_code=True)
+    if model_name == "nvidia/NV-Embed-v2":
+        model.max_seq_length = 32768
+        model.tokenizer.padding_side = "right"
+    return model
+
+
 def convert_query_to_vector(query: str, model_name: str) -> list[float]:
     """Convert a text query into a vector using the specified embedding model."""
     if "embed-english" in model_name:
@@ -41,9 +53,7 @@ def convert_query_to_vector(query: str, model_name: str) -> list[float]:
             [query], model="voyage-3-large", input_type="document"
         ).embeddings[0]
     elif model_name == "nvidia/NV-Embed-v2":
-        model = SentenceTransformer(model_name, trust_remote_code=True)
-        model.max_seq_length = 32768
-        model.tokenizer.padding_side = "right"
+        model = load_sentence_transformer(model_name)
         query_prefix = "Instruct: Identify the topic or theme of the following AI & Large Language Model document\nQuery: "
         return model.encode(
             query + model.tokenizer.eos_token,
@@ -60,9 +70,40 @@ def convert_query_to_vector(query: str, model_name: str) -> list[float]:
 ## SUMMARIZATION ##
 ###################
 
-text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-    chunk_size=2000, chunk_overlap=50
-)
+## Token-level chunking parameters for summarization.
+CHUNK_SIZE = 2000
+CHUNK_OVERLAP = 50
+
+## Max. number of chunk summaries requested concurrently per level.
+SUMMARIZE_MAX_WORKERS = 8
+
+
+@lru_cache(maxsize=None)
+def _is_line_break_token(token_id: int) -> bool:
+    """Check if a token contains a line break."""
+    return b"\n" in token_encoder.decode_single_token_bytes(token_id)
+
+
+def split_tokens(
+    tokens: list[int], chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+) -> list[list[int]]:
+    """Split a token sequence into overlapping chunks, preferring line breaks as boundaries."""
+    chunks = []
+    start = 0
+    n_tokens = len(tokens)
+    while start < n_tokens:
+        end = min(start + chunk_size, n_tokens)
+        if end < n_tokens:
+            ## Snap back to the last line break within the window's tail.
+            for idx in range(end - 1, end - chunk_size // 10, -1):
+                if _is_line_break_token(tokens[idx]):
+                    end = idx + 1
+                    break
+        chunks.append(tokens[start:end])
+        if end >= n_tokens:
+            break
+        start = max(end - chunk_overlap, start + 1)
+    return chunks
 
 
 def recursive_summarize_by_parts(
@@ -73,10 +114,15 @@ def recursive_summarize_by_parts(
     mlx_model=None,
     mlx_tokenizer=None,
     verbose=False,
+    max_workers=SUMMARIZE_MAX_WORKERS,
+    arxiv_code: Optional[str] = None,
 ):
-    """Recursively apply the summarize_by_segments function to a document."""
-
-    ori_token_count = len(token_encoder.encode(document))
+    """Recursively apply the summarize_by_segments function to a document.
+    If an arxiv_code is given, chunk summaries are persisted and reused across runs."""
+    ## Encode once; each level works on the token list of the previous notes.
+    tokens = token_encoder.encode(document)
+    chunk_cache = db.get_chunk_summaries(arxiv_code, model) if arxiv_code else None
+    ori_token_count = len(tokens)
     token_count = ori_token_count + 0
     if verbose:
         print(f"Starting tokens: {ori_token_count}")
@@ -89,12 +135,21 @@ def recursive_summarize_by_parts(
         if verbose:
             print("------------------------")
             print(f"Summarization iteration {i}...")
-        document = summarize_by_parts(
-            paper_title, document, model, mlx_model, mlx_tokenizer, verbose
+        document, tokens = summarize_token_chunks(
+            paper_title,
+            tokens,
+            model,
+            mlx_model,
+            mlx_tokenizer,
+            verbose,
+            max_workers=max_workers,
+            arxiv_code=arxiv_code,
+            level=i,
+            chunk_cache=chunk_cache,
         )
 
-        token_diff = token_count - len(token_encoder.encode(document))
-        token_count = len(token_encoder.encode(document))
+        token_diff = token_count - len(tokens)
+        token_count = len(tokens)
         frac = token_count / ori_token_count
         summaries_dict[i] = document
         token_dict[i] = token_count
@@ -122,30 +177,83 @@ def summarize_by_parts(
     mlx_model=None,
     mlx_tokenizer=None,
     verbose=False,
+    max_workers=SUMMARIZE_MAX_WORKERS,
 ):
     """Summarize a paper by segments."""
-    doc_chunks = text_splitter.create_documents([document])
-    summary_notes = ""
+    summary_notes, _ = summarize_token_chunks(
+        paper_title,
+        token_encoder.encode(document),
+        model,
+        mlx_model,
+        mlx_tokenizer,
+        verbose,
+        max_workers=max_workers,
+    )
+    return summary_notes
+
+
+def summarize_token_chunks(
+    paper_title: str,
+    tokens: list[int],
+    model="mlx",
+    mlx_model=None,
+    mlx_tokenizer=None,
+    verbose=False,
+    max_workers=SUMMARIZE_MAX_WORKERS,
+    arxiv_code: Optional[str] = None,
+    level: Optional[int] = None,
+    chunk_cache: Optional[dict] = None,
+) -> tuple[str, list[int]]:
+    """Summarize an encoded document by segments, processing chunks concurrently.
+    Returns the concatenated notes along with their token sequence."""
+    doc_chunks = [token_encoder.decode(chunk) for chunk in split_tokens(tokens)]
     st_time = pd.Timestamp.now()
-    for idx, current_chunk in enumerate(doc_chunks):
-        summary_notes += (
-            au.numbered_to_bullet_list(
-                summarize_doc_chunk_mlx(
-                    paper_title, current_chunk, mlx_model, mlx_tokenizer
-                )
-                if model == "mlx"
-                else summarize_doc_chunk(paper_title, current_chunk, model)
-            )
-            + "\n"
+
+    def summarize_chunk(chunk: str) -> str:
+        """Summarize a chunk, reusing and persisting memoized notes when enabled."""
+        if chunk_cache is None:
+            return _run_chunk_summary(paper_title, chunk, model, mlx_model, mlx_tokenizer)
+        chunk_hash = hash_chunk(chunk)
+        if (level, chunk_hash) in chunk_cache:
+            return chunk_cache[(level, chunk_hash)]
+        summary = _run_chunk_summary(paper_title, chunk, model, mlx_model, mlx_tokenizer)
+        db.insert_chunk_summary(arxiv_code, level, chunk_hash, model, summary)
+        chunk_cache[(level, chunk_hash)] = summary
+        return summary
+
+    if model == "mlx":
+        ## Local MLX models share a single device; run sequentially.
+        chunk_summaries = [summarize_chunk(chunk) for chunk in doc_chunks]
+    else:
+        n_workers = max(1, min(max_workers, len(doc_chunks)))
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(summarize_chunk, chunk) for chunk in doc_chunks]
+            ## Collect in submission order so notes follow the paper's layout.
+            chunk_summaries = [future.result() for future in futures]
+
+    ## Encode each note on its own; their concatenation decodes to the full notes.
+    notes = [au.numbered_to_bullet_list(summary) + "\n" for summary in chunk_summaries]
+    summary_notes = "".join(notes)
+    notes_tokens = [t for note in notes for t in token_encoder.encode(note)]
+    if verbose:
+        time_elapsed = pd.Timestamp.now() - st_time
+        print(
+            f"{len(doc_chunks)} chunks: {time_elapsed.total_seconds():.2f} seconds"
         )
-        if verbose:
-            time_elapsed = pd.Timestamp.now() - st_time
-            print(
-                f"{idx+1}/{len(doc_chunks)}: {time_elapsed.total_seconds():.2f} seconds"
-            )
-            st_time = pd.Timestamp.now()
 
-    return summary_notes
+    return summary_notes, notes_tokens
+
+
+def hash_chunk(chunk: str) -> str:
+    """Content hash used to memoize chunk summaries."""
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+def _run_chunk_summary(paper_title, chunk, model, mlx_model=None, mlx_tokenizer=None):
+    """Dispatch a chunk to the MLX or API summarizer."""
+    if model == "mlx":
+        return summarize_doc_chunk_mlx(paper_title, chunk, mlx_model, mlx_tokenizer)
+    return summarize_doc_chunk(paper_title, chunk, model)
 
 
 def summarize_doc_chunk(paper_title: str, document: str, model="local"):
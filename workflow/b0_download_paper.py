@@ -10,17 +10,26 @@ os.chdir(PROJECT_PATH)
 
 import re, json
 import time
+import signal
 from tqdm import tqdm
 
 import utils.paper_utils as pu
 import utils.vector_store as vs
 import utils.db as db
+import utils.pipeline_queue as pq
 from utils.logging_utils import setup_logger
 
 # Set up logging
 logger = setup_logger(__name__, "b0_download_paper.log")
 
 
+GIST_ID = "1dd189493c1890df6e04aaea6d049643"
+GIST_FILENAME = "llm_queue.txt"
+GIST_SYNC_EVERY = 10
+ARXIV_MIN_INTERVAL = 3
+PROCESSED_LOG = os.path.join(PROJECT_PATH, "data", "b0_processed_queue.txt")
+
+
 def update_gist(gist_id, gist_filename, paper_list, logger):
     """Update the gist with the current queue."""
     gist_url = pu.update_gist(
@@ -33,121 +42,174 @@ def update_gist(gist_id, gist_filename, paper_list, logger):
     return gist_url
 
 
+class QueueSync:
+    """Local durable record of processed queue entries, synced to the gist in batches.
+    Entries are appended to PROCESSED_LOG as they are processed; the gist is
+    rewritten every GIST_SYNC_EVERY entries and at exit, and the log is only
+    cleared after a successful sync, so a crash is recovered on the next run."""
+
+    def __init__(self, gist_id, gist_filename, exclude: set):
+        self.gist_id = gist_id
+        self.gist_filename = gist_filename
+        self.exclude = exclude
+        self.processed = set()
+        self.n_pending = 0
+        self.gist_url = None
+        if os.path.exists(PROCESSED_LOG):
+            with open(PROCESSED_LOG, "r") as f:
+                self.processed = {l.strip() for l in f if l.strip()}
+            self.n_pending = len(self.processed)
+            logger.info(f"Recovered {len(self.processed)} unsynced queue entries.")
+
+    def mark_processed(self, paper_name):
+        """Record an entry as done locally; sync the gist if enough are pending."""
+        with open(PROCESSED_LOG, "a") as f:
+            f.write(paper_name + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.processed.add(paper_name)
+        self.n_pending += 1
+        if self.n_pending >= GIST_SYNC_EVERY:
+            self.sync()
+
+    def sync(self):
+        """Rewrite the gist as its latest content minus everything handled so far."""
+        if self.n_pending == 0 and not self.exclude:
+            return
+        ## Re-fetch so titles added since startup are kept.
+        paper_list = pu.fetch_queue_gist(self.gist_id, self.gist_filename)
+        if paper_list is None:
+            logger.error("Could not fetch queue gist; keeping local log for next sync.")
+            return
+        paper_list = sorted(set(paper_list) - self.exclude - self.processed)
+        gist_url = update_gist(self.gist_id, self.gist_filename, paper_list, logger)
+        if gist_url is None:
+            logger.error("Failed to update queue gist; keeping local log for next sync.")
+            return
+        self.gist_url = gist_url
+        self.n_pending = 0
+        self.exclude = set()
+        if os.path.exists(PROCESSED_LOG):
+            os.remove(PROCESSED_LOG)
+        logger.info(f"Synced queue gist ({len(paper_list)} papers remaining).")
+
+
 def main():
     logger.info("Starting paper download process.")
     vs.validate_openai_env()
-    parsed_list = []
 
     ## Get paper list.
-    gist_id = "1dd189493c1890df6e04aaea6d049643"
-    gist_filename = "llm_queue.txt"
-    paper_list = pu.fetch_queue_gist(gist_id, gist_filename)
+    paper_list = pu.fetch_queue_gist(GIST_ID, GIST_FILENAME)
+    if paper_list is None:
+        logger.error("Could not fetch queue gist.")
+        return
     logger.info(f"Fetched {len(paper_list)} papers from gist.")
 
     ## Check local files.
     done_codes = pu.list_s3_files("arxiv-text", strip_extension=True)
     nonllm_codes = pu.list_s3_files("nonllm-arxiv-text", strip_extension=True) + ["..."]
+    local_paper_codes = set(pu.get_local_arxiv_codes("arxiv_text", format=".txt"))
     logger.info(
         f"Found {len(done_codes)} done papers and {len(nonllm_codes)} non-LLM papers."
     )
 
-    ## Remove duplicates.
-    paper_list = list(set(paper_list) - set(done_codes) - set(nonllm_codes))
+    ## Remove duplicates; these are also dropped from the gist on the next sync.
+    already_done = set(paper_list) & (set(done_codes) | set(nonllm_codes))
+    queue = QueueSync(GIST_ID, GIST_FILENAME, exclude=already_done)
+    paper_list = list(set(paper_list) - already_done - queue.processed)
     paper_list_iter = sorted(paper_list[:])[::-1]
     logger.info(f"{len(paper_list_iter)} papers to process after removing duplicates.")
 
+    ## Match the whole queue against known papers in one pass.
     arxiv_map = db.get_arxiv_title_dict()
-    existing_paper_names = list(arxiv_map.values())
-    existing_paper_ids = list(arxiv_map.keys())
+    title_index = pu.TitleIndex(list(arxiv_map.values()))
+    existing_map = pu.check_if_exists_batch(
+        paper_list_iter, set(arxiv_map.keys()), title_index
+    )
 
-    ## Iterate.
-    gist_url = None
-    for idx, paper_name in enumerate(paper_list_iter):
-        time.sleep(3)
-        existing = pu.check_if_exists(
-            paper_name, existing_paper_names, existing_paper_ids
-        )
-
-        ## Check if we already have the document.
-        if existing:
-            logger.info(
-                f" [{idx}/{len(paper_list_iter)}] Skipping '{paper_name}' as it is already in the database."
-            )
-            ## Update gist.
-            parsed_list.append(paper_name)
-            paper_list = list(set(paper_list) - set(parsed_list))
-            gist_url = update_gist(gist_id, gist_filename, paper_list, logger)
-            continue
-
-        ## Search content.
-        try:
-            new_doc = pu.search_arxiv_doc(paper_name)
-        except Exception as e:
-            logger.error(
-                f" [{idx}/{len(paper_list_iter)}] Failed to search for '{paper_name}': {str(e)}"
-            )
-            continue
+    ## Sync the gist on SIGTERM (e.g. step timeout) as well as normal exit/crash.
+    prev_handler = signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
 
-        if new_doc is None:
-            logger.warning(
-                f" [{idx}/{len(paper_list_iter)}] Could not find '{paper_name}' in Arxiv."
-            )
-            continue
-
-        new_meta = new_doc.metadata
-        new_content = pu.preprocess_arxiv_doc(new_doc.page_content)
-        title = new_meta["Title"]
-        arxiv_code = new_meta["entry_id"].split("/")[-1]
-        arxiv_code = re.sub(r"v\d+$", "", arxiv_code)
-
-        ## Verify it's an LLM paper.
-        is_llm_paper = vs.verify_llm_paper(
-            new_content[:1500] + " ...[continued]...",
-            model="claude-3-5-sonnet-20241022",
-        )
-        if not is_llm_paper["is_related"]:
-            logger.info(
-                f" [{idx}/{len(paper_list_iter)}] '{paper_name}' - '{title}' is not a LLM paper."
-            )
-            parsed_list.append(paper_name)
-            paper_list = list(set(paper_list) - set(parsed_list))
-            gist_url = update_gist(gist_id, gist_filename, paper_list, logger)
-            ## Store in nonllm_arxiv_text.
-            pu.store_local(new_content, arxiv_code, "nonllm_arxiv_text", format="txt")
-            pu.upload_s3_file(
-                arxiv_code, "nonllm-arxiv-text", prefix="data", format="txt"
+    ## Iterate.
+    last_arxiv_call = 0
+    try:
+        for idx, paper_name in enumerate(paper_list_iter):
+            existing = existing_map[paper_name]
+
+            ## Check if we already have the document.
+            if existing:
+                logger.info(
+                    f" [{idx}/{len(paper_list_iter)}] Skipping '{paper_name}' as it is already in the database."
+                )
+                queue.mark_processed(paper_name)
+                continue
+
+            ## Search content (respecting arXiv's request interval).
+            time.sleep(max(0, ARXIV_MIN_INTERVAL - (time.time() - last_arxiv_call)))
+            last_arxiv_call = time.time()
+            try:
+                new_doc = pu.search_arxiv_doc(paper_name)
+            except Exception as e:
+                logger.error(
+                    f" [{idx}/{len(paper_list_iter)}] Failed to search for '{paper_name}': {str(e)}"
+                )
+                continue
+
+            if new_doc is None:
+                logger.warning(
+                    f" [{idx}/{len(paper_list_iter)}] Could not find '{paper_name}' in Arxiv."
+                )
+                continue
+
+            new_meta = new_doc.metadata
+            new_content = pu.preprocess_arxiv_doc(new_doc.page_content)
+            title = new_meta["Title"]
+            arxiv_code = new_meta["entry_id"].split("/")[-1]
+            arxiv_code = re.sub(r"v\d+$", "", arxiv_code)
+
+            ## Verify it's an LLM paper.
+            is_llm_paper = vs.verify_llm_paper(
+                new_content[:1500] + " ...[continued]...",
+                model="claude-3-5-sonnet-20241022",
             )
-            continue
-
-        ## Check if we have a summary locally.
-        local_paper_codes = os.path.join(
-            os.environ.get("PROJECT_PATH"), "data", "arxiv_text"
-        )
-        local_paper_codes = [f.split(".json")[0] for f in os.listdir(local_paper_codes)]
-        if arxiv_code in local_paper_codes:
-            ## Update gist.
+            if not is_llm_paper["is_related"]:
+                logger.info(
+                    f" [{idx}/{len(paper_list_iter)}] '{paper_name}' - '{title}' is not a LLM paper."
+                )
+                ## Store in nonllm_arxiv_text.
+                pu.store_local(new_content, arxiv_code, "nonllm_arxiv_text", format="txt")
+                pu.upload_s3_file(
+                    arxiv_code, "nonllm-arxiv-text", prefix="data", format="txt"
+                )
+                queue.mark_processed(paper_name)
+                continue
+
+            ## Store (a local copy from an interrupted run is uploaded as-is).
+            if arxiv_code in local_paper_codes:
+                logger.info(
+                    f" [{idx}/{len(paper_list_iter)}] Found '{paper_name}' - '{title}' locally."
+                )
+            else:
+                pu.store_local(new_content, arxiv_code, "arxiv_text", format="txt")
+                local_paper_codes.add(arxiv_code)
+            pu.upload_s3_file(arxiv_code, "arxiv-text", prefix="data", format="txt")
             logger.info(
-                f" [{idx}/{len(paper_list_iter)}] Found '{paper_name}' - '{title}' locally."
+                f" [{idx}/{len(paper_list_iter)}] '{paper_name}' - '{title}' stored."
             )
-            parsed_list.append(paper_name)
-            paper_list = list(set(paper_list) - set(parsed_list))
-            gist_url = update_gist(gist_id, gist_filename, paper_list, logger)
-            continue
-
-        ## Store.
-        pu.store_local(new_content, arxiv_code, "arxiv_text", format="txt")
-        pu.upload_s3_file(arxiv_code, "arxiv-text", prefix="data", format="txt")
-        logger.info(
-            f" [{idx}/{len(paper_list_iter)}] '{paper_name}' - '{title}' stored."
-        )
-
-        ## Update gist.
-        parsed_list.append(paper_name)
-        paper_list = list(set(paper_list) - set(parsed_list))
-        gist_url = update_gist(gist_id, gist_filename, paper_list, logger)
-
-    if gist_url:
-        logger.info(f"Done! Updated queue gist URL: {gist_url}")
+
+            ## Hand off to the per-paper pipeline.
+            try:
+                db.enqueue_pipeline_stages(arxiv_code, pq.ENTRY_STAGES)
+            except Exception as e:
+                logger.error(f"Failed to enqueue '{arxiv_code}' in paper pipeline: {str(e)}")
+
+            queue.mark_processed(paper_name)
+    finally:
+        queue.sync()
+        signal.signal(signal.SIGTERM, prev_handler)
+
+    if queue.gist_url:
+        logger.info(f"Done! Updated queue gist URL: {queue.gist_url}")
 
 
 if __name__ == "__main__":
@@ -1,8 +1,6 @@
 import sys, os
 from dotenv import load_dotenv
-import time
 from pathlib import Path
-import pypdfium2
 import psycopg2
 
 load_dotenv()
@@ -14,6 +12,7 @@ os.chdir(PROJECT_PATH)
 
 import utils.paper_utils as pu
 import utils.db as db
+import utils.markdown_links as ml
 from utils.logging_utils import setup_logger
 
 # Set up logging
@@ -28,22 +27,23 @@ def main():
     
     # Get papers that need to be processed
     arxiv_codes = list(set(arxiv_codes) - set(done_markdowns))
-    arxiv_codes = sorted(arxiv_codes)[::-1][:50]
+    arxiv_codes = sorted(arxiv_codes)[::-1]
     
     logger.info(f"Found {len(arxiv_codes)} papers to process")
 
-    ## Iterate through papers
-    for arxiv_code in arxiv_codes:
-        
-        # Ensure PDF exists locally and in S3
-        pdf_path = os.path.join(PROJECT_PATH, "data/arxiv_pdfs", f"{arxiv_code}.pdf")
-        if not pu.ensure_pdf_exists(arxiv_code, pdf_path, logger):
-            continue
-
-        # Convert to markdown
-        # try:
-        markdown_text, images = pu.convert_pdf_to_markdown(pdf_path)
+    def pdf_queue():
+        """Ensure each PDF exists locally and in S3 just before it is converted."""
+        for arxiv_code in arxiv_codes:
+            pdf_path = os.path.join(PROJECT_PATH, "data/arxiv_pdfs", f"{arxiv_code}.pdf")
+            if pu.ensure_pdf_exists(arxiv_code, pdf_path, logger):
+                yield arxiv_code, pdf_path
 
+    ## Convert on the marker worker pool (models stay loaded across papers);
+    ## PDFs are downloaded as conversion slots free up.
+    logger.info(f"Converting papers with {pu.MARKER_WORKERS} marker workers")
+    for arxiv_code, markdown_text, images in pu.convert_pdfs_to_markdown(
+        pdf_queue(), logger=logger, total=len(arxiv_codes)
+    ):
         if markdown_text is None:
             logger.error(f"Failed to convert {arxiv_code} to markdown")
             continue
@@ -56,6 +56,11 @@ def main():
         markdown_path = os.path.join(paper_dir, "paper.md")
         with open(markdown_path, 'w', encoding='utf-8') as f:
             f.write(markdown_text)
+
+        # Save a copy with image links pointing to S3, served as-is by the app
+        rewritten_path = os.path.join(paper_dir, ml.REWRITTEN_MARKDOWN_FILE)
+        with open(rewritten_path, 'w', encoding='utf-8') as f:
+            f.write(ml.rewrite_markdown_image_links(markdown_text, arxiv_code))
         
         # Save each image in paper directory
         for img_name, img in images.items():
@@ -64,19 +69,17 @@ def main():
             img.save(local_path, "PNG")
         
         # Upload entire paper directory to S3
-        pu.upload_s3_file(
+        if not pu.upload_s3_file(
             local_path=paper_dir,
             bucket_name="arxiv-md",
             key=arxiv_code,
             recursive=True
-        )
+        ):
+            logger.error(f"Failed to upload some files for {arxiv_code} to S3")
+            continue
         logger.info(f"Uploaded paper directory for {arxiv_code} to S3")
         logger.info(f"Successfully processed '{arxiv_code}'")
 
-        # except pypdfium2._helpers.misc.PdfiumError as e:
-        #     logger.error(f"Failed to convert {arxiv_code} to markdown: {str(e)}")
-        #     continue
-
     logger.info("Completed paper download and conversion process.")
 
 if __name__ == "__main__":
@@ -8,14 +8,46 @@ sys.path.append(PROJECT_PATH)
 
 os.chdir(PROJECT_PATH)
 
-from tqdm import tqdm
+import pandas as pd
 import utils.paper_utils as pu
 import utils.db as db
 from utils.logging_utils import setup_logger
+import utils.pipeline_queue as pq
 
 # Set up logging
 logger = setup_logger(__name__, "c0_fetch_meta.log")
 
+def fetch_meta(arxiv_code: str) -> bool:
+    """Fetch and store arxiv meta-data for a single paper."""
+    arxiv_info = pu.get_arxiv_info(arxiv_code)
+    if arxiv_info is None:
+        return False
+    processed_meta = pu.process_arxiv_data(arxiv_info._raw)
+    db.upload_to_db(processed_meta, pu.db_params, "arxiv_details")
+    return True
+
+def store_meta(arxiv_results: list) -> list[str]:
+    """Store arxiv meta-data in one insert; returns the stored arxiv codes.
+
+    If the batch insert fails, rows are retried one by one so a single
+    bad row doesn't lose the others."""
+    rows = [pu.process_arxiv_data(meta._raw) for meta in arxiv_results]
+    if len(rows) == 0:
+        return []
+    try:
+        db.upload_df_to_db(pd.DataFrame(rows), "arxiv_details", pu.db_params, chunksize=500)
+        return [row["arxiv_code"] for row in rows]
+    except Exception as e:
+        logger.warning(f"Batch insert of {len(rows)} meta-data rows failed ({str(e)}); retrying one by one.")
+    stored = []
+    for row in rows:
+        try:
+            db.upload_df_to_db(pd.DataFrame([row]), "arxiv_details", pu.db_params)
+            stored.append(row["arxiv_code"])
+        except Exception as e:
+            logger.error(f"Failed to store meta-data for '{row['arxiv_code']}': {str(e)}")
+    return stored
+
 def main():
     logger.info("Starting metadata fetching process.")
     arxiv_codes = pu.list_s3_files("arxiv-text", strip_extension=True)
@@ -24,15 +56,28 @@ def main():
     arxiv_codes = sorted(arxiv_codes)[::-1]
     
     logger.info(f"Found {len(arxiv_codes)} papers with missing meta-data.")
+    arxiv_codes = pq.claim_batch("meta", arxiv_codes, logger=logger)
+    if len(arxiv_codes) == 0:
+        return
+
+    stored_codes = []
+    try:
+        ## Fetch in batches and store everything in one insert.
+        arxiv_meta = pu.get_arxiv_info_batch(arxiv_codes, logger=logger)
+        stored_codes = store_meta(list(arxiv_meta.values()))
+        logger.info(f"Stored meta-data for {len(stored_codes)} papers.")
+        pq.complete_batch("meta", stored_codes, logger=logger)
 
-    for idx, arxiv_code in enumerate(arxiv_codes):
-        logger.info(f" [{idx}/{len(arxiv_codes)}] Fetching metadata for {arxiv_code}.")
-        arxiv_info = pu.get_arxiv_info(arxiv_code)
-        if arxiv_info is None:
-            logger.warning(f" [{idx}/{len(arxiv_codes)}] Could not find '{arxiv_code}' in Arxiv meta-data.")
-            continue
-        processed_meta = pu.process_arxiv_data(arxiv_info._raw)
-        db.upload_to_db(processed_meta, pu.db_params, "arxiv_details")
+        missing_codes = sorted(set(arxiv_codes) - set(arxiv_meta.keys()))
+        if len(missing_codes) > 0:
+            logger.warning(
+                f"Could not find {len(missing_codes)} papers in Arxiv meta-data: {', '.join(missing_codes)}"
+            )
+    finally:
+        ## Whatever wasn't stored (not found, failed insert, crash) goes back to the queue.
+        failed_codes = sorted(set(arxiv_codes) - set(stored_codes))
+        if len(failed_codes) > 0:
+            pq.release_batch("meta", failed_codes, "Meta-data not stored.", logger=logger)
 
     logger.info("Metadata fetching process completed.")
 
@@ -1,5 +1,6 @@
 import sys, os
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,11 +16,15 @@ os.chdir(PROJECT_PATH)
 import utils.vector_store as vs
 import utils.paper_utils as pu
 import utils.db as db
+import utils.paper_meta as pm
 from utils.logging_utils import setup_logger
+import utils.pipeline_queue as pq
 
 # Set up logging
 logger = setup_logger(__name__, "d0_summarize.log")
 
+PAPER_WORKERS = 3
+
 def shorten_list(list_str: str):
     """Shorten a bullet point list by taking the top 10 and bottom elements."""
     split_list = list_str.split("\n")
@@ -29,6 +34,28 @@ def shorten_list(list_str: str):
         list_str = f"{start_list_str}\n\n[...]\n{end_list_str}"
     return list_str
 
+def summarize_paper(arxiv_code: str, paper_title: str):
+    """Generate and store the recursive summary notes of a paper."""
+    paper_content = pu.load_local(arxiv_code, "arxiv_text", format="txt", s3_bucket="arxiv-text")
+    paper_content = pu.preprocess_arxiv_doc(paper_content)
+    summaries_dict, token_dict = vs.recursive_summarize_by_parts(
+        paper_title,
+        paper_content,
+        max_tokens=500,
+        model="gpt-4o-mini",
+        verbose=False,
+        arxiv_code=arxiv_code,
+    )
+
+    summary_notes = pd.DataFrame(
+        summaries_dict.items(), columns=["level", "summary"]
+    )
+    summary_notes["tokens"] = summary_notes.level.map(token_dict)
+    summary_notes["arxiv_code"] = arxiv_code
+    summary_notes["tstp"] = pd.Timestamp.now()
+
+    db.upload_df_to_db(summary_notes, "summary_notes", db.db_params)
+
 def main():
     """Summarize arxiv docs."""
     arxiv_codes = pu.list_s3_files("arxiv-text", strip_extension=True)
@@ -37,34 +64,38 @@ def main():
     arxiv_codes = sorted(arxiv_codes)[::-1]
     
     logger.info(f"Found {len(arxiv_codes)} papers to summarize.")
+    arxiv_codes = pq.claim_batch("notes", arxiv_codes, logger=logger)
+
+    ## Titles are looked up once for the whole batch (new papers come from c0).
+    pm.refresh()
+    title_dict = pm.get_titles(arxiv_codes)
+    missing_codes = [c for c in arxiv_codes if c not in title_dict]
+    for arxiv_code in missing_codes:
+        logger.warning(f"Could not find '{arxiv_code}' in the meta-database. Skipping.")
+    pq.release_batch("notes", missing_codes, "Not found in the meta-database.", logger=logger)
+    arxiv_codes = [c for c in arxiv_codes if c in title_dict]
 
-    for idx, arxiv_code in enumerate(arxiv_codes):
-        paper_content = pu.load_local(arxiv_code, "arxiv_text", format="txt", s3_bucket="arxiv-text")
-        paper_content = pu.preprocess_arxiv_doc(paper_content)
-        title_dict = db.get_arxiv_title_dict()
-        paper_title = title_dict.get(arxiv_code, None)
-        if paper_title is None:
-            logger.warning(f"[{idx}/{len(arxiv_codes)}] Could not find '{arxiv_code}' in the meta-database. Skipping.")
-            continue
-
-        logger.info(f"[{idx}/{len(arxiv_codes)}] Summarizing: {arxiv_code} - '{paper_title}'")
-        summaries_dict, token_dict = vs.recursive_summarize_by_parts(
-            paper_title,
-            paper_content,
-            max_tokens=500,
-            model="gpt-4o-mini",
-            verbose=False,
-        )
-
-        summary_notes = pd.DataFrame(
-            summaries_dict.items(), columns=["level", "summary"]
-        )
-        summary_notes["tokens"] = summary_notes.level.map(token_dict)
-        summary_notes["arxiv_code"] = arxiv_code
-        summary_notes["tstp"] = pd.Timestamp.now()
-        
-        db.upload_df_to_db(summary_notes, "summary_notes", db.db_params)
+    ## Papers run concurrently; chunk summaries within each paper are also
+    ## parallel (see vs.SUMMARIZE_MAX_WORKERS), so keep this pool small.
+    failed = []
+    with ThreadPoolExecutor(max_workers=PAPER_WORKERS) as executor:
+        futures = {
+            executor.submit(summarize_paper, arxiv_code, title_dict[arxiv_code]): arxiv_code
+            for arxiv_code in arxiv_codes
+        }
+        for idx, future in enumerate(as_completed(futures)):
+            arxiv_code = futures[future]
+            try:
+                future.result()
+                logger.info(f"[{idx+1}/{len(arxiv_codes)}] Summarized: {arxiv_code} - '{title_dict[arxiv_code]}'")
+            except Exception as e:
+                failed.append(arxiv_code)
+                logger.error(f"[{idx+1}/{len(arxiv_codes)}] Failed to summarize '{arxiv_code}': {str(e)}")
 
+    pq.complete_batch("notes", [c for c in arxiv_codes if c not in failed], logger=logger)
+    pq.release_batch("notes", failed, "Summarization failed in batch run.", logger=logger)
+    if failed:
+        logger.warning(f"{len(failed)} papers failed to summarize: {failed}")
     logger.info("Paper summarization process completed.")
 
 if __name__ == "__main__":
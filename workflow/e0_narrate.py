@@ -14,37 +14,59 @@ os.chdir(PROJECT_PATH)
 
 import utils.vector_store as vs
 import utils.db as db
+import utils.paper_meta as pm
 from utils.logging_utils import setup_logger
+import utils.pipeline_queue as pq
 
 # Set up logging
 logger = setup_logger(__name__, "e0_narrate.log")
 
+NOTES_TOKENS = 1200
+
+def generate_narrative(paper_title: str, paper_notes: str) -> str:
+    """Write the narrative summary of a paper from its notes and copywrite it."""
+    narrative = vs.convert_notes_to_narrative(
+        paper_title, paper_notes, model="claude-3-5-sonnet-20241022"
+    )
+    return vs.copywrite_summary(
+        paper_title, paper_notes, narrative, model="claude-3-5-sonnet-20241022"
+    )
+
+def narrate_paper(arxiv_code: str, paper_title: str, paper_notes: str = None):
+    """Generate and store the copywritten narrative summary of a paper."""
+    if paper_notes is None:
+        paper_notes = db.get_extended_notes(arxiv_code, expected_tokens=NOTES_TOKENS)
+    copywritten = generate_narrative(paper_title, paper_notes)
+    db.insert_recursive_summary(arxiv_code, copywritten)
+
 def main():
     logger.info("Starting paper summary narration process.")
     vs.validate_openai_env()
 
     arxiv_codes = db.get_arxiv_id_list(db.db_params, "summary_notes")
-    title_map = db.get_arxiv_title_dict(db.db_params)
+    title_map = pm.get_title_map()
     done_codes = db.get_arxiv_id_list(db.db_params, "recursive_summaries")
     arxiv_codes = list(set(arxiv_codes) - set(done_codes))
     arxiv_codes = sorted(arxiv_codes)[::-1]
 
     logger.info(f"Found {len(arxiv_codes)} papers to narrate.")
+    arxiv_codes = pq.claim_batch("narrative", arxiv_codes, logger=logger)
+    completed = set()
+    try:
+        notes_map = db.get_extended_notes_batch(arxiv_codes, expected_tokens=NOTES_TOKENS)
+
+        for idx, arxiv_code in enumerate(arxiv_codes):
+            paper_title = title_map[arxiv_code]
 
-    for idx, arxiv_code in enumerate(arxiv_codes):
-        paper_notes = db.get_extended_notes(arxiv_code, expected_tokens=1200)
-        paper_title = title_map[arxiv_code]
-
-        logger.info(f"[{idx}/{len(arxiv_codes)}] Generating narrative for: {arxiv_code} - '{paper_title}'")
-        narrative = vs.convert_notes_to_narrative(
-            paper_title, paper_notes, model="claude-3-5-sonnet-20241022"
-        )
-        
-        copywritten = vs.copywrite_summary(
-            paper_title, paper_notes, narrative, model="claude-3-5-sonnet-20241022"
-        )
-        
-        db.insert_recursive_summary(arxiv_code, copywritten)
+            logger.info(f"[{idx}/{len(arxiv_codes)}] Generating narrative for: {arxiv_code} - '{paper_title}'")
+            narrate_paper(arxiv_code, paper_title, notes_map.get(arxiv_code))
+            pq.complete_batch("narrative", [arxiv_code], logger=logger)
+            completed.add(arxiv_code)
+    finally:
+        ## Papers not reached (or that raised) go back to the queue.
+        remaining_codes = [c for c in arxiv_codes if c not in completed]
+        if len(remaining_codes) > 0:
+            pq.release_batch("narrative", remaining_codes, "Narration not completed in batch run.", logger=logger)
 
     logger.info("Paper narration process completed.")
 
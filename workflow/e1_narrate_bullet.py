@@ -14,34 +14,57 @@ os.chdir(PROJECT_PATH)
 
 import utils.vector_store as vs
 import utils.db as db
+import utils.paper_meta as pm
 from utils.logging_utils import setup_logger
+import utils.pipeline_queue as pq
 
 # Set up logging
 logger = setup_logger(__name__, "e1_narrate_bullet.log")
 
+NOTES_TOKENS = 500
+
+def generate_bullets(paper_title: str, paper_notes: str) -> str:
+    """Convert the notes of a paper into a bullet list summary."""
+    bullet_list = vs.convert_notes_to_bullets(
+        paper_title, paper_notes, model="claude-3-5-sonnet-20241022"
+    )
+    return bullet_list.replace("\n\n", "\n")
+
+def bullet_paper(arxiv_code: str, paper_title: str, paper_notes: str = None):
+    """Generate and store the bullet list summary of a paper."""
+    if paper_notes is None:
+        paper_notes = db.get_extended_notes(arxiv_code, expected_tokens=NOTES_TOKENS)
+    bullet_list = generate_bullets(paper_title, paper_notes)
+    db.insert_bullet_list_summary(arxiv_code, bullet_list)
+
 def main():
     logger.info("Starting bullet list narration process")
     vs.validate_openai_env()
 
     arxiv_codes = db.get_arxiv_id_list(db.db_params, "summary_notes")
-    title_map = db.get_arxiv_title_dict(db.db_params)
+    title_map = pm.get_title_map()
     done_codes = db.get_arxiv_id_list(db.db_params, "bullet_list_summaries")
     arxiv_codes = list(set(arxiv_codes) - set(done_codes))
     arxiv_codes = sorted(arxiv_codes)[::-1]
 
     logger.info(f"Found {len(arxiv_codes)} papers to process for bullet list summaries")
+    arxiv_codes = pq.claim_batch("bullets", arxiv_codes, logger=logger)
+    completed = set()
+    try:
+        notes_map = db.get_extended_notes_batch(arxiv_codes, expected_tokens=NOTES_TOKENS)
+
+        for arxiv_code in arxiv_codes:
+            paper_title = title_map[arxiv_code]
 
-    for arxiv_code in arxiv_codes:
-        paper_notes = db.get_extended_notes(arxiv_code, expected_tokens=500)
-        paper_title = title_map[arxiv_code]
-
-        logger.info(f"Generating bullet list for: {arxiv_code} - '{paper_title}'")
-        bullet_list = vs.convert_notes_to_bullets(
-            paper_title, paper_notes, model="claude-3-5-sonnet-20241022"
-        )
-        bullet_list = bullet_list.replace("\n\n", "\n")
-        
-        db.insert_bullet_list_summary(arxiv_code, bullet_list)
+            logger.info(f"Generating bullet list for: {arxiv_code} - '{paper_title}'")
+            bullet_paper(arxiv_code, paper_title, notes_map.get(arxiv_code))
+            pq.complete_batch("bullets", [arxiv_code], logger=logger)
+            completed.add(arxiv_code)
+    finally:
+        ## Papers not reached (or that raised) go back to the queue.
+        remaining_codes = [c for c in arxiv_codes if c not in completed]
+        if len(remaining_codes) > 0:
+            pq.release_batch("bullets", remaining_codes, "Bullet list not completed in batch run.", logger=logger)
 
     logger.info("Bullet list narration process completed")
 
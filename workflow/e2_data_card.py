@@ -14,6 +14,7 @@ os.chdir(PROJECT_PATH)
 
 import utils.paper_utils as pu
 import utils.db as db
+import utils.paper_meta as pm
 import utils.prompts as p
 from utils.instruct import run_instructor_query
 
@@ -23,9 +24,12 @@ def main():
     arxiv_codes = list(set(arxiv_codes) - set(done_codes))
     arxiv_codes = sorted(arxiv_codes)[::-1][:20]
 
+    notes_map = db.get_extended_notes_batch(arxiv_codes, expected_tokens=3000)
+    title_map = pm.get_titles(arxiv_codes)
+
     for arxiv_code in arxiv_codes:
-        title = db.get_arxiv_title_dict()[arxiv_code]
-        content = db.get_extended_notes(arxiv_code, expected_tokens=3000)
+        title = title_map[arxiv_code]
+        content = notes_map.get(arxiv_code)
         res_str = run_instructor_query(
             p.DATA_CARD_SYSTEM_PROMPT,
             p.PDATA_CARD_USER_PROMPT.format(title=title, content=content),
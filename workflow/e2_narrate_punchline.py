@@ -14,42 +14,68 @@ os.chdir(PROJECT_PATH)
 
 import utils.vector_store as vs
 import utils.db as db
+import utils.paper_meta as pm
 from utils.logging_utils import setup_logger
+import utils.pipeline_queue as pq
 
 # Set up logging
 logger = setup_logger(__name__, "e2_narrate_punchline.log")
 
+NOTES_TOKENS = 500
+MAX_PAPERS = 100
+
+
+def generate_punchline(paper_title: str, paper_notes: str) -> str:
+    """Condense the notes of a paper into a single-sentence punchline."""
+    return vs.generate_paper_punchline(
+        paper_title, paper_notes, model="claude-3-5-sonnet-20241022"
+    )
+
+
+def punchline_paper(arxiv_code: str, paper_title: str, paper_notes: str = None):
+    """Generate and store the punchline summary of a paper."""
+    if paper_notes is None:
+        paper_notes = db.get_extended_notes(arxiv_code, expected_tokens=NOTES_TOKENS)
+    punchline = generate_punchline(paper_title, paper_notes)
+    db.upload_to_db(
+        {
+            "arxiv_code": arxiv_code,
+            "punchline": punchline,
+            "tstp": pd.Timestamp.now(),
+        },
+        db.db_params,
+        "summary_punchlines",
+    )
+
 
 def main():
     logger.info("Starting punchline generation process")
     vs.validate_openai_env()
 
     arxiv_codes = db.get_arxiv_id_list(db.db_params, "summary_notes")
-    title_map = db.get_arxiv_title_dict(db.db_params)
+    title_map = pm.get_title_map()
     done_codes = db.get_arxiv_id_list(db.db_params, "summary_punchlines")
     arxiv_codes = list(set(arxiv_codes) - set(done_codes))
-    arxiv_codes = sorted(arxiv_codes)[::-1][:100]
+    arxiv_codes = sorted(arxiv_codes)[::-1][:MAX_PAPERS]
 
     logger.info(f"Found {len(arxiv_codes)} papers to process for punchline summaries")
-
-    for arxiv_code in arxiv_codes:
-        paper_notes = db.get_extended_notes(arxiv_code, expected_tokens=500)
-        paper_title = title_map[arxiv_code]
-
-        logger.info(f"Generating punchline for: {arxiv_code} - '{paper_title}'")
-        punchline = vs.generate_paper_punchline(
-            paper_title, paper_notes, model="claude-3-5-sonnet-20241022"
-        )
-
-        db.upload_to_db(
-            {
-                "arxiv_code": arxiv_code,
-                "punchline": punchline,
-                "tstp": pd.Timestamp.now(),
-            },
-            db.db_params,
-            "summary_punchlines",
-        )
+    arxiv_codes = pq.claim_batch("punchline", arxiv_codes, logger=logger)
+    completed = set()
+    try:
+        notes_map = db.get_extended_notes_batch(arxiv_codes, expected_tokens=NOTES_TOKENS)
+
+        for arxiv_code in arxiv_codes:
+            paper_title = title_map[arxiv_code]
+
+            logger.info(f"Generating punchline for: {arxiv_code} - '{paper_title}'")
+            punchline_paper(arxiv_code, paper_title, notes_map.get(arxiv_code))
+            pq.complete_batch("punchline", [arxiv_code], logger=logger)
+            completed.add(arxiv_code)
+    finally:
+        ## Papers not reached (or that raised) go back to the queue.
+        remaining_codes = [c for c in arxiv_codes if c not in completed]
+        if len(remaining_codes) > 0:
+            pq.release_batch("punchline", remaining_codes, "Punchline not completed in batch run.", logger=logger)
 
     logger.info("Punchline generation process completed")
 
@@ -0,0 +1,172 @@
+import sys, os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROJECT_PATH = os.getenv("PROJECT_PATH", "/app")
+sys.path.append(PROJECT_PATH)
+
+os.chdir(PROJECT_PATH)
+
+import utils.vector_store as vs
+import utils.db as db
+import utils.paper_meta as pm
+from utils.logging_utils import setup_logger
+from workflow import e0_narrate, e1_narrate_bullet, e2_narrate_punchline
+import utils.pipeline_queue as pq
+
+# Set up logging
+logger = setup_logger(__name__, "e3_narrate_all.log")
+
+## output -> (table, text column, notes token target, generator).
+## Output names match the paper pipeline stages.
+NARRATION_OUTPUTS = {
+    "narrative": (
+        "recursive_summaries",
+        "summary",
+        e0_narrate.NOTES_TOKENS,
+        e0_narrate.generate_narrative,
+    ),
+    "bullets": (
+        "bullet_list_summaries",
+        "summary",
+        e1_narrate_bullet.NOTES_TOKENS,
+        e1_narrate_bullet.generate_bullets,
+    ),
+    "punchline": (
+        "summary_punchlines",
+        "punchline",
+        e2_narrate_punchline.NOTES_TOKENS,
+        e2_narrate_punchline.generate_punchline,
+    ),
+}
+
+## Comma-separated list of outputs to generate (e.g. "narrative,bullets").
+ENABLED_OUTPUTS = os.getenv("NARRATE_OUTPUTS", ",".join(NARRATION_OUTPUTS))
+MAX_WORKERS = 6
+WRITE_BATCH_SIZE = 20
+
+
+def get_enabled_outputs() -> list[str]:
+    """Parse the NARRATE_OUTPUTS toggle."""
+    outputs = [o.strip() for o in ENABLED_OUTPUTS.split(",") if o.strip()]
+    unknown = [o for o in outputs if o not in NARRATION_OUTPUTS]
+    if unknown:
+        logger.warning(f"Ignoring unknown narration outputs: {unknown}")
+    return [o for o in NARRATION_OUTPUTS if o in outputs]
+
+
+def get_pending_codes(outputs: list[str]) -> dict[str, list[str]]:
+    """Papers with notes that are missing each enabled output (newest first)."""
+    noted_codes = set(db.get_arxiv_id_list(db.db_params, "summary_notes"))
+    pending = {}
+    for output in outputs:
+        table_name = NARRATION_OUTPUTS[output][0]
+        done_codes = set(db.get_arxiv_id_list(db.db_params, table_name))
+        pending[output] = sorted(noted_codes - done_codes)[::-1]
+    if "punchline" in pending:
+        pending["punchline"] = pending["punchline"][: e2_narrate_punchline.MAX_PAPERS]
+    return {output: pq.claim_batch(output, codes, logger=logger) for output, codes in pending.items()}
+
+
+def load_notes(pending: dict[str, list[str]]) -> dict[int, dict[str, str]]:
+    """Bulk load the notes of all pending papers, once per token target."""
+    codes_by_tokens = defaultdict(set)
+    for output, arxiv_codes in pending.items():
+        codes_by_tokens[NARRATION_OUTPUTS[output][2]].update(arxiv_codes)
+    return {
+        tokens: db.get_extended_notes_batch(sorted(arxiv_codes), expected_tokens=tokens)
+        for tokens, arxiv_codes in codes_by_tokens.items()
+    }
+
+
+def flush_rows(rows: dict[str, list[dict]]) -> int:
+    """Write buffered outputs, one batched insert per table."""
+    n_written = 0
+    for output, output_rows in rows.items():
+        if output_rows:
+            n_written += db.insert_summary_rows(NARRATION_OUTPUTS[output][0], output_rows)
+            pq.complete_batch(output, [row["arxiv_code"] for row in output_rows], logger=logger)
+            output_rows.clear()
+    return n_written
+
+
+def main():
+    logger.info("Starting combined narration process.")
+    vs.validate_openai_env()
+
+    outputs = get_enabled_outputs()
+    if len(outputs) == 0:
+        logger.info("All narration outputs are disabled.")
+        return
+
+    pending = get_pending_codes(outputs)
+    title_map = pm.get_titles(sorted(set().union(*pending.values())))
+    notes = load_notes(pending)
+
+    tasks, skipped = [], []
+    for output in outputs:
+        notes_tokens = NARRATION_OUTPUTS[output][2]
+        for arxiv_code in pending[output]:
+            if arxiv_code not in title_map or arxiv_code not in notes[notes_tokens]:
+                logger.warning(f"Missing title or notes for '{arxiv_code}'. Skipping {output}.")
+                skipped.append((arxiv_code, output))
+                continue
+            tasks.append((arxiv_code, output))
+    ## Group by paper so all outputs of a paper are generated together.
+    tasks = sorted(tasks, key=lambda t: t[0], reverse=True)
+    logger.info(
+        f"Found {len(tasks)} narration tasks "
+        + ", ".join(f"{o}: {len(pending[o])}" for o in outputs)
+    )
+
+    rows = {output: [] for output in outputs}
+    n_buffered, n_written, failed = 0, 0, []
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {}
+            for arxiv_code, output in tasks:
+                _, _, notes_tokens, generate = NARRATION_OUTPUTS[output]
+                future = executor.submit(
+                    generate, title_map[arxiv_code], notes[notes_tokens][arxiv_code]
+                )
+                futures[future] = (arxiv_code, output)
+
+            for idx, future in enumerate(as_completed(futures)):
+                arxiv_code, output = futures[future]
+                try:
+                    text = future.result()
+                except Exception as e:
+                    failed.append((arxiv_code, output))
+                    logger.error(f"Failed {output} for '{arxiv_code}': {str(e)}")
+                    continue
+                column = NARRATION_OUTPUTS[output][1]
+                rows[output].append(
+                    {"arxiv_code": arxiv_code, column: text, "tstp": datetime.now()}
+                )
+                n_buffered += 1
+                logger.info(f"[{idx}/{len(futures)}] Generated {output} for {arxiv_code}.")
+                if n_buffered >= WRITE_BATCH_SIZE:
+                    n_written += flush_rows(rows)
+                    n_buffered = 0
+    finally:
+        n_written += flush_rows(rows)
+
+    for output in outputs:
+        pq.release_batch(
+            output,
+            [c for c, o in failed + skipped if o == output],
+            f"Narration ({output}) failed in batch run.",
+            logger=logger,
+        )
+    logger.info(f"Stored {n_written} narration outputs ({len(failed)} failed).")
+    if failed:
+        logger.warning(f"Failed narration tasks: {failed}")
+    logger.info("Combined narration process completed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,18 +9,109 @@ sys.path.append(PROJECT_PATH)
 os.chdir(PROJECT_PATH)
 
 import pandas as pd
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
 import utils.paper_utils as pu
 import utils.vector_store as vs
 import utils.db as db
 from utils.logging_utils import setup_logger
+import utils.pipeline_queue as pq
 
 # Set up logging
 logger = setup_logger(__name__, "f0_review.log")
 
 LOCAL_PAPER_PATH = os.path.join(os.environ.get("PROJECT_PATH"), "data", "summaries")
 RETRIES = 1
+NOTES_TOKENS = 1200
+MAX_WORKERS = int(os.getenv("REVIEW_WORKERS", 4))
+WRITE_BATCH_SIZE = 20
+
+
+def generate_review(arxiv_code: str, paper_notes: str = None) -> dict:
+    """Review a paper from its notes and return the flattened summaries row."""
+    if paper_notes is None:
+        paper_notes = db.get_extended_notes(arxiv_code, expected_tokens=NOTES_TOKENS)
+    if paper_notes is None:
+        raise ValueError(f"No notes found for '{arxiv_code}'.")
+
+    ## Try to run LLM process up to RETRIES times.
+    for i in range(RETRIES):
+        try:
+            summary = vs.review_llm_paper(paper_notes, model="claude-3-5-sonnet-20241022")
+            break
+        except Exception as e:
+            logger.error(f"Failed to run LLM for '{arxiv_code}'. Attempt {i+1}/{RETRIES}.")
+            logger.error(str(e))
+            if i == RETRIES - 1:
+                raise
+
+    ## Extract and combine results.
+    result_dict = summary.model_dump_json()
+    data = pu.convert_innert_dict_strings_to_actual_dicts(result_dict)
+    ## ToDo: Legacy, remove.
+    if "applied_example" in data["takeaways"]:
+        data["takeaways"]["example"] = data["takeaways"]["applied_example"]
+        del data["takeaways"]["applied_example"]
+
+    flat_entries = pu.transform_flat_dict(
+        pu.flatten_dict(data), pu.summary_col_mapping
+    )
+    flat_entries["arxiv_code"] = arxiv_code
+    flat_entries["tstp"] = pd.Timestamp.now()
+    return flat_entries
+
+
+def store_reviews(rows: list[dict]) -> list[str]:
+    """Write review rows to the summaries table; returns the stored arxiv codes.
+
+    Rows are inserted in one transaction per column set (missing keys are
+    left out so column defaults apply). If a batch fails, its rows are
+    retried one by one so a single bad row doesn't lose the others."""
+    columns = list(pu.summary_col_mapping.values()) + ["tstp"]
+    groups = defaultdict(list)
+    for row in rows:
+        row = {c: row[c] for c in columns if c in row}
+        groups[tuple(row)].append(row)
+
+    stored = []
+    for group in groups.values():
+        try:
+            db.insert_summary_rows("summaries", group)
+            stored.extend(row["arxiv_code"] for row in group)
+            continue
+        except Exception as e:
+            logger.warning(f"Batch insert of {len(group)} reviews failed ({str(e)}); retrying one by one.")
+        for row in group:
+            try:
+                db.insert_summary_rows("summaries", [row])
+                stored.append(row["arxiv_code"])
+            except Exception as e:
+                logger.error(f"Failed to store review for '{row['arxiv_code']}': {str(e)}")
+    return stored
+
+
+def flush_reviews(rows: list[dict], failed: dict) -> int:
+    """Store buffered reviews, record rows that couldn't be stored as failed."""
+    stored = store_reviews(rows)
+    for row in rows:
+        if row["arxiv_code"] not in stored:
+            failed[row["arxiv_code"]] = "Could not store review."
+    pq.complete_batch("review", stored, logger=logger)
+    return len(stored)
+
+
+def review_paper(arxiv_code: str, paper_notes: str = None) -> bool:
+    """Review a paper from its notes and store the flattened result."""
+    try:
+        flat_entries = generate_review(arxiv_code, paper_notes)
+    except Exception as e:
+        logger.warning(f"Failed to review '{arxiv_code}': {str(e)}. Skipping...")
+        return False
+    logger.info(f"Uploading review for {arxiv_code} to database")
+    db.upload_to_db(flat_entries, pu.db_params, "summaries")
+    return True
 
 
 def main():
@@ -34,44 +125,37 @@ def main():
     arxiv_codes = list(set(arxiv_codes) - set(existing_papers))
 
     arxiv_codes = sorted(arxiv_codes)[::-1]
-    logger.info(f"Found {len(arxiv_codes)} papers to review")
-
-    for arxiv_code in arxiv_codes:
-        new_content = db.get_extended_notes(arxiv_code, expected_tokens=1200)
-
-        ## Try to run LLM process up to 3 times.
-        success = False
-        for i in range(RETRIES):
-            try:
-                summary = vs.review_llm_paper(new_content, model="claude-3-5-sonnet-20241022")
-                success = True
-                break
-            except Exception as e:
-                logger.error(f"Failed to run LLM for '{arxiv_code}'. Attempt {i+1}/{RETRIES}.")
-                logger.error(str(e))
-                continue
-        if not success:
-            logger.warning(f"Failed to run LLM for '{arxiv_code}' after {RETRIES} attempts. Skipping...")
-            continue
-
-        ## Extract and combine results.
-        result_dict = summary.model_dump_json()
-
-        ## Store on DB.
-        data = pu.convert_innert_dict_strings_to_actual_dicts(result_dict)
-        ## ToDo: Legacy, remove.
-        if "applied_example" in data["takeaways"]:
-            data["takeaways"]["example"] = data["takeaways"]["applied_example"]
-            del data["takeaways"]["applied_example"]
-
-        flat_entries = pu.transform_flat_dict(
-            pu.flatten_dict(data), pu.summary_col_mapping
-        )
-        flat_entries["arxiv_code"] = arxiv_code
-        flat_entries["tstp"] = pd.Timestamp.now()
-        logger.info(f"Uploading review for {arxiv_code} to database")
-        db.upload_to_db(flat_entries, pu.db_params, "summaries")
-
+    logger.info(f"Found {len(arxiv_codes)} papers to review ({MAX_WORKERS} workers)")
+    arxiv_codes = pq.claim_batch("review", arxiv_codes, logger=logger)
+    notes_map = db.get_extended_notes_batch(arxiv_codes, expected_tokens=NOTES_TOKENS)
+
+    ## Review concurrently; rows are buffered and written in batches.
+    rows, failed, n_stored = [], {}, 0
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(generate_review, arxiv_code, notes_map.get(arxiv_code)): arxiv_code
+                for arxiv_code in arxiv_codes
+            }
+            for idx, future in enumerate(as_completed(futures)):
+                arxiv_code = futures[future]
+                try:
+                    rows.append(future.result())
+                    logger.info(f"[{idx+1}/{len(futures)}] Reviewed {arxiv_code}")
+                except Exception as e:
+                    failed[arxiv_code] = str(e)
+                    logger.error(f"[{idx+1}/{len(futures)}] Failed to review '{arxiv_code}': {str(e)}")
+                if len(rows) >= WRITE_BATCH_SIZE:
+                    n_stored += flush_reviews(rows, failed)
+                    rows = []
+    finally:
+        if rows:
+            n_stored += flush_reviews(rows, failed)
+
+    pq.release_batch("review", list(failed), "Review failed in batch run.", logger=logger)
+    logger.info(f"Stored {n_stored} reviews; {len(failed)} papers failed.")
+    for arxiv_code, error in failed.items():
+        logger.warning(f"  - {arxiv_code}: {error.splitlines()[0] if error else 'unknown error'}")
     logger.info("Paper review process completed")
 
 
@@ -4,9 +4,13 @@ import random
 import torch
 import base64
 import requests
-import boto3
+import threading
 import os, sys
 import warnings
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,7 +23,9 @@ warnings.filterwarnings("ignore")
 import utils.paper_utils as pu
 import utils.vector_store as vs
 import utils.db as db
+import utils.paper_meta as pm
 from utils.logging_utils import setup_logger
+import utils.pipeline_queue as pq
 
 # Set up logging
 logger = setup_logger(__name__, "g0_create_thumbnail.log")
@@ -34,7 +40,49 @@ logger = setup_logger(__name__, "g0_create_thumbnail.log")
 #     modify_comfy_model_management()
 #     apply_overrides()
 
-s3 = boto3.client("s3")
+## Image API endpoint (point RD_API_URL at executors/fake_rd_api.py for local runs).
+RD_API_URL = os.getenv("RD_API_URL", "https://api.retrodiffusion.ai")
+
+## Concurrency per external service; stages of different papers overlap.
+LLM_CONCURRENCY = 4
+RD_CONCURRENCY = 2
+UPLOAD_CONCURRENCY = 4
+_llm_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+_rd_slots = threading.BoundedSemaphore(RD_CONCURRENCY)
+_upload_slots = threading.BoundedSemaphore(UPLOAD_CONCURRENCY)
+
+
+class RetryAfterOnly(Retry):
+    """Retry responses only when the server asks for it with Retry-After."""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        return has_retry_after and super().is_retry(method, status_code, has_retry_after)
+
+
+@lru_cache(maxsize=None)
+def get_http_session() -> requests.Session:
+    """Shared keep-alive session with retry/backoff for the (billed, non-idempotent) image POST.
+
+    Only rejected requests are replayed: connection failures and 429/503
+    responses carrying Retry-After. A 5xx or read error after the request
+    was accepted may already have been billed, so it is not retried."""
+    retry = RetryAfterOnly(
+        total=5,
+        connect=3,
+        read=0,
+        other=0,
+        backoff_factor=2,
+        status_forcelist=[429, 503],
+        allowed_methods=["POST"],
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        max_retries=retry, pool_connections=1, pool_maxsize=RD_CONCURRENCY
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 # from nodes import (
 #     KSampler,
@@ -68,8 +116,8 @@ def call_rd_api(
 ) -> dict:
     """Generate an image using the RetroDiffusion API"""
 
-    response = requests.post(
-        "https://api.retrodiffusion.ai/v1/inferences",
+    response = get_http_session().post(
+        f"{RD_API_URL}/v1/inferences",
         headers={"X-RD-Token": api_token},
         json={
             "prompt": prompt,
@@ -82,6 +130,7 @@ def call_rd_api(
             "prompt_style": prompt_style,
             **({"input_image": input_image} if input_image else {}),
         },
+        timeout=120,
     )
     response.raise_for_status()
     return response.json()
@@ -97,16 +146,18 @@ def get_value_at_index(obj: Union[Sequence, Mapping], index: int) -> Any:
 
 def generate_image(title: str, img_file: str) -> None:
     logger.info(f"--> Title: {title}")
-    title = vs.rephrase_title(title, model="claude-3-5-sonnet-20241022")
+    with _llm_slots:
+        title = vs.rephrase_title(title, model="claude-3-5-sonnet-20241022")
     caption = (
         f'"{title}", "tarot and computers collection", stunning award-winning classic pixel art'
     )
     logger.info(f"--> Caption: {caption}")
 
-    result = call_rd_api(
-        api_token=os.getenv("RD_API_KEY"),
-        prompt=caption,
-    )
+    with _rd_slots:
+        result = call_rd_api(
+            api_token=os.getenv("RD_API_KEY"),
+            prompt=caption,
+        )
     b64_img = result['base64_images'][0]
     
     with open(img_file, "wb") as f:
@@ -194,12 +245,28 @@ def generate_image(title: str, img_file: str) -> None:
     #         return True
 
 
+def create_thumbnail(arxiv_code: str, name: str, img_dir: str):
+    """Generate a thumbnail for a paper and upload it to S3."""
+    img_file = img_dir + arxiv_code + ".png"
+    clean_name = (
+        name.replace("Transformer", "Machine")
+        .replace("Large Language Model", "LLM")
+        .replace("LLM", "Model")
+    )
+    generate_image(clean_name, img_file)
+
+    ## Upload to s3.
+    with _upload_slots:
+        pu.upload_s3_file(arxiv_code, "arxiv-art", prefix="data", format="png")
+    logger.info(f"--> Uploaded {arxiv_code} to S3.")
+
+
 def main():
     logger.info("Starting thumbnail creation process")
     ## Load the mapping files.
     vs.validate_openai_env()
     arxiv_codes = db.get_arxiv_id_list(pu.db_params, "summaries")
-    title_dict = db.get_arxiv_title_dict(pu.db_params)
+    title_dict = pm.get_title_map()
     img_dir = os.path.join(PROJECT_PATH, "data", "arxiv_art/")
 
     done_imgs = pu.list_s3_files("arxiv-art", strip_extension=True)
@@ -207,23 +274,29 @@ def main():
     arxiv_codes = sorted(arxiv_codes)[::-1]
 
     logger.info(f"Found {len(arxiv_codes)} papers to process for thumbnails.")
-
-    for idx, arxiv_code in enumerate(arxiv_codes):
-        logger.info(f"Processing paper [{idx+1}/{len(arxiv_codes)}]: {arxiv_code}")
-        name = title_dict[arxiv_code]
-        img_file = img_dir + arxiv_code + ".png"
-        clean_name = (
-            name.replace("Transformer", "Machine")
-            .replace("Large Language Model", "LLM")
-            .replace("LLM", "Model")
-        )
-        generate_image(clean_name, img_file)
-
-        ## Upload to s3.
-        s3.upload_file(img_file, "arxiv-art", arxiv_code + ".png")
-        logger.info(f"--> Uploaded to S3.")
-
-    logger.info("Thumbnail creation process completed.")
+    arxiv_codes = pq.claim_batch("thumbnail", arxiv_codes, logger=logger)
+
+    ## Each paper runs rephrase -> image -> upload; the per-service semaphores
+    ## bound concurrency while letting papers in different stages overlap.
+    max_workers = LLM_CONCURRENCY + RD_CONCURRENCY + UPLOAD_CONCURRENCY
+    failed = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(create_thumbnail, arxiv_code, title_dict[arxiv_code], img_dir): arxiv_code
+            for arxiv_code in arxiv_codes
+        }
+        for idx, future in enumerate(as_completed(futures)):
+            arxiv_code = futures[future]
+            try:
+                future.result()
+                logger.info(f"Processed paper [{idx+1}/{len(arxiv_codes)}]: {arxiv_code}")
+            except Exception as e:
+                failed.append(arxiv_code)
+                logger.error(f"Failed to create thumbnail for {arxiv_code}: {str(e)}")
+
+    pq.complete_batch("thumbnail", [c for c in arxiv_codes if c not in failed], logger=logger)
+    pq.release_batch("thumbnail", failed, "Thumbnail creation failed in batch run.", logger=logger)
+    logger.info(f"Thumbnail creation process completed with {len(failed)} errors.")
 
 
 if __name__ == "__main__":
@@ -1,8 +1,6 @@
 import sys, os
 from dotenv import load_dotenv
-from tqdm import tqdm
-import random
-import time
+import pandas as pd
 
 load_dotenv()
 PROJECT_PATH = os.getenv('PROJECT_PATH', '/app')
@@ -23,49 +21,74 @@ semantic_map = {
     "influentialCitationCount": "influential_citation_count",
 }
 
-OVERRIDE = True
+## Refresh scheduling: papers are refreshed every age * AGE_FACTOR days, sooner
+## when they are gaining citations quickly, within [MIN, MAX]_INTERVAL_DAYS.
+CITATION_BUDGET = 5000
+AGE_FACTOR = 0.1
+MIN_INTERVAL_DAYS = 1
+MAX_INTERVAL_DAYS = 30
+NOT_FOUND_INTERVAL_DAYS = 7
+VELOCITY_SMOOTHING = 0.5
+
+
+def next_refresh_interval(age_days: float, velocity: float) -> float:
+    """Days until the next refresh given paper age and citations/day."""
+    interval = age_days * AGE_FACTOR / (1 + velocity)
+    return min(MAX_INTERVAL_DAYS, max(MIN_INTERVAL_DAYS, interval))
+
+
+def update_schedule(candidates_df: pd.DataFrame, rows: list[dict]) -> list[dict]:
+    """Compute new citation velocities and next refresh times for refreshed papers."""
+    now = pd.Timestamp.now()
+    new_counts = {row["arxiv_code"]: row.get("citation_count") for row in rows}
+    schedule = []
+    for _, paper in candidates_df.iterrows():
+        arxiv_code = paper["arxiv_code"]
+        prev_velocity = 0 if pd.isna(paper["citation_velocity"]) else paper["citation_velocity"]
+        if arxiv_code not in new_counts:
+            interval, velocity = NOT_FOUND_INTERVAL_DAYS, prev_velocity
+        else:
+            velocity = prev_velocity
+            if not pd.isna(paper["last_refreshed"]) and not pd.isna(paper["citation_count"]):
+                elapsed = max((now - paper["last_refreshed"]).total_seconds() / 86400, 1 / 24)
+                observed = max(0, (new_counts[arxiv_code] or 0) - paper["citation_count"]) / elapsed
+                velocity = VELOCITY_SMOOTHING * observed + (1 - VELOCITY_SMOOTHING) * prev_velocity
+            published = paper["published"]
+            age_days = 0 if pd.isna(published) else (now - pd.Timestamp(published).replace(tzinfo=None)).days
+            interval = next_refresh_interval(age_days, velocity)
+        schedule.append(
+            {
+                "arxiv_code": arxiv_code,
+                "last_refreshed": now.to_pydatetime(),
+                "next_refresh": (now + pd.Timedelta(days=interval)).to_pydatetime(),
+                "citation_velocity": float(velocity),
+            }
+        )
+    return schedule
+
 
 def main():
-    """Load summaries and add missing ones."""
+    """Refresh citation counts for papers that are due, within the API budget."""
     logger.info("Starting citation fetching process.")
-    arxiv_codes = db.get_arxiv_id_list(db.db_params, "summaries")
-    done_codes = db.get_arxiv_id_list(db.db_params, "semantic_details")
-    if not OVERRIDE:
-        arxiv_codes = list(set(arxiv_codes) - set(done_codes))
-    arxiv_codes = sorted(arxiv_codes)[::-1][:70]
-
-    logger.info(f"Found {len(arxiv_codes)} papers to process for citations.")
-
-    items_added = 0
-    errors = 0
-    for idx, arxiv_code in enumerate(arxiv_codes):
-        clear_previous = False
-        already_exists = db.check_in_db(arxiv_code, db.db_params, "semantic_details")
-        if not OVERRIDE:
-            if already_exists:
-                logger.info(f"[{idx}/{len(arxiv_codes)}] Skipping {arxiv_code} as it already exists in the database.")
-                continue
-        else:
-            clear_previous = True
-
-        ss_info = pu.get_semantic_scholar_info(arxiv_code)
-        if ss_info is None:
-            logger.warning(f"[{idx}/{len(arxiv_codes)}] Could not find citations for {arxiv_code}.")
-            errors += 1
-            continue
-
-        if already_exists and clear_previous:
-            logger.info(f"[{idx}/{len(arxiv_codes)}] Removing existing entry for {arxiv_code} before updating.")
-            db.remove_from_db(arxiv_code, db.db_params, "semantic_details")
-
-        ss_info = pu.transform_flat_dict(pu.flatten_dict(ss_info), semantic_map)
-        ss_info["arxiv_code"] = arxiv_code
-        db.upload_to_db(ss_info, db.db_params, "semantic_details")
-        logger.info(f"[{idx}/{len(arxiv_codes)}] Added citations for {arxiv_code}.")
-        items_added += 1
-        time.sleep(random.uniform(0.12, 0.5))
-
-    logger.info(f"Process complete. Added {items_added} items in total. Encountered {errors} errors.")
+    candidates_df = db.get_citation_refresh_candidates(CITATION_BUDGET)
+    arxiv_codes = candidates_df["arxiv_code"].tolist()
+
+    logger.info(f"Found {len(arxiv_codes)} papers due for a citation refresh.")
+
+    ss_info = pu.get_semantic_scholar_info_batch(arxiv_codes, logger=logger)
+    rows = []
+    for arxiv_code, paper_info in ss_info.items():
+        row = pu.transform_flat_dict(pu.flatten_dict(paper_info), semantic_map)
+        row["arxiv_code"] = arxiv_code
+        rows.append(row)
+
+    schedule = update_schedule(candidates_df, rows)
+    items_added = db.upsert_semantic_details(rows)
+    db.insert_citation_snapshots(rows)
+    db.upsert_citation_schedule(schedule)
+    errors = len(arxiv_codes) - len(ss_info)
+
+    logger.info(f"Process complete. Added {items_added} items in total. Could not find citations for {errors} papers.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,390 @@
+import json
+import sys, os
+import hashlib
+import argparse
+import warnings
+from datetime import datetime
+from dotenv import load_dotenv
+import numpy as np
+import pandas as pd
+
+load_dotenv()
+PROJECT_PATH = os.environ.get("PROJECT_PATH")
+sys.path.append(PROJECT_PATH)
+os.chdir(PROJECT_PATH)
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+warnings.filterwarnings("ignore")
+
+from umap import UMAP
+from bertopic import BERTopic
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.metrics import adjusted_rand_score, normalized_mutual_info_score
+from bertopic.representation import MaximalMarginalRelevance
+from hdbscan import HDBSCAN
+
+import utils.paper_utils as pu
+import utils.db as db
+import utils.topic_assigner as ta
+from utils.instruct import run_instructor_query
+from utils.logging_utils import setup_logger
+from workflow.i1_topic_model import (
+    STOP_WORDS,
+    process_text,
+    assign_new_papers,
+    embedding_type,
+    doc_type,
+)
+
+# Set up logging
+logger = setup_logger(__name__, "i4_topic_refit.log")
+
+## Refit when the model is older than this or the corpus grew by this fraction.
+REFIT_INTERVAL_DAYS = 30
+REFIT_GROWTH = 0.2
+
+## Label topics with an LLM (cached by topic keywords); keywords otherwise.
+LLM_LABELS = os.getenv("TOPIC_LLM_LABELS", "true").lower() == "true"
+LABEL_MODEL = "gpt-4o"
+LABEL_DOCS = 30
+
+## Sanity checks a new model must pass before it replaces the current one.
+MIN_TOPICS = 5
+MAX_OUTLIER_SHARE = 0.5
+
+SHADOW_TABLE = "topics_shadow"
+BERTOPIC_DIR = os.path.join(PROJECT_PATH, "data", "bertopic")
+REFIT_META_PATH = os.path.join(BERTOPIC_DIR, "refit_meta.json")
+LABEL_CACHE_PATH = os.path.join(BERTOPIC_DIR, "topic_label_cache.json")
+
+PROMPT = """I have done a clustering analysis on a set of Large Language Model related whitepapers. One of the clusters contains the following documents:
+[DOCUMENTS]
+The cluster top keywords: [KEYWORDS]
+
+Based on this information, extract a short but highly descriptive and specific cluster  label using a few words. Consider that there will be other Large Language Model clusters, to be sure to identify what makes this one unique and give it a specific label. Do not use "Large Language Model", "Innovations" or "Advances" in your description. Make sure it is in the following format:
+topic: <topic label>
+"""
+
+
+def create_topic_model() -> BERTopic:
+    """Create topic model (keyword representation only; labels are added after fit)."""
+    logger.info("Creating topic model...")
+    umap_model = UMAP(
+        n_neighbors=15, n_components=10, min_dist=0.0, metric="cosine", random_state=42
+    )
+    hdbscan_model = HDBSCAN(
+        min_cluster_size=20,
+        metric="euclidean",
+        cluster_selection_method="eom",
+        prediction_data=True,
+    )
+    vectorizer_model = CountVectorizer(
+        stop_words=STOP_WORDS,
+        ngram_range=(2, 3),
+        min_df=3,
+        max_df=0.8,
+        preprocessor=process_text,
+    )
+    mmr_model = MaximalMarginalRelevance(diversity=0.3)
+    topic_model = BERTopic(
+        embedding_model=None,
+        umap_model=umap_model,
+        hdbscan_model=hdbscan_model,
+        vectorizer_model=vectorizer_model,
+        representation_model=mmr_model,
+        top_n_words=10,
+        verbose=True,
+    )
+    return topic_model
+
+
+def load_refit_meta() -> dict:
+    if not os.path.exists(REFIT_META_PATH):
+        return {}
+    with open(REFIT_META_PATH) as f:
+        return json.load(f)
+
+
+def write_json(path: str, data: dict):
+    """Write a JSON file atomically."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def seed_refit_meta(n_docs: int) -> dict:
+    """Record the existing model (fitted before scheduled refits) as the last fit."""
+    meta = {
+        "fitted_at": datetime.fromtimestamp(os.path.getmtime(ta.TOPIC_MODEL_PATH)).isoformat(),
+        "n_docs": n_docs,
+        "seeded": True,
+    }
+    write_json(REFIT_META_PATH, meta)
+    logger.info(f"Seeded refit metadata from the existing topic model: {meta}")
+    return meta
+
+
+def is_refit_due(n_docs: int) -> tuple[bool, str]:
+    """Decide whether the topic model should be refit."""
+    if not os.path.exists(ta.TOPIC_MODEL_PATH):
+        return True, "no topic model found"
+    meta = load_refit_meta()
+    if not meta:
+        ## Existing deployment: start the schedule from the current model.
+        meta = seed_refit_meta(n_docs)
+    age_days = (datetime.now() - datetime.fromisoformat(meta["fitted_at"])).days
+    if age_days >= REFIT_INTERVAL_DAYS:
+        return True, f"model is {age_days} days old"
+    growth = n_docs / max(meta["n_docs"], 1) - 1
+    if growth >= REFIT_GROWTH:
+        return True, f"corpus grew {growth:.0%} since last fit"
+    return False, f"model is {age_days} days old, corpus grew {growth:.0%}"
+
+
+def load_corpus() -> tuple[list[str], list[str], np.ndarray]:
+    """Load recursive summaries and their embeddings, aligned by arxiv code."""
+    summaries = db.load_recursive_summaries()[doc_type].to_dict()
+    embeddings_map = db.load_embeddings(
+        arxiv_codes=list(summaries.keys()),
+        doc_type=doc_type,
+        embedding_type=embedding_type,
+    )
+    arxiv_codes = list(embeddings_map.keys())
+    docs = [summaries[code] for code in arxiv_codes]
+    embeddings = np.array([embeddings_map[code] for code in arxiv_codes])
+    return arxiv_codes, docs, embeddings
+
+
+def label_topics(
+    topic_model: BERTopic, docs: list[str], topics: np.ndarray, embeddings: np.ndarray
+) -> dict[int, str]:
+    """Label topics from their keywords and most central documents.
+
+    Labels are cached by keyword set, so topics that survive a refit
+    unchanged don't trigger new LLM calls.
+    """
+    cache = {}
+    if os.path.exists(LABEL_CACHE_PATH):
+        with open(LABEL_CACHE_PATH) as f:
+            cache = json.load(f)
+
+    norms = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    labels, n_new = {}, 0
+    for topic in sorted(set(topics) - {-1}):
+        keywords = [word for word, _ in topic_model.get_topic(topic)]
+        key = hashlib.sha1("|".join(keywords).encode()).hexdigest()
+        if key in cache:
+            labels[topic] = cache[key]
+            continue
+        if not LLM_LABELS:
+            labels[topic] = ", ".join(keywords[:3])
+            continue
+
+        idx = np.where(topics == topic)[0]
+        centroid = norms[idx].mean(axis=0)
+        top_idx = idx[np.argsort(-norms[idx] @ centroid)[:LABEL_DOCS]]
+        prompt = PROMPT.replace(
+            "[DOCUMENTS]", "".join(f"- {docs[i]}\n" for i in top_idx)
+        ).replace("[KEYWORDS]", ", ".join(keywords))
+        response = run_instructor_query(
+            "You are a helpful assistant.",
+            prompt,
+            llm_model=LABEL_MODEL,
+            process_id="topic_label",
+        )
+        labels[topic] = response.strip().replace("topic: ", "")
+        cache[key] = labels[topic]
+        n_new += 1
+
+    write_json(LABEL_CACHE_PATH, cache)
+    logger.info(f"Labeled {len(labels)} topics ({n_new} new LLM labels).")
+    return labels
+
+
+def evaluate_drift(new_df: pd.DataFrame, current_df: pd.DataFrame) -> dict:
+    """Compare the new assignments against the current topics table."""
+    common = new_df.index.intersection(current_df.index)
+    new_labels = new_df.loc[common, "topic"]
+    current_labels = current_df.loc[common, "topic"]
+    drift = {
+        "n_docs": len(new_df),
+        "n_common": len(common),
+        "n_topics_new": int(new_df["topic"].nunique()),
+        "n_topics_current": int(current_df["topic"].nunique()),
+        "outlier_share_new": float((new_df["topic"] == ta.OUTLIER_LABEL).mean()),
+        "outlier_share_current": float((current_df["topic"] == ta.OUTLIER_LABEL).mean())
+        if len(current_df)
+        else None,
+    }
+    if len(common) > 0:
+        drift["adjusted_rand"] = float(adjusted_rand_score(current_labels, new_labels))
+        drift["nmi"] = float(normalized_mutual_info_score(current_labels, new_labels))
+    return drift
+
+
+def passes_checks(drift: dict) -> bool:
+    if drift["n_topics_new"] < MIN_TOPICS:
+        logger.error(f"New model has only {drift['n_topics_new']} topics.")
+        return False
+    if drift["outlier_share_new"] > MAX_OUTLIER_SHARE:
+        logger.error(f"New model leaves {drift['outlier_share_new']:.0%} of papers as outliers.")
+        return False
+    return True
+
+
+def save_models(topic_model: BERTopic, reduced_model: UMAP) -> list[tuple[str, str]]:
+    """Write new model files next to the current ones. Returns (staged, final) paths."""
+    staged = []
+    ## Avoid lock issue.
+    topic_model.representation_model = None
+    topic_path = f"{ta.TOPIC_MODEL_PATH}.new"
+    topic_model.save(
+        topic_path,
+        save_ctfidf=True,
+        save_embedding_model=True,
+        serialization="pickle",
+    )
+    staged.append((topic_path, ta.TOPIC_MODEL_PATH))
+
+    reduced_path = f"{ta.REDUCED_MODEL_PATH}.new"
+    pd.to_pickle(reduced_model, reduced_path)
+    staged.append((reduced_path, ta.REDUCED_MODEL_PATH))
+
+    ## The assigner goes last so its mtime is newest (no rebuild on next load).
+    assigner_path = f"{ta.ASSIGNER_PATH}.new"
+    ta.save_assigner(ta.build_assigner(topic_model, reduced_model), path=assigner_path)
+    staged.append((assigner_path, ta.ASSIGNER_PATH))
+    return staged
+
+
+def model_paths() -> list[str]:
+    return [ta.TOPIC_MODEL_PATH, ta.REDUCED_MODEL_PATH, ta.ASSIGNER_PATH]
+
+
+def install_models(staged: list[tuple[str, str]]):
+    """Move the staged files into place, keeping the current ones as .bak."""
+    for staged_path, final_path in staged:
+        if os.path.exists(final_path):
+            os.replace(final_path, f"{final_path}.bak")
+        os.replace(staged_path, final_path)
+
+
+def restore_backups(staged: list[tuple[str, str]]):
+    """Put the .bak files back (the topics table swap didn't commit)."""
+    for _, final_path in staged:
+        if os.path.exists(f"{final_path}.bak"):
+            os.replace(f"{final_path}.bak", final_path)
+
+
+def drop_backups(staged: list[tuple[str, str]]):
+    for _, final_path in staged:
+        if os.path.exists(f"{final_path}.bak"):
+            os.remove(f"{final_path}.bak")
+
+
+def recover_interrupted_swap():
+    """Finish or roll back a swap that was killed between the file and table steps.
+
+    The shadow table only disappears when the table swap commits, so its
+    presence tells which side of the swap the previous run died on."""
+    staged = [(None, path) for path in model_paths()]
+    if not any(os.path.exists(f"{path}.bak") for path in model_paths()):
+        return
+    if db.table_exists(SHADOW_TABLE):
+        logger.warning("Found an interrupted topic model swap; restoring the previous model files.")
+        restore_backups(staged)
+    else:
+        logger.warning("Found an interrupted topic model swap after the table swap; keeping the new model.")
+        drop_backups(staged)
+
+
+def refit(force: bool = False, skip_checks: bool = False) -> bool:
+    """Fit a new topic model out of band and swap it in if it passes checks.
+
+    force ignores the schedule; skip_checks swaps the model in even if it
+    fails the sanity checks."""
+    recover_interrupted_swap()
+    n_docs = len(db.get_arxiv_id_list(db.db_params, "recursive_summaries"))
+    due, reason = is_refit_due(n_docs)
+    if not due and not force:
+        logger.info(f"Topic refit not due ({reason}).")
+        return False
+    logger.info(f"Refitting topic model: {reason if due else 'forced'}.")
+
+    ## Fit on the full corpus.
+    arxiv_codes, docs, embeddings = load_corpus()
+    logger.info(f"Loaded {len(arxiv_codes)} documents with embeddings.")
+    topic_model = create_topic_model()
+    topics, _ = topic_model.fit_transform(docs, embeddings)
+    topics = np.array(topics)
+    topic_model.set_topic_labels(label_topics(topic_model, docs, topics, embeddings))
+
+    reduced_model = UMAP(
+        n_neighbors=15, n_components=2, min_dist=0.0, metric="cosine", random_state=42
+    )
+    ## Standardize with the new map's own distribution (the live table's stats
+    ## describe the old UMAP space and don't apply to a freshly fitted one).
+    reduced_embeddings = reduced_model.fit_transform(embeddings)
+    reduced_embeddings = (
+        reduced_embeddings - reduced_embeddings.mean(axis=0)
+    ) / reduced_embeddings.std(axis=0, ddof=1)
+
+    topic_labels = topic_model.get_topic_info().set_index("Topic")["CustomName"]
+    new_df = pd.DataFrame(
+        {
+            "arxiv_code": arxiv_codes,
+            "topic": [ta.OUTLIER_LABEL if t == -1 else topic_labels[t] for t in topics],
+            "dim1": reduced_embeddings[:, 0],
+            "dim2": reduced_embeddings[:, 1],
+        }
+    ).set_index("arxiv_code")
+
+    ## Evaluate against the live model before touching anything.
+    drift = evaluate_drift(new_df, db.load_topics())
+    logger.info(f"Drift vs current model: {drift}")
+    if not passes_checks(drift):
+        if not skip_checks:
+            logger.error("New topic model rejected; keeping the current one.")
+            return False
+        logger.warning("Swapping in the new topic model despite failed checks (--skip-checks).")
+
+    ## Stage everything, move the files in (old ones kept as .bak), then swap the table.
+    db.upload_df_to_db(
+        new_df.reset_index(), SHADOW_TABLE, pu.db_params, if_exists="replace", chunksize=1000
+    )
+    staged = save_models(topic_model, reduced_model)
+    install_models(staged)
+    try:
+        db.swap_topics_table(SHADOW_TABLE)
+    except Exception:
+        logger.error("Topics table swap failed; restoring the previous model files.")
+        restore_backups(staged)
+        raise
+    drop_backups(staged)
+    write_json(
+        REFIT_META_PATH,
+        {"fitted_at": datetime.now().isoformat(), "n_docs": len(arxiv_codes), "drift": drift},
+    )
+    logger.info("Swapped in the new topic model.")
+
+    ## Papers embedded while the refit was running.
+    assign_new_papers()
+    return True
+
+
+def main(force: bool = False, skip_checks: bool = False):
+    logger.info("Starting topic model refit check")
+    refit(force=force, skip_checks=skip_checks)
+    logger.info("Topic model refit check completed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refit the topic model and swap it in.")
+    parser.add_argument("--force", action="store_true", help="Refit now, ignoring the schedule.")
+    parser.add_argument(
+        "--skip-checks",
+        action="store_true",
+        help="Swap in the new model even if it fails the sanity checks.",
+    )
+    args = parser.parse_args()
+    main(force=args.force, skip_checks=args.skip_checks)
@@ -1,10 +1,8 @@
 import sys
 import os
-import requests
-from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from pdf2image import convert_from_bytes
-import gc
+import pypdfium2
 
 load_dotenv()
 PROJECT_PATH = os.environ.get("PROJECT_PATH")
@@ -13,41 +11,57 @@ os.chdir(PROJECT_PATH)
 
 import utils.paper_utils as pu
 from utils.logging_utils import setup_logger
+import utils.pipeline_queue as pq
 
 # Set up logging
 logger = setup_logger(__name__, "m0_page_extractor.log")
 
+PAGE_WIDTH = 800
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+FETCH_WORKERS = 4
 
-def process_arxiv_code(arxiv_code, page_dir):
-    pdf_url = f"https://arxiv.org/pdf/{arxiv_code}.pdf"
-    try:
-        response = requests.get(pdf_url, timeout=30)
-        response.raise_for_status()
 
-        pdf_data = response.content
-        images = convert_from_bytes(pdf_data, first_page=1, last_page=1)
+def get_pdf_path(arxiv_code: str) -> str:
+    return os.path.join(PROJECT_PATH, "data", "arxiv_pdfs", f"{arxiv_code}.pdf")
 
-        if images:
-            first_page = images[0]
-            png_path = os.path.join(page_dir, f"{arxiv_code}.png")
 
-            width, height = first_page.size
-            new_width = 800
-            new_height = int(height * new_width / width)
-            first_page = first_page.resize((new_width, new_height))
-            first_page.save(png_path, "PNG")
+def render_first_page(pdf_path: str, png_path: str, width: int = PAGE_WIDTH) -> bool:
+    """Render page 1 of a PDF straight at the target width and save it as PNG."""
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        if len(pdf) == 0:
+            return False
+        page = pdf[0]
+        page_width, _ = page.get_size()
+        image = page.render(scale=width / page_width).to_pil()
+        ## Size from the bitmap itself (rotation / crop boxes can make it
+        ## differ from the page's nominal size); keep its aspect ratio.
+        if image.width != width:
+            image = image.resize((width, round(image.height * width / image.width)))
+        image.save(png_path, "PNG")
+        page.close()
+        return True
+    finally:
+        pdf.close()
 
-            pu.upload_s3_file(
-                arxiv_code, "arxiv-first-page", prefix="data", format="png"
-            )
-        else:
+
+def process_arxiv_code(arxiv_code, page_dir) -> bool:
+    """Extract and upload the first page of a paper. Returns success flag."""
+    pdf_path = get_pdf_path(arxiv_code)
+    png_path = os.path.join(page_dir, f"{arxiv_code}.png")
+    try:
+        if not pu.ensure_pdf_exists(arxiv_code, pdf_path, logger):
+            return False
+        if not render_first_page(pdf_path, png_path):
             logger.warning(
                 f"Could not extract the first page of '{arxiv_code}'. Skipping."
             )
+            return False
+        pu.upload_s3_file(arxiv_code, "arxiv-first-page", prefix="data", format="png")
+        return True
     except Exception as e:
         logger.error(f"Error processing '{arxiv_code}': {str(e)}. Skipping.")
-    finally:
-        gc.collect()  # Force garbage collection
+        return False
 
 
 def main():
@@ -63,11 +77,67 @@ def main():
     arxiv_codes = sorted(arxiv_codes)[::-1]
 
     logger.info(f"Found {len(arxiv_codes)} papers to process for page extraction.")
-
-    for idx, arxiv_code in enumerate(arxiv_codes):
-        logger.info(f" [{idx}/{len(arxiv_codes)}] Processing {arxiv_code}.")
-        process_arxiv_code(arxiv_code, page_dir)
-        gc.collect()  # Force garbage collection after each iteration
+    arxiv_codes = pq.claim_batch("first_page", arxiv_codes, logger=logger)
+
+    ## Fetch PDFs (S3 / arXiv fallback) on threads and hand each one to the
+    ## render pool as soon as it is local, so downloads overlap rasterization.
+    rendered = []
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as fetcher, ProcessPoolExecutor(
+        max_workers=MAX_WORKERS
+    ) as executor:
+        fetches = {
+            fetcher.submit(pu.ensure_pdf_exists, arxiv_code, get_pdf_path(arxiv_code), logger): arxiv_code
+            for arxiv_code in arxiv_codes
+        }
+        futures = {}
+        for idx, future in enumerate(as_completed(fetches)):
+            arxiv_code = fetches[future]
+            try:
+                pdf_exists = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching the PDF of '{arxiv_code}': {str(e)}.")
+                pdf_exists = False
+            if not pdf_exists:
+                logger.warning(f" [{idx}/{len(arxiv_codes)}] No PDF for '{arxiv_code}'. Skipping.")
+                continue
+            futures[
+                executor.submit(
+                    render_first_page,
+                    get_pdf_path(arxiv_code),
+                    os.path.join(page_dir, f"{arxiv_code}.png"),
+                )
+            ] = arxiv_code
+
+        for idx, future in enumerate(as_completed(futures)):
+            arxiv_code = futures[future]
+            try:
+                if future.result():
+                    rendered.append(arxiv_code)
+                    logger.info(f" [{idx}/{len(futures)}] Rendered {arxiv_code}.")
+                else:
+                    logger.warning(
+                        f"Could not extract the first page of '{arxiv_code}'. Skipping."
+                    )
+            except Exception as e:
+                logger.error(f"Error processing '{arxiv_code}': {str(e)}. Skipping.")
+
+    failed = pu.upload_many(
+        [
+            (os.path.join(page_dir, f"{arxiv_code}.png"), "arxiv-first-page", f"{arxiv_code}.png")
+            for arxiv_code in rendered
+        ],
+        logger=logger,
+    )
+    logger.info(f"Uploaded {len(rendered) - len(failed)} first pages.")
+    failed_codes = {key.replace(".png", "") for _, _, key in failed}
+    done_codes = [c for c in rendered if c not in failed_codes]
+    pq.complete_batch("first_page", done_codes, logger=logger)
+    pq.release_batch(
+        "first_page",
+        sorted(set(arxiv_codes) - set(done_codes)),
+        "First page extraction failed in batch run.",
+        logger=logger,
+    )
 
     logger.info("Page extraction process completed.")
 
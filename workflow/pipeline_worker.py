@@ -0,0 +1,138 @@
+import sys, os
+import time
+import argparse
+import importlib
+import traceback
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROJECT_PATH = os.getenv("PROJECT_PATH", "/app")
+sys.path.append(PROJECT_PATH)
+
+os.chdir(PROJECT_PATH)
+
+import utils.paper_utils as pu
+import utils.db as db
+import utils.paper_meta as pm
+from utils.pipeline_queue import ENTRY_STAGES, MAX_ATTEMPTS, PIPELINE_STAGES
+from utils.logging_utils import setup_logger
+
+logger = setup_logger(__name__, "pipeline_worker.log")
+
+POLL_SECONDS = 60
+BATCH_SIZE = 5
+LEASE_MINUTES = 30
+def get_done_codes(stage: str) -> set[str]:
+    """Get the papers whose output for a stage already exists."""
+    source_type, source_name = PIPELINE_STAGES[stage][3]
+    if source_type == "table":
+        return set(db.get_arxiv_id_list(db.db_params, source_name))
+    return set(pu.list_s3_files(source_name, strip_extension=True))
+
+
+def sync_queue():
+    """Seed the queue from existing data so nothing produced by the batch scripts is redone."""
+    logger.info("Syncing pipeline queue with existing tables.")
+    arxiv_codes = set(pu.list_s3_files("arxiv-text", strip_extension=True))
+    queued = {stage: db.get_pipeline_codes(stage) for stage in PIPELINE_STAGES}
+
+    done_rows, pending_rows = [], []
+    for stage in PIPELINE_STAGES:
+        done_codes = get_done_codes(stage) & arxiv_codes
+        for arxiv_code in done_codes - queued[stage]:
+            done_rows.append((arxiv_code, stage))
+            queued[stage].add(arxiv_code)
+        next_stages = PIPELINE_STAGES[stage][2]
+        for arxiv_code in done_codes:
+            for s in next_stages:
+                if arxiv_code not in queued[s]:
+                    pending_rows.append((arxiv_code, s))
+                    queued[s].add(arxiv_code)
+
+    for arxiv_code in arxiv_codes:
+        for s in ENTRY_STAGES:
+            if arxiv_code not in queued[s]:
+                pending_rows.append((arxiv_code, s))
+
+    db.enqueue_pipeline_rows(done_rows, status="done")
+    n_new = db.enqueue_pipeline_rows(pending_rows)
+    logger.info(f"Queue sync completed. Enqueued {n_new} pending stages.")
+
+
+def run_stage(stage: str, arxiv_code: str, title_dict: dict) -> bool:
+    """Run a single stage for a single paper. Returns success flag."""
+    module_name, fn_name, _, _ = PIPELINE_STAGES[stage]
+    fn = getattr(importlib.import_module(f"workflow.{module_name}"), fn_name)
+
+    if stage == "meta":
+        return fn(arxiv_code)
+    if stage == "first_page":
+        page_dir = os.path.join(PROJECT_PATH, "data", "arxiv_first_page/")
+        return fn(arxiv_code, page_dir)
+    if stage == "review":
+        return fn(arxiv_code)
+
+    paper_title = title_dict.get(arxiv_code)
+    if paper_title is None:
+        raise ValueError(f"Could not find '{arxiv_code}' in the meta-database.")
+    if stage == "thumbnail":
+        img_dir = os.path.join(PROJECT_PATH, "data", "arxiv_art/")
+        fn(arxiv_code, paper_title, img_dir)
+    else:
+        fn(arxiv_code, paper_title)
+    return True
+
+
+def process_stage(stage: str, batch_size: int) -> int:
+    """Claim and process a batch of papers for a stage. Returns number claimed."""
+    arxiv_codes = db.claim_pipeline_stage(
+        stage, n=batch_size, lease_minutes=LEASE_MINUTES, max_attempts=MAX_ATTEMPTS
+    )
+    if len(arxiv_codes) == 0:
+        return 0
+
+    title_dict = pm.get_titles(arxiv_codes)
+    next_stages = PIPELINE_STAGES[stage][2]
+    for arxiv_code in arxiv_codes:
+        logger.info(f"[{stage}] Processing {arxiv_code}.")
+        try:
+            success = run_stage(stage, arxiv_code, title_dict)
+            error_message = f"Stage '{stage}' returned no result."
+        except Exception as e:
+            success = False
+            error_message = f"{str(e)}\n{traceback.format_exc()}"
+        if success:
+            db.complete_pipeline_stage(arxiv_code, stage, next_stages)
+            logger.info(f"[{stage}] Completed {arxiv_code}.")
+        else:
+            db.fail_pipeline_stage(arxiv_code, stage, error_message, MAX_ATTEMPTS)
+            logger.error(f"[{stage}] Failed {arxiv_code}: {error_message.splitlines()[0]}")
+        os.chdir(PROJECT_PATH)
+    return len(arxiv_codes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-driven per-paper pipeline worker.")
+    parser.add_argument("--once", action="store_true", help="Drain the queue and exit.")
+    parser.add_argument("--no-sync", action="store_true", help="Skip startup queue sync.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    logger.info("Starting pipeline worker.")
+    if not args.no_sync:
+        sync_queue()
+
+    while True:
+        n_claimed = sum(process_stage(stage, args.batch_size) for stage in PIPELINE_STAGES)
+        if n_claimed > 0:
+            continue
+        if args.once:
+            break
+        time.sleep(POLL_SECONDS)
+
+    logger.info("Pipeline worker finished.")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ sys.path.append(PROJECT_PATH)
 
 import utils.paper_utils as pu
 import utils.db as db
+import utils.paper_meta as pm
 
 def main():
     ## Check key is on env.
@@ -18,7 +19,7 @@ def main():
 
     ## Params.
     arxiv_codes = db.get_arxiv_id_list(pu.db_params, "summaries")
-    title_map = db.get_arxiv_title_dict(pu.db_params)
+    title_map = pm.get_title_map()
     title_map = {k: v for k, v in title_map.items() if k in arxiv_codes}
     titles = list(title_map.values())
 
@@ -24,6 +24,7 @@ import utils.vector_store as vs
 import utils.paper_utils as pu
 import utils.notifications as em
 import utils.db as db
+import utils.paper_meta as pm
 import utils.tweet as tweet
 import utils.app_utils as au
 
@@ -89,8 +90,8 @@ def bold(input_text, extra_str):
 
     return output.strip()
 
-def select_paper(logger: logging.Logger) -> Tuple[str, dict]:
-    """Select paper and gather its details."""
+def select_paper(logger: logging.Logger) -> Tuple[str, dict, dict]:
+    """Select paper and gather its details (plus the candidates' extended notes)."""
     ## Get list of papers not yet reviewed.
     arxiv_codes = pu.list_s3_files("arxiv-art", strip_extension=True)
     done_codes = db.get_arxiv_id_list(db.db_params, "tweet_reviews")
@@ -98,10 +99,12 @@ def select_paper(logger: logging.Logger) -> Tuple[str, dict]:
     arxiv_codes = sorted(arxiv_codes)[-250:]
     logger.info(f"Found {len(arxiv_codes)} recent papers")
 
-    ## Select candidate papers based on citations.
+    ## Select candidate papers based on citations and recent momentum.
     citations_df = db.load_citations()
     citations_df = citations_df[citations_df.index.isin(arxiv_codes)]
+    citations_df = citations_df.join(db.load_citation_momentum(), how="left")
     citations_df["citation_count"] = citations_df["citation_count"].fillna(1) + 1
+    citations_df["citation_count"] += citations_df["citations_30d"].fillna(0).clip(lower=0)
     citations_df["weight"] = citations_df["citation_count"] / citations_df["citation_count"].sum()
     citations_df["weight"] = citations_df["weight"] ** 0.5
     citations_df["weight"] = citations_df["weight"] / citations_df["weight"].sum()
@@ -116,6 +119,9 @@ def select_paper(logger: logging.Logger) -> Tuple[str, dict]:
 
     ## Prepare abstracts for selection (only for candidates).
     candidate_abstracts = db.get_recursive_summary(candidate_arxiv_codes)
+    candidate_notes = db.get_extended_notes_batch(
+        list(candidate_arxiv_codes), expected_tokens=4500
+    )
     abstracts_str = "\n".join(
         [f"<{code}>\n{abstract}\n</{code}>\n"
         for code, abstract in candidate_abstracts.items()]
@@ -130,14 +136,13 @@ def select_paper(logger: logging.Logger) -> Tuple[str, dict]:
     ## Gather paper details.
     paper_details = db.load_arxiv(arxiv_code)
     
-    return arxiv_code, paper_details
+    return arxiv_code, paper_details, candidate_notes
 
-def prepare_tweet_facts(arxiv_code: str, paper_details: dict, tweet_type: str, logger: logging.Logger) -> Tuple[str, str, str]:
+def prepare_tweet_facts(arxiv_code: str, paper_details: dict, tweet_type: str, logger: logging.Logger, notes: dict = None) -> Tuple[str, str, str]:
     """Prepare basic tweet information with content based on tweet type."""
     publish_date_full = paper_details["published"].iloc[0].strftime("%b %d, %Y")
     author = paper_details["authors"].iloc[0]
-    title_map = db.get_arxiv_title_dict()
-    paper_title = title_map[arxiv_code]
+    paper_title = pm.get_title(arxiv_code)
     
     ## Get content based on tweet type
     if tweet_type == "punchline":
@@ -148,7 +153,10 @@ def prepare_tweet_facts(arxiv_code: str, paper_details: dict, tweet_type: str, l
         content = markdown_content
     else:
         logger.info("Loading extended notes")
-        content = db.get_extended_notes(arxiv_code, expected_tokens=4500)
+        if notes is not None and arxiv_code in notes:
+            content = notes[arxiv_code]
+        else:
+            content = db.get_extended_notes(arxiv_code, expected_tokens=4500)
     
     tweet_facts = f"```**Title: {paper_title}**\n**Authors: {author}**\n{content}```"
     post_tweet = f"arxiv link: https://arxiv.org/abs/{arxiv_code}\nllmpedia link: https://llmpedia.streamlit.app/?arxiv_code={arxiv_code}"
@@ -185,7 +193,7 @@ def generate_tweet_content(tweet_type: str, tweet_facts: str, arxiv_code: str, p
         
     elif tweet_type == "punchline":
         logger.info("Generating punchline-style tweet")
-        paper_title = db.get_arxiv_title_dict()[arxiv_code]
+        paper_title = pm.get_title(arxiv_code)
         punchline_obj = vs.write_punchline_tweet(
             markdown_content=tweet_facts,  # Already contains markdown content
             paper_title=paper_title,
@@ -307,11 +315,11 @@ def main():
     logger.info(f"Selected tweet type: {tweet_type}")
 
     ## Select paper and gather details
-    arxiv_code, paper_details = select_paper(logger)
+    arxiv_code, paper_details, candidate_notes = select_paper(logger)
     logger.info(f"Selected paper: {arxiv_code}")
 
     ## Prepare basic tweet information with appropriate content
-    tweet_facts, post_tweet, publish_date = prepare_tweet_facts(arxiv_code, paper_details, tweet_type, logger)
+    tweet_facts, post_tweet, publish_date = prepare_tweet_facts(arxiv_code, paper_details, tweet_type, logger, candidate_notes)
 
     ## Generate tweet content based on type
     tweet_content = generate_tweet_content(tweet_type, tweet_facts, arxiv_code, publish_date, logger)
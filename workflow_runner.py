@@ -0,0 +1,565 @@
+import os
+import sys
+import time
+import random
+import argparse
+import importlib
+import resource
+import traceback
+import threading
+import subprocess
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+PROJECT_PATH = os.getenv("PROJECT_PATH", "/app")
+sys.path.append(PROJECT_PATH)
+
+import utils.db as db
+from utils.logging_utils import setup_logger
+
+logger = setup_logger(__name__, "workflow_runner.log")
+
+
+@dataclass
+class Step:
+    """A workflow step and its scheduling constraints."""
+
+    name: str
+    script: str
+    deps: tuple = ()
+    critical: bool = False
+    timeout: int = 60 * 60
+    retries: int = 0
+    resources: tuple = ("llm",)
+
+
+## Time a timed out step gets between SIGTERM and SIGKILL.
+TERMINATE_GRACE_SECONDS = 60
+
+## Concurrency limits per shared resource (external APIs, browser, RAM-heavy models).
+RESOURCE_LIMITS = {
+    "llm": 3,
+    "browser": 1,
+    "heavy": 1,
+    "network": 2,
+}
+
+## Dependency graph of the workflow steps, keyed by script stem.
+WORKFLOW_STEPS = {
+    step.script.split("/")[-1].replace(".py", ""): step
+    for step in [
+        Step("0: Web Scraper", "workflow/a0_scrape_lists.py", resources=("browser",)),
+        Step(
+            "1: Tweet Scraper",
+            "workflow/a1_scrape_tweets.py",
+            deps=("a0_scrape_lists",),
+            resources=("browser",),
+        ),
+        Step(
+            "1: Document Fetcher",
+            "workflow/b0_download_paper.py",
+            deps=("a1_scrape_tweets",),
+            critical=True,
+            timeout=3 * 60 * 60,
+        ),
+        Step(
+            "2: Marker Fetcher",
+            "workflow/b1_download_paper_marker.py",
+            deps=("b0_download_paper",),
+            timeout=3 * 60 * 60,
+            resources=("heavy",),
+        ),
+        Step(
+            "2: Meta-Data Collect",
+            "workflow/c0_fetch_meta.py",
+            deps=("b0_download_paper",),
+            critical=True,
+            retries=1,
+            resources=("network",),
+        ),
+        Step(
+            "3: Summarizer",
+            "workflow/d0_summarize.py",
+            deps=("c0_fetch_meta",),
+            critical=True,
+            timeout=3 * 60 * 60,
+        ),
+        Step("4: Narrator", "workflow/e3_narrate_all.py", deps=("d0_summarize",)),
+        Step("5: Reviewer", "workflow/f0_review.py", deps=("d0_summarize",)),
+        Step("6: Visual Artist", "workflow/g0_create_thumbnail.py", deps=("f0_review",)),
+        Step(
+            "7: Scholar",
+            "workflow/h0_citations.py",
+            deps=("f0_review",),
+            retries=1,
+            resources=("network",),
+        ),
+        Step(
+            "8: Embedding Model",
+            "workflow/i0_generate_embeddings.py",
+            deps=("e3_narrate_all",),
+            resources=("heavy",),
+        ),
+        Step(
+            "8: Topic Model",
+            "workflow/i1_topic_model.py",
+            deps=("i0_generate_embeddings",),
+            resources=("heavy",),
+        ),
+        Step(
+            "8: Topic Refit",
+            "workflow/i4_topic_refit.py",
+            deps=("i1_topic_model",),
+            timeout=3 * 60 * 60,
+            resources=("llm",),
+        ),
+        Step(
+            "8.1: Similar Documents",
+            "workflow/i2_similar_docs.py",
+            deps=("i0_generate_embeddings",),
+            resources=("heavy",),
+        ),
+        Step(
+            "8.2: Topic Map",
+            "workflow/i3_topic_map.py",
+            deps=("i1_topic_model", "h0_citations"),
+            resources=("heavy",),
+        ),
+        Step(
+            "12: Page Extractor",
+            "workflow/m0_page_extractor.py",
+            deps=("b1_download_paper_marker",),
+            resources=("network",),
+        ),
+        Step(
+            "13: Repo Extractor",
+            "workflow/n0_repo_extractor.py",
+            deps=("f0_review", "i1_topic_model"),
+        ),
+        Step(
+            "14: GIST Updater",
+            "workflow/z0_update_gist.py",
+            deps=("f0_review",),
+            resources=("network",),
+        ),
+        Step(
+            "15: Generate tweet",
+            "workflow/z1_generate_tweet.py",
+            deps=(
+                "e3_narrate_all",
+                "g0_create_thumbnail",
+                "h0_citations",
+                "m0_page_extractor",
+                "n0_repo_extractor",
+            ),
+            resources=("llm", "browser"),
+        ),
+    ]
+}
+
+
+def validate_graph(steps: dict[str, Step]) -> list[list[str]]:
+    """Validate the dependency graph and return its topological levels."""
+    for key, step in steps.items():
+        missing = [d for d in step.deps if d not in steps]
+        if missing:
+            raise ValueError(f"Step '{key}' depends on unknown steps: {missing}")
+
+    levels = []
+    placed = set()
+    while len(placed) < len(steps):
+        level = [
+            key
+            for key, step in steps.items()
+            if key not in placed and all(d in placed for d in step.deps)
+        ]
+        if not level:
+            raise ValueError("Workflow graph contains a cycle.")
+        levels.append(sorted(level))
+        placed.update(level)
+    return levels
+
+
+def print_schedule(steps: dict[str, Step], max_parallel: int):
+    """Print the execution plan without running anything."""
+    levels = validate_graph(steps)
+    print(f"Workflow schedule ({len(steps)} steps, max {max_parallel} in parallel):")
+    print(f"Resource limits: {RESOURCE_LIMITS}")
+    for idx, level in enumerate(levels):
+        print(f"\n-- Wave {idx} --")
+        for key in level:
+            step = steps[key]
+            flags = ["critical"] if step.critical else []
+            flags.append(f"timeout={step.timeout // 60}m")
+            flags.append(f"retries={step.retries}")
+            flags.append(f"resources={','.join(step.resources)}")
+            deps = ", ".join(step.deps) if step.deps else "-"
+            print(f"  [{step.name}] {step.script}")
+            print(f"      after: {deps} | {' '.join(flags)}")
+
+
+class WorkflowRunner:
+    """Run workflow steps as subprocesses following the dependency graph."""
+
+    def __init__(
+        self,
+        steps: dict[str, Step],
+        max_parallel: int = 4,
+        log_file: Optional[str] = None,
+    ):
+        self.steps = steps
+        self.max_parallel = max_parallel
+        self.log_file = log_file
+        self.log_lock = threading.Lock()
+        self.resource_usage = {r: 0 for r in RESOURCE_LIMITS}
+        self.status = {key: "pending" for key in steps}
+        self.durations = {}
+
+    def _append_log(self, text: str):
+        """Append text to the shared cycle log file."""
+        if not self.log_file:
+            return
+        with self.log_lock:
+            with open(self.log_file, "a") as f:
+                f.write(text)
+
+    def _resources_available(self, step: Step) -> bool:
+        return all(
+            self.resource_usage[r] < RESOURCE_LIMITS[r] for r in step.resources
+        )
+
+    def _acquire(self, step: Step):
+        for r in step.resources:
+            self.resource_usage[r] += 1
+
+    def _release(self, step: Step):
+        for r in step.resources:
+            self.resource_usage[r] -= 1
+
+    def _run_once(self, step: Step) -> tuple[bool, str]:
+        """Execute a step script once, returning success flag and captured output.
+
+        On timeout the step gets SIGTERM first (so it can clean up, e.g. b0
+        syncing its gist) and SIGKILL if it's still running after a grace period."""
+        script_path = os.path.join(PROJECT_PATH, step.script)
+        proc = subprocess.Popen(
+            [sys.executable, script_path],
+            cwd=PROJECT_PATH,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        try:
+            output, _ = proc.communicate(timeout=step.timeout)
+            return proc.returncode == 0, output
+        except subprocess.TimeoutExpired:
+            proc.terminate()
+            try:
+                output, _ = proc.communicate(timeout=TERMINATE_GRACE_SECONDS)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                output, _ = proc.communicate()
+            return False, (output or "") + f"\nStep timed out after {step.timeout} seconds."
+
+    def run_step(self, key: str) -> bool:
+        """Run a step with retries and record the outcome."""
+        step = self.steps[key]
+        st = time.time()
+        for attempt in range(step.retries + 1):
+            if attempt > 0:
+                logger.warning(
+                    f">> [{step.name}] Retrying ({attempt}/{step.retries})..."
+                )
+                time.sleep(30 * attempt)
+            logger.info(f">> [{step.name}] Started at {datetime.now()}")
+            success, output = self._run_once(step)
+            self._append_log(f"\n===== [{step.name}] attempt {attempt + 1} =====\n{output}")
+            if success:
+                break
+
+        self.durations[key] = time.time() - st
+        if success:
+            db.log_workflow_run(step.name, step.script, "success")
+            logger.info(
+                f">> [{step.name}] Completed in {self.durations[key]:.0f}s"
+            )
+        else:
+            db.log_workflow_run(step.name, step.script, "error", output[-5000:])
+            logger.error(f">> [{step.name}] Failed after {step.retries + 1} attempt(s)")
+        return success
+
+    def _is_ready(self, key: str) -> bool:
+        """A step is ready when all dependencies finished without a critical failure."""
+        step = self.steps[key]
+        return all(self.status[d] in ("success", "failed") for d in step.deps)
+
+    def _is_blocked(self, key: str) -> bool:
+        """A step is blocked if a critical dependency failed or was skipped."""
+        step = self.steps[key]
+        return any(
+            self.status[d] == "skipped"
+            or (self.status[d] == "failed" and self.steps[d].critical)
+            for d in step.deps
+        )
+
+    def run(self) -> bool:
+        """Run the full graph; returns False if any critical step failed."""
+        validate_graph(self.steps)
+        running = {}
+        abort = False
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            while True:
+                ## Propagate skips from failed critical dependencies.
+                for key in self.steps:
+                    if self.status[key] == "pending" and self._is_blocked(key):
+                        self.status[key] = "skipped"
+                        logger.warning(f">> [{self.steps[key].name}] Skipped.")
+
+                ## Launch ready steps within parallelism and resource limits.
+                if not abort:
+                    for key in self.steps:
+                        if len(running) >= self.max_parallel:
+                            break
+                        step = self.steps[key]
+                        if (
+                            self.status[key] == "pending"
+                            and self._is_ready(key)
+                            and self._resources_available(step)
+                        ):
+                            self._acquire(step)
+                            self.status[key] = "running"
+                            running[executor.submit(self.run_step, key)] = key
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    self._release(self.steps[key])
+                    try:
+                        success = future.result()
+                    except Exception as e:
+                        logger.error(f">> [{self.steps[key].name}] Runner error: {e}")
+                        success = False
+                    self.status[key] = "success" if success else "failed"
+                    if not success and self.steps[key].critical:
+                        logger.error(
+                            f">> Critical step '{self.steps[key].name}' failed; "
+                            "waiting for running steps and stopping the cycle."
+                        )
+                        abort = True
+
+        ## Steps never launched due to an abort are reported as skipped.
+        for key in self.steps:
+            if self.status[key] == "pending":
+                self.status[key] = "skipped"
+
+        self.report()
+        return not any(
+            self.status[k] == "failed" and self.steps[k].critical for k in self.steps
+        )
+
+    def report(self):
+        """Log a summary of the cycle."""
+        logger.info("Workflow cycle summary:")
+        for key, step in self.steps.items():
+            duration = self.durations.get(key)
+            duration_str = f"{duration:.0f}s" if duration is not None else "-"
+            logger.info(f"  {self.status[key]:>8} | {duration_str:>6} | {step.name}")
+
+
+def current_rss_mb() -> float:
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    ## Fallback (non-Linux): lifetime peak, reported in KB on Linux / bytes on macOS.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+class PeakRSSMonitor:
+    """Sample process RSS in a background thread to track the peak during a block."""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_mb = current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+
+class InProcessRunner:
+    """Run workflow steps sequentially inside this process by calling each step's main().
+
+    Imports, the DB connection pool, LLM/S3 clients and cached models stay warm
+    across steps (and across cycles with --loop). Per-step timeouts are not
+    enforced in this mode; retries and critical/non-critical handling are."""
+
+    def __init__(self, steps: dict[str, Step]):
+        self.steps = steps
+        self.status = {key: "pending" for key in steps}
+        self.durations = {}
+        self.peak_rss = {}
+
+    def run_step(self, key: str) -> bool:
+        """Import the step module (once) and run its main() with retries."""
+        step = self.steps[key]
+        error_message = None
+        success = False
+        st = time.time()
+        with PeakRSSMonitor() as monitor:
+            for attempt in range(step.retries + 1):
+                if attempt > 0:
+                    logger.warning(
+                        f">> [{step.name}] Retrying ({attempt}/{step.retries})..."
+                    )
+                    time.sleep(30 * attempt)
+                logger.info(f">> [{step.name}] Started at {datetime.now()}")
+                ## Steps read sys.argv as if run as scripts (e.g. a0's optional
+                ## date range); don't leak the runner's own flags into them.
+                runner_argv = sys.argv
+                sys.argv = [step.script]
+                try:
+                    module = importlib.import_module(f"workflow.{key}")
+                    module.main()
+                    success = True
+                except SystemExit as e:
+                    ## Some steps exit early with sys.exit(0) when there is no work.
+                    success = e.code in (None, 0)
+                    if not success:
+                        error_message = f"SystemExit({e.code})"
+                except Exception:
+                    error_message = traceback.format_exc()
+                    logger.error(error_message)
+                finally:
+                    sys.argv = runner_argv
+                    ## Steps may chdir; restore the project root for the next one.
+                    os.chdir(PROJECT_PATH)
+                if success:
+                    break
+
+        self.durations[key] = time.time() - st
+        self.peak_rss[key] = monitor.peak_mb
+        if success:
+            db.log_workflow_run(step.name, step.script, "success")
+            logger.info(
+                f">> [{step.name}] Completed in {self.durations[key]:.0f}s "
+                f"(peak RSS {monitor.peak_mb:.0f} MB)"
+            )
+        else:
+            db.log_workflow_run(step.name, step.script, "error", error_message)
+            logger.error(f">> [{step.name}] Failed after {step.retries + 1} attempt(s)")
+        return success
+
+    def run(self) -> bool:
+        """Run all steps in topological order; returns False if a critical step failed."""
+        self.status = {key: "pending" for key in self.steps}
+        order = [key for level in validate_graph(self.steps) for key in level]
+        abort = False
+        for key in order:
+            step = self.steps[key]
+            blocked = any(
+                self.status[d] == "skipped"
+                or (self.status[d] == "failed" and self.steps[d].critical)
+                for d in step.deps
+            )
+            if abort or blocked:
+                self.status[key] = "skipped"
+                logger.warning(f">> [{step.name}] Skipped.")
+                continue
+            success = self.run_step(key)
+            self.status[key] = "success" if success else "failed"
+            if not success and step.critical:
+                logger.error(f">> Critical step '{step.name}' failed; stopping the cycle.")
+                abort = True
+
+        self.report()
+        return not abort
+
+    def report(self):
+        """Log per-step wall time and peak RSS for the cycle."""
+        logger.info("Workflow cycle summary:")
+        for key, step in self.steps.items():
+            duration = self.durations.get(key)
+            duration_str = f"{duration:.0f}s" if duration is not None else "-"
+            rss = self.peak_rss.get(key)
+            rss_str = f"{rss:.0f}MB" if rss is not None else "-"
+            logger.info(
+                f"  {self.status[key]:>8} | {duration_str:>6} | {rss_str:>8} | {step.name}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the LLMpedia workflow DAG.")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Print the schedule and exit."
+    )
+    parser.add_argument(
+        "--max-parallel", type=int, default=4, help="Max. steps running at once."
+    )
+    parser.add_argument("--log-file", help="Cycle log file to append step output to.")
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run steps sequentially in this process, sharing warm state.",
+    )
+    parser.add_argument(
+        "--loop",
+        action="store_true",
+        help="Keep running cycles, sleeping 150-300 minutes in between.",
+    )
+    args = parser.parse_args()
+
+    if args.dry_run:
+        print_schedule(WORKFLOW_STEPS, args.max_parallel)
+        return
+
+    while True:
+        logger.info(f"Workflow started at {datetime.now()}")
+        ## S3 listings are refreshed once per cycle (see pu.list_s3_files); steps
+        ## inherit the cycle start through the environment.
+        os.environ["S3_MANIFEST_RUN_STARTED"] = str(time.time())
+        if args.in_process:
+            runner = InProcessRunner(WORKFLOW_STEPS)
+        else:
+            runner = WorkflowRunner(
+                WORKFLOW_STEPS, max_parallel=args.max_parallel, log_file=args.log_file
+            )
+        success = runner.run()
+        logger.info(f"Cycle completed at {datetime.now()}")
+        if not args.loop:
+            break
+        sleep_minutes = random.randint(150, 300)
+        logger.info(f"Sleeping for {sleep_minutes} minutes...")
+        time.sleep(sleep_minutes * 60)
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()